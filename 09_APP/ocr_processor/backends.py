@@ -0,0 +1,361 @@
+"""
+Extraction backend registry
+Every backend turns a document into the same per-page dicts
+({"page", "method", "text"} plus "confidence" for OCR'd pages). With
+backend "auto", each file gets the fastest backend that calibration found
+acceptable for its document class
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from page_ocr import (
+    extract_pages, extract_pdf_pages, extract_ocr_pages, has_text_layer, is_image_file,
+    join_pages, resolve_settings, HAS_OCR,
+)
+from reocr import reocr_weak_pages
+import metrics
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+try:
+    import PyPDF2
+    HAS_PYPDF2 = True
+except ImportError:
+    HAS_PYPDF2 = False
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_CLASSES = ("text_pdf", "mixed_pdf", "scanned_pdf", "image")
+
+# Used for "auto" when there is no calibration for a class, and as the
+# reference output calibration scores the other backends against
+DEFAULT_BACKEND = "hybrid"
+
+# Pages sampled, evenly spread from first to last, to classify a PDF
+CLASSIFY_PAGES = 3
+
+# A backend is acceptable for a class if, on every calibration file, it
+# recovers at least this fraction of the reference backend's words
+MIN_RECALL = 0.95
+
+
+class Backend:
+    """One way of extracting a document's pages.
+
+    Subclasses set `name` (and `handles_images` if they read image files)
+    and implement extract_pages(); register them with @register_backend.
+    """
+
+    name = ""
+    handles_images = False
+
+    def available(self) -> bool:
+        return True
+
+    def supports(self, path: str) -> bool:
+        return self.handles_images or not is_image_file(path)
+
+    def extract_pages(self, path: str, settings: Dict[str, Any]) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+BACKENDS: Dict[str, Backend] = {}
+
+
+def register_backend(cls):
+    BACKENDS[cls.name] = cls()
+    return cls
+
+
+@register_backend
+class PdfplumberBackend(Backend):
+    """Text layer via pdfplumber (layout-aware, slower); pages without one are OCR'd."""
+
+    name = "pdfplumber"
+
+    def available(self) -> bool:
+        return HAS_PDFPLUMBER
+
+    def extract_pages(self, path, settings):
+        return extract_pdf_pages(path, settings)
+
+
+@register_backend
+class PyPDF2Backend(Backend):
+    """Text layer via PyPDF2 (fast, plainer spacing); pages without one are OCR'd."""
+
+    name = "pypdf2"
+
+    def available(self) -> bool:
+        return HAS_PYPDF2
+
+    def extract_pages(self, path, settings):
+        try:
+            with metrics.stage("native"), open(path, 'rb') as f:
+                texts = [page.extract_text() or "" for page in PyPDF2.PdfReader(f).pages]
+        except Exception as e:
+            logger.warning(f"PyPDF2 extraction failed for {path}: {e}")
+            texts = []
+        # Sampled classification can call a mixed PDF text_pdf, so image-only
+        # pages still get the per-page OCR fallback rather than coming back empty
+        return extract_pdf_pages(path, settings, native=texts)
+
+
+@register_backend
+class TesseractBackend(Backend):
+    """OCR every page, ignoring any text layer."""
+
+    name = "tesseract"
+    handles_images = True
+
+    def available(self) -> bool:
+        return HAS_OCR
+
+    def extract_pages(self, path, settings):
+        return extract_ocr_pages(path, settings)
+
+
+@register_backend
+class HybridBackend(Backend):
+    """Text layer where a page has one, OCR for the rest (page_ocr.extract_pages)."""
+
+    name = "hybrid"
+    handles_images = True
+
+    def available(self) -> bool:
+        return HAS_PDFPLUMBER or HAS_OCR
+
+    def extract_pages(self, path, settings):
+        return extract_pages(path, settings)
+
+
+def available_backends(path: Optional[str] = None) -> List[str]:
+    """Registered backends that can run here (and can read `path`, if given)."""
+    return [name for name, backend in BACKENDS.items()
+            if backend.available() and (path is None or backend.supports(path))]
+
+
+def _sample_indices(count: int) -> List[int]:
+    steps = max(CLASSIFY_PAGES - 1, 1)
+    return sorted({round(i * (count - 1) / steps) for i in range(CLASSIFY_PAGES)}) if count else []
+
+
+def sample_native_text(path: str) -> List[str]:
+    """Text layer of a few pages spread through the PDF (cheapest reader available)."""
+    try:
+        if HAS_PYPDF2:
+            with open(path, 'rb') as f:
+                pages = PyPDF2.PdfReader(f).pages
+                return [pages[i].extract_text() or "" for i in _sample_indices(len(pages))]
+        if HAS_PDFPLUMBER:
+            with pdfplumber.open(path) as pdf:
+                return [pdf.pages[i].extract_text() or "" for i in _sample_indices(len(pdf.pages))]
+    except Exception as e:
+        logger.warning(f"Could not sample text layer of {path}: {e}")
+    return []
+
+
+def classify_document(path: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    """One of DOCUMENT_CLASSES, from the suffix or a few sampled pages."""
+    if is_image_file(path):
+        return "image"
+    settings = resolve_settings(settings)
+    sampled = sample_native_text(path)
+    with_text = sum(1 for text in sampled if has_text_layer(text, settings["min_page_chars"]))
+    if sampled and with_text == len(sampled):
+        return "text_pdf"
+    return "mixed_pdf" if with_text else "scanned_pdf"
+
+
+def default_calibration_path() -> Path:
+    """06_SCANS/OCR_CACHE/calibration.json (machine-specific, like the cache)."""
+    repo_root = Path(__file__).parent.parent.parent
+    return repo_root / "06_SCANS" / "OCR_CACHE" / "calibration.json"
+
+
+# path -> (mtime_ns, calibration), so "auto" reads the file once per change
+_calibrations: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+
+
+def load_calibration(path: Optional[Path] = None) -> Dict[str, Any]:
+    """Saved calibration, or {} if there is none yet."""
+    path = Path(path) if path else default_calibration_path()
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    cached = _calibrations.get(str(path))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            calibration = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable calibration {path}: {e}")
+        calibration = {}
+    _calibrations[str(path)] = (mtime, calibration)
+    return calibration
+
+
+def save_calibration(calibration: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    path = Path(path) if path else default_calibration_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def select_backend(path: str, settings: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[str]]:
+    """(backend name, document class) for `path`.
+
+    The class is None unless "auto" picked from a calibration; without
+    one, every file gets DEFAULT_BACKEND and is not classified. Raises
+    ValueError if a backend named explicitly cannot run here or
+    cannot read `path` (e.g. pdfplumber on an image).
+    """
+    settings = resolve_settings(settings)
+    name = settings["backend"]
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown backend {name!r}; expected auto or one of {tuple(BACKENDS)}")
+        if not BACKENDS[name].available():
+            raise ValueError(f"Backend {name!r} is not available here (missing dependencies)")
+        if not BACKENDS[name].supports(path):
+            raise ValueError(f"Backend {name!r} cannot read {Path(path).name}; "
+                             f"use auto or one of {tuple(available_backends(path))}")
+        return name, None
+
+    classes = load_calibration().get("classes", {})
+    if not classes:
+        return DEFAULT_BACKEND, None
+    with metrics.stage("open"):
+        doc_class = classify_document(path, settings)
+    chosen = classes.get(doc_class, {}).get("backend")
+    if chosen not in available_backends(path):
+        chosen = DEFAULT_BACKEND
+    return chosen, doc_class
+
+
+def resolve_backend(path: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """`settings` with "backend" set to the backend `path` will actually use.
+
+    Cache, checkpoint and store keys hash the settings, so they must see
+    the resolved name: with "auto", a recalibration that moves a document
+    class to another backend then misses the old output.
+    """
+    settings = resolve_settings(settings)
+    name, doc_class = select_backend(path, settings)
+    return dict(settings, backend=name, document_class=doc_class or settings.get("document_class"))
+
+
+def lookup_settings(path: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """`settings` as cache, store and manifest keys should see them, without opening `path`.
+
+    An explicit backend is checked as in select_backend. "auto" is kept,
+    with "calibration" set to a fingerprint of the calibrated backend per
+    class (and of what can run here), so a recalibration still misses the
+    old output; the document is only classified if it is extracted.
+    """
+    settings = resolve_settings(settings)
+    if settings["backend"] != "auto":
+        return resolve_backend(path, settings)
+    classes = load_calibration().get("classes", {})
+    material = {"classes": {doc_class: entry.get("backend") for doc_class, entry in classes.items()},
+                "available": available_backends()}
+    fingerprint = hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()[:16]
+    return dict(settings, calibration=fingerprint)
+
+
+def run_backend(path: str, settings: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Dict[str, Any]]]:
+    """Extract `path` with the configured (or auto-selected) backend.
+
+    With settings["reocr_below"], weak OCR pages then get a second pass.
+    """
+    settings = resolve_backend(path, settings)
+    name = settings["backend"]
+    if settings["document_class"]:
+        logger.info(f"🔌 Backend: {name} ({settings['document_class']})")
+    pages = BACKENDS[name].extract_pages(path, settings)
+    if settings["reocr_below"] is not None and HAS_OCR:
+        with metrics.stage("reocr"):
+            pages = reocr_weak_pages(path, pages, settings)
+    return name, pages
+
+
+def word_recall(text: str, reference: str) -> float:
+    """Fraction of the reference's words (with multiplicity) found in `text`."""
+    wanted = Counter(reference.split())
+    total = sum(wanted.values())
+    if not total:
+        return 1.0
+    found = Counter(text.split())
+    return sum(min(count, found[word]) for word, count in wanted.items()) / total
+
+
+def calibrate(paths: List[str], settings: Optional[Dict[str, Any]] = None,
+              min_recall: float = MIN_RECALL) -> Dict[str, Any]:
+    """Time every available backend on `paths` and pick one per document class.
+
+    Output quality is word recall against DEFAULT_BACKEND's output; the
+    chosen backend is the fastest (seconds per page) whose worst file
+    stays at or above `min_recall`.
+    """
+    settings = resolve_settings(dict(settings or {}, checkpoint_dir=""))
+    stats: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    for path in paths:
+        path = str(path)
+        doc_class = classify_document(path, settings)
+        outputs = {}
+        for name in available_backends(path):
+            start = time.perf_counter()
+            pages = BACKENDS[name].extract_pages(path, settings)
+            outputs[name] = (pages, time.perf_counter() - start)
+        if not outputs:
+            continue
+
+        if DEFAULT_BACKEND in outputs:
+            reference_pages = outputs[DEFAULT_BACKEND][0]
+        else:
+            reference_pages = max((pages for pages, _ in outputs.values()),
+                                  key=lambda pages: len(join_pages(pages)))
+        reference = join_pages(reference_pages)
+        page_count = max(len(reference_pages), 1)
+        logger.info(f"📏 {Path(path).name} ({doc_class}, {page_count} pages): "
+                    + ", ".join(f"{name} {elapsed:.2f}s" for name, (_, elapsed) in outputs.items()))
+
+        for name, (pages, elapsed) in outputs.items():
+            entry = stats.setdefault(doc_class, {}).setdefault(
+                name, {"seconds": 0.0, "pages": 0, "files": 0, "recall_sum": 0.0, "min_recall": 1.0})
+            recall = word_recall(join_pages(pages), reference)
+            entry["seconds"] += elapsed
+            entry["pages"] += page_count
+            entry["files"] += 1
+            entry["recall_sum"] += recall
+            entry["min_recall"] = min(entry["min_recall"], recall)
+
+    classes = {}
+    for doc_class, by_backend in stats.items():
+        results = {name: {"sec_per_page": round(e["seconds"] / e["pages"], 4),
+                          "mean_recall": round(e["recall_sum"] / e["files"], 4),
+                          "min_recall": round(e["min_recall"], 4),
+                          "files": e["files"]}
+                   for name, e in by_backend.items()}
+        acceptable = [name for name, r in results.items() if r["min_recall"] >= min_recall]
+        best = min(acceptable, key=lambda name: results[name]["sec_per_page"]) if acceptable else DEFAULT_BACKEND
+        classes[doc_class] = {"backend": best, "results": results}
+
+    return {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "min_recall": min_recall, "classes": classes}
@@ -0,0 +1,4 @@
+"""
+Benchmarks for the OCR processor
+Run from 09_APP/ocr_processor, e.g. python -m benchmarks.bench_tesseract_worker
+"""
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Speed vs accuracy of preprocessing and adaptive DPI on a labelled sample
+
+Usage:
+    python -m benchmarks.bench_preprocess SAMPLE_DIR [--json OUT]
+
+SAMPLE_DIR holds scans (`name.pdf`, `name.png`, `name.jpg`, `name.tif`)
+next to their ground truth (`name.gt.txt`). Every configuration OCRs the
+whole sample; the report gives seconds per page and character accuracy
+(1 - character error rate, whitespace-normalised).
+"""
+
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+from page_ocr import ocr_image, iter_pages, count_pages, auto_dpi, resolve_settings
+from preprocess import preprocess_page
+
+CONFIGS = [
+    {"name": "baseline (200 dpi)", "dpi": 200, "preprocess": False},
+    {"name": "preprocess (200 dpi)", "dpi": 200, "preprocess": True},
+    {"name": "adaptive dpi", "dpi": "auto", "preprocess": False},
+    {"name": "adaptive dpi + preprocess", "dpi": "auto", "preprocess": True},
+]
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".tif", ".tiff"}
+
+
+def levenshtein(a: str, b: str) -> int:
+    """Edit distance with a rolling row (O(len(b)) memory)."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def char_accuracy(predicted: str, truth: str) -> float:
+    predicted, truth = " ".join(predicted.split()), " ".join(truth.split())
+    if not truth:
+        return 1.0 if not predicted else 0.0
+    return max(0.0, 1.0 - levenshtein(predicted, truth) / len(truth))
+
+
+def load_sample(sample_dir: Path) -> List[Tuple[Path, str]]:
+    sample = []
+    for gt in sorted(sample_dir.glob("*.gt.txt")):
+        stem = gt.name[:-len(".gt.txt")]
+        for candidate in sample_dir.glob(f"{stem}.*"):
+            if candidate.suffix.lower() in IMAGE_SUFFIXES | {".pdf"}:
+                sample.append((candidate, gt.read_text(encoding="utf-8")))
+                break
+    return sample
+
+
+def ocr_document(path: Path, config: Dict[str, Any]) -> Tuple[str, int]:
+    """OCR one sample document under `config`; returns (text, pages)."""
+    settings = resolve_settings({"workers": 1, "preprocess": config["preprocess"]})
+    texts = []
+    if path.suffix.lower() == ".pdf":
+        dpi = auto_dpi(str(path), 1) if config["dpi"] == "auto" else config["dpi"]
+        pages = count_pages(str(path))
+        for _, img in iter_pages(str(path), 1, pages, dpi=dpi):
+            if config["preprocess"]:
+                img = preprocess_page(img)
+            texts.append(ocr_image(img, settings)["text"])
+        return "\n".join(texts), pages
+
+    # Images have a fixed resolution; "auto" does not apply
+    with Image.open(path) as img:
+        if config["preprocess"]:
+            img = preprocess_page(img)
+        return ocr_image(img, settings)["text"], 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("sample_dir", help="directory of scans + .gt.txt ground truth")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    sample = load_sample(Path(args.sample_dir))
+    if not sample:
+        parser.error(f"no labelled documents (*.gt.txt) in {args.sample_dir}")
+
+    results = []
+    for config in CONFIGS:
+        pages = 0
+        accuracies = []
+        start = time.perf_counter()
+        for path, truth in sample:
+            text, n = ocr_document(path, config)
+            pages += n
+            accuracies.append(char_accuracy(text, truth))
+        elapsed = time.perf_counter() - start
+        results.append({
+            "config": config["name"],
+            "sec_per_page": elapsed / pages if pages else 0.0,
+            "char_accuracy": sum(accuracies) / len(accuracies),
+        })
+
+    print(f"{len(sample)} documents\n")
+    print(f"{'configuration':<28} {'sec/page':>9} {'accuracy':>9}")
+    for r in results:
+        print(f"{r['config']:<28} {r['sec_per_page']:>9.2f} {100 * r['char_accuracy']:>8.1f}%")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"documents": len(sample), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Render → OCR I/O: pdf2image + pytesseract temp files vs the pdftoppm/tesseract pipe
+
+Usage:
+    python -m benchmarks.bench_render_pipe --pdf FILE [--pages N] [--render-only] [--json OUT]
+
+Bytes written come from getrusage() block-output counts for this process
+and its children (512-byte blocks). They only count writes that reach a
+block device, so point TMPDIR at a disk-backed directory if /tmp is tmpfs.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+from typing import Any, Dict
+
+from page_ocr import iter_pages, ocr_page_range, resolve_settings, RENDERERS
+
+BLOCK_BYTES = 512
+
+
+def blocks_written() -> int:
+    return sum(resource.getrusage(who).ru_oublock
+               for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+
+def time_renderer(renderer: str, pdf_path: str, pages: int, render_only: bool) -> Dict[str, Any]:
+    settings = resolve_settings({"renderer": renderer, "workers": 1, "checkpoint_dir": ""})
+    if settings["renderer"] != renderer:
+        return {"renderer": renderer, "skipped": True}
+
+    os.sync()
+    before = blocks_written()
+    start = time.perf_counter()
+    if render_only:
+        for _ in iter_pages(pdf_path, 1, pages, settings["window"], settings["dpi"], renderer):
+            pass
+    else:
+        ocr_page_range(pdf_path, 1, pages, settings)
+    elapsed = time.perf_counter() - start
+    written = (blocks_written() - before) * BLOCK_BYTES
+
+    return {"renderer": renderer, "pages": pages, "wall_sec": elapsed,
+            "sec_per_page": elapsed / pages, "bytes_written": written,
+            "bytes_per_page": written / pages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf", required=True, help="PDF to render (image-only pages show the difference best)")
+    parser.add_argument("--pages", type=int, default=10, help="pages from the start of the PDF (default: 10)")
+    parser.add_argument("--render-only", action="store_true", help="render pages without OCR")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = [time_renderer(r, args.pdf, args.pages, args.render_only) for r in RENDERERS]
+
+    print(f"{'renderer':<10} {'wall s':>8} {'s/page':>8} {'KiB written':>12} {'KiB/page':>9}")
+    for r in results:
+        if r.get("skipped"):
+            print(f"{r['renderer']:<10} skipped (pdftoppm not on PATH)", file=sys.stderr)
+            continue
+        print(f"{r['renderer']:<10} {r['wall_sec']:>8.2f} {r['sec_per_page']:>8.3f} "
+              f"{r['bytes_written'] / 1024:>12.0f} {r['bytes_per_page'] / 1024:>9.1f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"pdf": args.pdf, "render_only": args.render_only, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
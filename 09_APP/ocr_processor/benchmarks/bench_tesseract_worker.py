@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Per-page OCR overhead: tesseract CLI (pytesseract) vs persistent tesserocr API
+
+Usage:
+    python -m benchmarks.bench_tesseract_worker [--pdf FILE] [--pages N] [--json OUT]
+
+Overhead is measured on a blank page (no recognition work), so it is the
+fixed cost each engine pays per page: process start + model load for the
+CLI, a SetImage/GetUTF8Text round-trip for the in-process API.
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Any, Dict, List
+
+from PIL import Image, ImageDraw
+
+from page_ocr import ocr_image, iter_pages, resolve_settings, HAS_TESSEROCR
+
+SAMPLE_LINES = [
+    "IN THE COURT OF COMMON PLEAS",
+    "Motion for Modification of Custody",
+    "Exhibit B - Text messages, page 2",
+]
+
+
+def synthetic_pages(count: int, lines: int = 3) -> List[Any]:
+    """Short letter-size pages (a few lines each), where start-up cost dominates."""
+    pages = []
+    for i in range(count):
+        img = Image.new("L", (1700, 2200), 255)
+        draw = ImageDraw.Draw(img)
+        for line in range(lines):
+            draw.text((150, 200 + 60 * line), f"{SAMPLE_LINES[line % len(SAMPLE_LINES)]} #{i}", fill=0)
+        pages.append(img)
+    return pages
+
+
+def time_engine(engine: str, pages: List[Any], blank_runs: int) -> Dict[str, float]:
+    settings = resolve_settings({"engine": engine, "workers": 1})
+
+    # Warm-up so the in-process engine's one-off model load is not counted per page
+    ocr_image(pages[0], settings)
+
+    blank = Image.new("L", (64, 64), 255)
+    start = time.perf_counter()
+    for _ in range(blank_runs):
+        ocr_image(blank, settings)
+    overhead = (time.perf_counter() - start) / blank_runs
+
+    start = time.perf_counter()
+    for img in pages:
+        ocr_image(img, settings)
+    per_page = (time.perf_counter() - start) / len(pages)
+
+    return {"engine": engine, "per_page_sec": per_page, "overhead_sec": overhead,
+            "overhead_share": overhead / per_page if per_page else 0.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pdf", help="use pages of this PDF instead of synthetic short pages")
+    parser.add_argument("--pages", type=int, default=20, help="pages to OCR per engine (default: 20)")
+    parser.add_argument("--blank-runs", type=int, default=10, help="blank-page calls for overhead (default: 10)")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.pdf:
+        pages = [img.copy() for _, img in iter_pages(args.pdf, 1, args.pages)]
+    else:
+        pages = synthetic_pages(args.pages)
+
+    engines = ["tesseract"] + (["tesserocr"] if HAS_TESSEROCR else [])
+    if not HAS_TESSEROCR:
+        print("⚠️  tesserocr not installed; only the CLI engine is measured", file=sys.stderr)
+
+    results = [time_engine(engine, pages, args.blank_runs) for engine in engines]
+
+    print(f"{'engine':<10} {'sec/page':>10} {'overhead':>10} {'overhead %':>11}")
+    for r in results:
+        print(f"{r['engine']:<10} {r['per_page_sec']:>10.3f} {r['overhead_sec']:>10.3f} "
+              f"{100 * r['overhead_share']:>10.1f}%")
+    if len(results) == 2:
+        saved = results[0]["overhead_sec"] - results[1]["overhead_sec"]
+        print(f"\nPer-page overhead saved by the persistent worker: {saved * 1000:.0f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({"pages": len(pages), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput of the extraction entry points on a synthetic corpus
+
+Usage:
+    python -m benchmarks.bench_throughput [--corpus DIR] [--entry NAME ...] [--workers N]
+                                          [--save OUT.json] [--compare BASELINE.json]
+    python -m benchmarks.bench_throughput --compare OLD.json NEW.json
+
+The corpus (benchmarks.corpus) is generated on first use and reused while
+the seed and size match. Each entry point runs in its own process over
+every document: pages/sec, peak RSS of that process and of its largest
+child (OCR worker or tesseract; a forked child's peak includes the pages
+it inherited), and character accuracy against the corpus ground truth, overall
+and per category. Results are saved as JSON (by default under
+CORPUS/results/). With --compare, a pages/sec drop or RSS increase beyond
+--tolerance, or any accuracy drop beyond ACCURACY_TOLERANCE, is reported
+as a regression and the exit status is 1.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import difflib
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from benchmarks.corpus import ensure_corpus, load_corpus, CATEGORIES, DEFAULT_SEED, DEFAULT_DOCS
+from benchmarks.bench_preprocess import levenshtein
+
+RESULTS_VERSION = 1
+DEFAULT_CORPUS = Path(tempfile.gettempdir()) / "ocr_bench_corpus"
+APP_DIR = Path(__file__).resolve().parent.parent
+
+# Relative pages/sec drop or RSS rise that counts as a regression
+DEFAULT_TOLERANCE = 0.10
+# Absolute character-accuracy drop that counts as a regression (output is deterministic)
+ACCURACY_TOLERANCE = 0.002
+
+
+def run_standalone(path: str, settings: Dict[str, Any], scratch: Path) -> List[str]:
+    """standalone_ocr.process_file, read back through the page index it writes."""
+    from standalone_ocr import process_file
+    from page_index import PageIndex
+    result = process_file(path, str(scratch), settings)
+    if result["status"] != "success":
+        raise RuntimeError(result.get("message", result["status"]))
+    with PageIndex(result["output"], result["index_file"]) as index:
+        return [index.page(n) for n in range(1, len(index) + 1)]
+
+
+def run_ocr_processor(path: str, settings: Dict[str, Any], scratch: Path) -> List[str]:
+    from ocr_processor import extract_text
+    return extract_text(path, settings)["page_texts"]
+
+
+def run_ocr_tasks(path: str, settings: Dict[str, Any], scratch: Path) -> List[str]:
+    from ocr_tasks import extract_text_from_pdf
+    result = extract_text_from_pdf(path, **settings)
+    if result["status"] != "success":
+        raise RuntimeError(result["error"])
+    return result["page_texts"]
+
+
+ENTRY_POINTS: Dict[str, Callable[[str, Dict[str, Any], Path], List[str]]] = {
+    "standalone": run_standalone,
+    "ocr_processor": run_ocr_processor,
+    "ocr_tasks": run_ocr_tasks,
+}
+ENTRY_MODULES = {"standalone": "standalone_ocr", "ocr_processor": "ocr_processor", "ocr_tasks": "ocr_tasks"}
+
+
+def _lines(text: str) -> List[str]:
+    return [" ".join(line.split()) for line in text.splitlines() if line.strip()]
+
+
+def edit_distance(predicted: str, truth: str) -> int:
+    """Character edits from `predicted` to `truth` (whitespace-normalised).
+
+    Lines are aligned first and only differing blocks are compared
+    character by character, which keeps page-sized inputs fast; the
+    result can exceed the true Levenshtein distance only when a change
+    crosses a line boundary.
+    """
+    a, b = _lines(predicted), _lines(truth)
+    return sum(levenshtein(" ".join(a[i1:i2]), " ".join(b[j1:j2]))
+               for op, i1, i2, j1, j2 in difflib.SequenceMatcher(None, a, b, autojunk=False).get_opcodes()
+               if op != "equal")
+
+
+def truth_chars(truth: str) -> int:
+    return len(" ".join(truth.split()))
+
+
+def peak_rss_mb(who: int) -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 ** 2 if sys.platform == "darwin" else 1024), 1)
+
+
+def _totals(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    pages = sum(d["pages"] for d in docs)
+    seconds = sum(d["seconds"] for d in docs)
+    chars = sum(d["truth_chars"] for d in docs)
+    edits = sum(d["edits"] for d in docs)
+    return {
+        "documents": len(docs),
+        "pages": pages,
+        "seconds": round(seconds, 3),
+        "pages_per_sec": round(pages / seconds, 3) if seconds > 0 else 0.0,
+        "accuracy": round(max(0.0, 1 - edits / chars), 4) if chars else 1.0,
+        "errors": sum(1 for d in docs if d.get("error")),
+    }
+
+
+def run_entry(name: str, corpus_dir: Path, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one entry point over the corpus in this process (called in a child)."""
+    # Per-file INFO logging would dominate the runtime of small pages
+    logging.disable(logging.INFO)
+    try:
+        __import__(ENTRY_MODULES[name])
+    except ImportError as e:
+        return {"status": "skipped", "reason": f"{ENTRY_MODULES[name]} not importable: {e}"}
+    entry = ENTRY_POINTS[name]
+    manifest = load_corpus(corpus_dir)
+
+    docs = []
+    with tempfile.TemporaryDirectory(prefix="ocr_bench_") as scratch:
+        for doc in manifest["documents"]:
+            path = str(corpus_dir / doc["file"])
+            result = {"file": doc["file"], "category": doc["category"], "pages": len(doc["truth"]),
+                      "truth_chars": sum(truth_chars(t) for t in doc["truth"])}
+            start = time.perf_counter()
+            try:
+                page_texts = entry(path, dict(settings), Path(scratch))
+            except Exception as e:
+                page_texts = []
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["seconds"] = time.perf_counter() - start
+            # Missing or extra pages cost their whole text
+            page_texts = list(page_texts) + [""] * (len(doc["truth"]) - len(page_texts))
+            result["edits"] = (sum(edit_distance(p, t) for p, t in zip(page_texts, doc["truth"]))
+                               + sum(truth_chars(p) for p in page_texts[len(doc["truth"]):]))
+            docs.append(result)
+
+    from page_ocr import shutdown_pools
+    shutdown_pools()
+    return {
+        "status": "ok",
+        **_totals(docs),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "workers_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+        "categories": {c: _totals([d for d in docs if d["category"] == c])
+                       for c in CATEGORIES if any(d["category"] == c for d in docs)},
+        "failed": [{"file": d["file"], "error": d["error"]} for d in docs if d.get("error")],
+    }
+
+
+def spawn_entry(name: str, corpus_dir: Path, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """run_entry() in a fresh interpreter, so peak RSS belongs to this entry alone."""
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_throughput", "--corpus", str(corpus_dir),
+         "--run-entry", name, "--settings", json.dumps(settings)],
+        cwd=APP_DIR, capture_output=True, text=True)
+    if proc.returncode != 0 or not proc.stdout.strip():
+        return {"status": "failed", "reason": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=APP_DIR,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> Tuple[List[str], List[str]]:
+    """(regressions, notes) of `new` against the baseline `old`."""
+    regressions, notes = [], []
+    if old["corpus"]["digest"] != new["corpus"]["digest"]:
+        notes.append("corpora differ (seed, size or generator changed); compare with care")
+    if old["settings"] != new["settings"]:
+        notes.append(f"settings differ: {old['settings']} → {new['settings']}")
+    for name, entry in new["entries"].items():
+        base = old["entries"].get(name)
+        if not base or base["status"] != "ok" or entry["status"] != "ok":
+            continue
+        if base["pages_per_sec"] and entry["pages_per_sec"] < base["pages_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {entry['pages_per_sec']:.2f} pages/sec vs {base['pages_per_sec']:.2f}")
+        for key in ("peak_rss_mb", "workers_peak_rss_mb"):
+            if base[key] and entry[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{name}: {key} {entry[key]:.0f} MB vs {base[key]:.0f} MB")
+        for category, stats in [("all", entry)] + list(entry["categories"].items()):
+            before = base if category == "all" else base["categories"].get(category)
+            if before and stats["accuracy"] < before["accuracy"] - ACCURACY_TOLERANCE:
+                regressions.append(f"{name}/{category}: accuracy {100 * stats['accuracy']:.2f}% "
+                                   f"vs {100 * before['accuracy']:.2f}%")
+    return regressions, notes
+
+
+def format_results(results: Dict[str, Any]) -> str:
+    corpus = results["corpus"]
+    lines = [f"corpus seed {corpus['seed']}, {corpus['documents']} documents, {corpus['pages']} pages "
+             f"(digest {corpus['digest'][:12]}); settings {results['settings']}", "",
+             f"{'entry':<14} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'accuracy':>9} {'errors':>7} "
+             f"{'RSS MB':>7} {'workers MB':>11}"]
+    for name, entry in results["entries"].items():
+        if entry["status"] != "ok":
+            lines.append(f"{name:<14} {entry['status']}: {entry['reason']}")
+            continue
+        lines.append(f"{name:<14} {entry['pages']:>6} {entry['seconds']:>8.2f} {entry['pages_per_sec']:>8.2f} "
+                     f"{100 * entry['accuracy']:>8.2f}% {entry['errors']:>7} {entry['peak_rss_mb']:>7.0f} "
+                     f"{entry['workers_peak_rss_mb']:>11.0f}")
+        for category, stats in entry["categories"].items():
+            lines.append(f"  {category:<12} {stats['pages']:>6} {stats['seconds']:>8.2f} "
+                         f"{stats['pages_per_sec']:>8.2f} {100 * stats['accuracy']:>8.2f}% {stats['errors']:>7}")
+    return "\n".join(lines)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def report_comparison(old: Dict[str, Any], new: Dict[str, Any], tolerance: float) -> int:
+    regressions, notes = compare(old, new, tolerance)
+    print(f"\nAgainst {old.get('commit') or 'baseline'} ({old['timestamp']}):")
+    for note in notes:
+        print(f"  note: {note}")
+    for regression in regressions:
+        print(f"  ❌ regression: {regression}")
+    if not regressions:
+        print(f"  ✅ no regressions (tolerance {100 * tolerance:.0f}%)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help=f"corpus directory (default: {DEFAULT_CORPUS})")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--docs", type=int, default=DEFAULT_DOCS, help="documents per category")
+    parser.add_argument("--entry", action="append", choices=tuple(ENTRY_POINTS),
+                        help="entry point to run (repeatable; default: all)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--backend", default="auto")
+    parser.add_argument("--engine", help="OCR engine (default: page_ocr's)")
+    parser.add_argument("--save", help="results file (default: CORPUS/results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="baseline results to compare against; with two files, compare them without running")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help=f"relative pages/sec or RSS change flagged as a regression (default: {DEFAULT_TOLERANCE})")
+    parser.add_argument("--run-entry", help=argparse.SUPPRESS)
+    parser.add_argument("--settings", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    corpus_dir = Path(args.corpus)
+
+    if args.run_entry:
+        print(json.dumps(run_entry(args.run_entry, corpus_dir, json.loads(args.settings))))
+        return
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline, or a baseline and a newer results file")
+    if args.compare and len(args.compare) == 2:
+        old, new = load_results(args.compare[0]), load_results(args.compare[1])
+        print(format_results(new))
+        sys.exit(report_comparison(old, new, args.tolerance))
+
+    manifest = ensure_corpus(corpus_dir, args.seed, args.docs)
+    settings = {"workers": args.workers, "backend": args.backend, "checkpoint_dir": ""}
+    if args.engine:
+        settings["engine"] = args.engine
+
+    entries = {}
+    for name in args.entry or ENTRY_POINTS:
+        print(f"⏱️  {name} ...", file=sys.stderr)
+        entries[name] = spawn_entry(name, corpus_dir, settings)
+
+    results = {
+        "version": RESULTS_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "corpus": {"seed": manifest["seed"], "docs_per_category": manifest["docs_per_category"],
+                   "digest": manifest["digest"], "documents": len(manifest["documents"]),
+                   "pages": sum(len(d["truth"]) for d in manifest["documents"])},
+        "settings": settings,
+        "entries": entries,
+    }
+    save_path = Path(args.save) if args.save else corpus_dir / "results" / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    save_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(save_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+    print(format_results(results))
+    print(f"\nSaved → {save_path}")
+    if args.compare:
+        sys.exit(report_comparison(load_results(args.compare[0]), results, args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
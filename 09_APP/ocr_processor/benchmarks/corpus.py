@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic corpus for the throughput benchmark
+
+Usage:
+    python -m benchmarks.corpus OUT_DIR [--seed N] [--docs N]
+
+Writes text-layer PDFs, rasterised "scanned" PDFs, mixed PDFs (text and
+scanned pages), blank-heavy duplex scans and multi-frame TIFFs, plus
+corpus.json with every page's ground-truth text. The same seed gives the
+same files (with the same Pillow and fonts), so two benchmark runs see
+identical input. PDFs are written directly (no reportlab/poppler needed).
+"""
+
+import json
+import zlib
+import random
+import hashlib
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+CORPUS_VERSION = 1
+MANIFEST_NAME = "corpus.json"
+DEFAULT_SEED = 1234
+DEFAULT_DOCS = 3   # per category
+
+CATEGORIES = ("text", "scanned", "mixed", "duplex", "tiff")
+
+# US Letter in PDF points, and the resolution scanned pages are rasterised at
+PAGE_SIZE = (612, 792)
+SCAN_DPI = 200
+FONT_SIZE = 11          # points
+LEADING = 16            # points between baselines
+MARGIN = 72
+LINES_PER_PAGE = (18, 30)
+LINE_CHARS = 68
+PAGES_PER_DOC = (2, 6)
+
+FONT_FILES = ("DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+              "LiberationSans-Regular.ttf", "Arial.ttf")
+
+# Filing-flavoured vocabulary, ASCII only so the Helvetica text layer needs no encoding
+WORDS = (
+    "the court plaintiff defendant motion order hearing filed pursuant to rule section "
+    "exhibit counsel respondent petitioner custody support notice service record "
+    "judgment appeal county district state affidavit declaration evidence testimony "
+    "witness schedule parenting time visitation agreement stipulation request denied "
+    "granted continued amended petition response reply brief memorandum of law and in "
+    "for on at by with from that this was were has have been will shall may not any "
+    "all each date january february march april may june july august september "
+    "october november december monday tuesday wednesday thursday friday email text "
+    "message call report incident police officer school medical records payment "
+    "account statement balance amount due received sent copy attached page case"
+).split()
+
+
+def load_font(pixels: int) -> Tuple[Any, str]:
+    """A TrueType font at `pixels` size (and its name), else Pillow's default."""
+    for name in FONT_FILES:
+        try:
+            return ImageFont.truetype(name, pixels), Path(name).name
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=pixels), "pillow-default"
+    except TypeError:
+        # Pillow < 10.1: fixed-size bitmap font
+        return ImageFont.load_default(), "pillow-default-bitmap"
+
+
+def make_line(rng: random.Random) -> str:
+    words: List[str] = []
+    length = 0
+    target = rng.randint(LINE_CHARS // 2, LINE_CHARS)
+    while length < target:
+        word = rng.choice(WORDS)
+        if rng.random() < 0.08:
+            word = word.capitalize()
+        elif rng.random() < 0.05:
+            word = str(rng.randint(1, 2025))
+        words.append(word)
+        length += len(word) + 1
+    line = " ".join(words)
+    return line[0].upper() + line[1:] + ("." if rng.random() < 0.3 else "")
+
+
+def make_page_lines(rng: random.Random) -> List[str]:
+    return [make_line(rng) for _ in range(rng.randint(*LINES_PER_PAGE))]
+
+
+def raster_page(lines: List[str], rng: random.Random, font: Any, blank: bool = False) -> Any:
+    """A grayscale "scan" of `lines`: slight skew, speckle, uneven paper."""
+    scale = SCAN_DPI / 72
+    size = (round(PAGE_SIZE[0] * scale), round(PAGE_SIZE[1] * scale))
+    img = Image.new("L", size, 255 - rng.randint(0, 12))
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((MARGIN * scale, (MARGIN + i * LEADING) * scale), line, fill=rng.randint(0, 40), font=font)
+    for _ in range(rng.randint(50, 400) if blank else rng.randint(200, 1500)):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.point((x, y), fill=rng.randint(80, 200))
+    if not blank:
+        img = img.rotate(rng.uniform(-1.2, 1.2), resample=Image.BILINEAR, fillcolor=255)
+    return img
+
+
+def _pdf_string(text: str) -> bytes:
+    escaped = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1") + b")"
+
+
+def write_pdf(path: Path, pages: List[Dict[str, Any]]) -> None:
+    """Minimal PDF: {"lines": [...]} pages get a Helvetica text layer,
+    {"image": PIL.Image} pages one full-page grayscale image."""
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    def stream(header: str, data: bytes) -> bytes:
+        return (f"<< {header} /Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream")
+
+    add(b"<< /Type /Catalog /Pages 2 0 R >>")
+    add(b"")   # page tree, filled in below
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    kids = []
+    for page in pages:
+        resources = f"/Font << /F1 {font} 0 R >>"
+        if "image" in page:
+            img = page["image"].convert("L")
+            image = add(stream(f"/Type /XObject /Subtype /Image /Width {img.width} /Height {img.height} "
+                               f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode",
+                               zlib.compress(img.tobytes(), 6)))
+            resources += f" /XObject << /Im1 {image} 0 R >>"
+            content = f"q {PAGE_SIZE[0]} 0 0 {PAGE_SIZE[1]} 0 0 cm /Im1 Do Q".encode()
+        else:
+            ops = [f"BT /F1 {FONT_SIZE} Tf {LEADING} TL {MARGIN} {PAGE_SIZE[1] - MARGIN} Td".encode()]
+            ops += [_pdf_string(line) + b" Tj T*" for line in page["lines"]]
+            ops.append(b"ET")
+            content = b"\n".join(ops)
+        contents = add(stream("", content))
+        kids.append(add(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_SIZE[0]} {PAGE_SIZE[1]}] "
+                        f"/Resources << {resources} >> /Contents {contents} 0 R >>".encode()))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    Path(path).write_bytes(bytes(out))
+
+
+def make_document(category: str, rng: random.Random, font: Any) -> Tuple[List[Dict[str, Any]], List[str], List[str]]:
+    """(pages to write, per-page ground truth, per-page kind) for one document."""
+    pages, truth, kinds = [], [], []
+    count = rng.randint(*PAGES_PER_DOC)
+    for i in range(count):
+        lines = make_page_lines(rng)
+        if category == "duplex" and i % 2:
+            # Back of each sheet: blank apart from scanner noise
+            pages.append({"image": raster_page([], rng, font, blank=True)})
+            truth.append("")
+            kinds.append("blank")
+            continue
+        if category == "text" or (category == "mixed" and rng.random() < 0.5):
+            pages.append({"lines": lines})
+            kinds.append("text")
+        else:
+            pages.append({"image": raster_page(lines, rng, font)})
+            kinds.append("scan")
+        truth.append("\n".join(lines))
+    return pages, truth, kinds
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def generate(out_dir: Path, seed: int = DEFAULT_SEED, docs: int = DEFAULT_DOCS) -> Dict[str, Any]:
+    """Write the corpus and its manifest; returns the manifest."""
+    if not HAS_PIL:
+        raise RuntimeError("Generating the corpus needs Pillow (pip install Pillow)")
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    font, font_name = load_font(round(FONT_SIZE * SCAN_DPI / 72))
+    documents = []
+    for category in CATEGORIES:
+        for n in range(docs):
+            # One stream per document, so changing --docs keeps earlier documents identical
+            rng = random.Random(f"{seed}:{category}:{n}")
+            pages, truth, kinds = make_document(category, rng, font)
+            if category == "tiff":
+                path = out_dir / f"{category}_{n:02d}.tif"
+                frames = [p["image"] if "image" in p else raster_page(p["lines"], rng, font) for p in pages]
+                frames[0].save(path, save_all=True, append_images=frames[1:], compression="tiff_deflate",
+                               dpi=(SCAN_DPI, SCAN_DPI))
+                kinds = ["scan"] * len(kinds)
+            else:
+                path = out_dir / f"{category}_{n:02d}.pdf"
+                write_pdf(path, pages)
+            documents.append({"file": path.name, "category": category, "kinds": kinds,
+                              "truth": truth, "sha256": file_digest(path)})
+
+    corpus_hash = hashlib.sha256("".join(d["sha256"] for d in documents).encode()).hexdigest()
+    manifest = {"version": CORPUS_VERSION, "seed": seed, "docs_per_category": docs,
+                "font": font_name, "digest": corpus_hash, "documents": documents}
+    with open(out_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def load_corpus(corpus_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(Path(corpus_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def ensure_corpus(corpus_dir: Path, seed: int = DEFAULT_SEED, docs: int = DEFAULT_DOCS) -> Dict[str, Any]:
+    """The corpus in `corpus_dir`, (re)generated if missing or made with another seed/size."""
+    manifest = load_corpus(corpus_dir)
+    if (manifest is None or manifest.get("version") != CORPUS_VERSION
+            or manifest["seed"] != seed or manifest["docs_per_category"] != docs):
+        manifest = generate(corpus_dir, seed, docs)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("out_dir", help="directory to write the corpus into")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--docs", type=int, default=DEFAULT_DOCS, help=f"documents per category (default: {DEFAULT_DOCS})")
+    args = parser.parse_args()
+
+    manifest = generate(Path(args.out_dir), args.seed, args.docs)
+    pages = sum(len(d["truth"]) for d in manifest["documents"])
+    print(f"{len(manifest['documents'])} documents, {pages} pages → {args.out_dir} (digest {manifest['digest'][:12]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Calibrate extraction backends for --backend auto
+Classifies a sample of the inbox (text-layer / mixed / scanned PDF, image),
+times every available backend on it, and records the fastest acceptable
+backend per class in 06_SCANS/OCR_CACHE/calibration.json
+
+Usage:
+    python calibrate_backends.py [SAMPLE_DIR] [--per-class N] [--min-recall R]
+                                 [--workers N] [--show]
+"""
+
+import sys
+import random
+import argparse
+import logging
+from pathlib import Path
+
+from backends import (
+    calibrate, classify_document, save_calibration, load_calibration, available_backends, MIN_RECALL,
+)
+from page_ocr import resolve_settings, default_workers
+from standalone_ocr import iter_input_files
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PER_CLASS = 5
+
+
+def pick_sample(folder: Path, per_class: int, settings, seed: int = 0):
+    """Up to `per_class` files of each document class, chosen reproducibly."""
+    by_class = {}
+    for path in iter_input_files(folder):
+        by_class.setdefault(classify_document(str(path), settings), []).append(path)
+    rng = random.Random(seed)
+    sample = []
+    for doc_class, paths in sorted(by_class.items()):
+        chosen = rng.sample(paths, min(per_class, len(paths)))
+        logger.info(f"🗂️  {doc_class}: {len(chosen)} of {len(paths)} files")
+        sample.extend(chosen)
+    return sample
+
+
+def print_calibration(calibration) -> None:
+    print(f"Calibrated {calibration.get('created', '?')} (min recall {calibration.get('min_recall')})")
+    for doc_class, entry in sorted(calibration.get("classes", {}).items()):
+        print(f"\n{doc_class}: {entry['backend']}")
+        for name, r in sorted(entry["results"].items(), key=lambda item: item[1]["sec_per_page"]):
+            print(f"   {name:<11} {r['sec_per_page']:>8.3f} s/page   recall min {r['min_recall']:.3f} "
+                  f"mean {r['mean_recall']:.3f}   ({r['files']} files)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pick the fastest acceptable extraction backend per document class")
+    parser.add_argument("sample_dir", nargs="?", help="folder to sample (default: 06_SCANS/INBOX)")
+    parser.add_argument("--per-class", type=int, default=DEFAULT_PER_CLASS,
+                        help=f"files sampled per document class (default: {DEFAULT_PER_CLASS})")
+    parser.add_argument("--min-recall", type=float, default=MIN_RECALL,
+                        help=f"words of the hybrid output a backend must recover on every file (default: {MIN_RECALL})")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="OCR worker processes while timing (default: number of cores)")
+    parser.add_argument("--show", action="store_true", help="print the saved calibration and exit")
+    args = parser.parse_args()
+
+    if args.show:
+        calibration = load_calibration()
+        if not calibration:
+            print("No calibration yet; --backend auto uses hybrid for every file")
+            sys.exit(1)
+        print_calibration(calibration)
+        return
+
+    folder = Path(args.sample_dir) if args.sample_dir else Path(__file__).parent.parent.parent / "06_SCANS" / "INBOX"
+    if not folder.is_dir():
+        logger.error(f"Sample folder not found: {folder}")
+        sys.exit(1)
+
+    settings = resolve_settings({"workers": args.workers})
+    logger.info(f"Backends available: {', '.join(available_backends())}")
+    sample = pick_sample(folder, args.per_class, settings)
+    if not sample:
+        logger.error(f"No PDFs or images in {folder}")
+        sys.exit(1)
+
+    calibration = calibrate(sample, settings, args.min_recall)
+    path = save_calibration(calibration)
+    print_calibration(calibration)
+    logger.info(f"\n💾 Saved {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Shared infrastructure for the Phase 2 agents
+bus: durable local event log with per-consumer offsets
+store: indexed, group-committed JSONL streams (timeline.jsonl)
+textstore: content-addressed extracted text, looked up by file_relpath
+"""
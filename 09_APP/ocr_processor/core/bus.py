@@ -0,0 +1,703 @@
+#!/usr/bin/env python3
+"""
+Durable local event bus for the Phase 2 agents
+Events are appended as JSON lines to segment files under
+09_APP/Database/event_bus (or $PROSE_BUS_DIR), named by the byte offset
+they start at, so an event's offset is its position in the whole log.
+publish() returns once the event is fsync'd; concurrent publishers share
+one fsync (group commit, optionally lingering for more appends), and
+publish_many() writes and syncs a batch at once. A single thread calling
+publish() in a loop still pays one fsync per event: use publish_many().
+Each named consumer keeps a committed offset, so a restarted agent
+continues after the last event it finished. consume() tails the log
+with inotify on Linux, else with backoff polling
+
+Usage:
+    python -m core.bus status                # segments, end offset, consumer lag
+    python -m core.bus tail [--from OFFSET]  # print events as they arrive
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import fcntl
+import select
+import struct
+import logging
+import threading
+import ctypes
+import ctypes.util
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "PROSE_BUS_DIR"
+SEGMENT_SUFFIX = ".log"
+LOCK_NAME = "bus.lock"
+CONSUMERS_DIR = "consumers"
+
+# A segment takes no more appends once it reaches this size; the next one
+# starts at (segment base + segment size)
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+# How long a group-commit leader waits for other threads' appends before
+# it syncs; 0 syncs at once (lowest latency for a lone publisher)
+DEFAULT_LINGER_SEC = 0.0
+
+READ_CHUNK = 1024 * 1024
+
+# Committed offsets: two slots of (sequence, offset, crc32), written
+# alternately so a torn write always leaves the previous commit readable
+OFFSET_SLOT = struct.Struct("<QQI")
+OFFSET_SLOT_SIZE = 32
+
+# Polling fallback when inotify is unavailable
+POLL_MIN_SEC = 0.005
+POLL_MAX_SEC = 0.25
+
+# ParallelConsumer: longest wait for new events between status checks, and
+# how often lag/throughput are logged
+PARALLEL_POLL_SEC = 1.0
+STATUS_INTERVAL_SEC = 30.0
+# ParallelConsumer: runs of a failing handler per event before it is moved
+# to the dead-letter log (under DEAD_LETTER_DIR) and committed past; the
+# wait before retry n is RETRY_DELAY_SEC * n
+MAX_ATTEMPTS = 3
+RETRY_DELAY_SEC = 0.5
+DEAD_LETTER_DIR = "dead_letter"
+
+# inotify(7)
+IN_MODIFY = 0x002
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+
+def default_bus_dir() -> Path:
+    env = os.environ.get(ENV_VAR)
+    if env:
+        return Path(env)
+    return Path(__file__).resolve().parent.parent.parent / "Database" / "event_bus"
+
+
+def segment_name(base: int) -> str:
+    return f"{base:020d}{SEGMENT_SUFFIX}"
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+class _Waiter:
+    """Blocks until the log directory changes (inotify) or a backoff delay passes."""
+
+    def __init__(self, directory: Path):
+        self.fd = -1
+        self.delay = POLL_MIN_SEC
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                return
+            if libc.inotify_add_watch(fd, os.fsencode(str(directory)), IN_MODIFY | IN_CREATE | IN_MOVED_TO) < 0:
+                os.close(fd)
+                return
+            self.fd = fd
+        except (OSError, AttributeError):
+            self.fd = -1
+
+    def drain(self) -> None:
+        """Forget pending notifications; call before re-checking the log."""
+        if self.fd < 0:
+            return
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def wait(self, timeout: Optional[float]) -> None:
+        if self.fd >= 0:
+            select.select([self.fd], [], [], timeout)
+            return
+        delay = self.delay if timeout is None else min(self.delay, timeout)
+        time.sleep(delay)
+        self.delay = min(self.delay * 2, POLL_MAX_SEC)
+
+    def reset(self) -> None:
+        self.delay = POLL_MIN_SEC
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class EventLog:
+    """Append-only segmented event log shared by every agent on this machine.
+
+    Appends from several processes are serialised with flock on bus.lock;
+    within a process, threads publishing at the same time are made durable
+    by a single fdatasync. With `linger` > 0 the syncing thread first waits
+    that long, so publishes spread over the window share the fdatasync too.
+    """
+
+    def __init__(self, root: Optional[Path] = None, linger: float = DEFAULT_LINGER_SEC):
+        self.root = Path(root) if root else default_bus_dir()
+        self.linger = linger
+        (self.root / CONSUMERS_DIR).mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(self.root / LOCK_NAME, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        self._mutex = threading.Lock()
+        self._synced_cond = threading.Condition(self._mutex)
+        self._fd = -1
+        self._base = 0
+        self._written = 0   # appends made by this process (a sequence number)
+        self._synced = 0    # appends known to be on disk
+        self._syncing = False
+        with self._flock():
+            self._open_active()
+
+    # --- segments ---------------------------------------------------------
+
+    def segments(self) -> List[int]:
+        """Base offsets of every segment, ascending."""
+        return sorted(int(p.name[:-len(SEGMENT_SUFFIX)]) for p in self.root.iterdir()
+                      if p.name.endswith(SEGMENT_SUFFIX) and p.name[:-len(SEGMENT_SUFFIX)].isdigit())
+
+    def segment_path(self, base: int) -> Path:
+        return self.root / segment_name(base)
+
+    def end_offset(self) -> int:
+        """Offset the next event will be written at."""
+        bases = self.segments()
+        if not bases:
+            return 0
+        return bases[-1] + self.segment_path(bases[-1]).stat().st_size
+
+    @contextmanager
+    def _flock(self):
+        # flock belongs to the open file, so threads are kept apart by _mutex
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open_active(self) -> None:
+        """Open the newest segment for appending (flock held); repair a torn tail."""
+        bases = self.segments() or [0]
+        base = bases[-1]
+        fd = os.open(self.segment_path(base), os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            # A crash mid-append: drop the partial line (it was never acknowledged)
+            tail = os.pread(fd, min(size, READ_CHUNK), max(size - READ_CHUNK, 0))
+            keep = size - len(tail) + tail.rfind(b"\n") + 1
+            logger.warning(f"Event bus: truncating torn record at {base + keep} ({size - keep} bytes)")
+            os.ftruncate(fd, keep)
+        self._replace_fd(fd, base)
+
+    def _replace_fd(self, fd: int, base: int) -> None:
+        if self._fd >= 0:
+            # The old segment gets no more appends; make it durable before letting go
+            # (a group-commit leader syncs its own dup of the fd)
+            _fdatasync(self._fd)
+            os.close(self._fd)
+        self._fd, self._base = fd, base
+
+    def _roll_if_full(self) -> None:
+        """Move to the next segment if the current one is full (flock held)."""
+        size = os.fstat(self._fd).st_size
+        while size >= SEGMENT_MAX_BYTES:
+            base = self._base + size
+            fd = os.open(self.segment_path(base), os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC, 0o644)
+            self._replace_fd(fd, base)
+            size = os.fstat(fd).st_size
+
+    # --- publishing -------------------------------------------------------
+
+    def _append(self, data: bytes) -> int:
+        """Write encoded records; returns the offset of the first. Caller holds _mutex."""
+        with self._flock():
+            self._roll_if_full()
+            offset = self._base + os.lseek(self._fd, 0, os.SEEK_END)
+            _write_all(self._fd, data)
+        self._written += 1
+        return offset
+
+    def _wait_synced(self, ticket: int) -> None:
+        """Group commit: one thread fsyncs for every append made before it started."""
+        while self._synced < ticket:
+            if self._syncing:
+                self._synced_cond.wait()
+                continue
+            # Appends up to `upto` are in this segment or in one already synced on rotation
+            self._syncing = True
+            if self.linger > 0:
+                # Releases _mutex so other threads can append behind this sync
+                self._synced_cond.wait(self.linger)
+            upto, fd = self._written, os.dup(self._fd)
+            self._mutex.release()
+            try:
+                _fdatasync(fd)
+            finally:
+                os.close(fd)
+                self._mutex.acquire()
+                self._syncing = False
+            self._synced = max(self._synced, upto)
+            self._synced_cond.notify_all()
+
+    @staticmethod
+    def encode(event: Dict[str, Any]) -> bytes:
+        return json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    def publish(self, event: Dict[str, Any], sync: bool = True) -> int:
+        """Append one event; returns its offset once it is durable (unless sync=False)."""
+        data = self.encode(event)
+        with self._mutex:
+            offset = self._append(data)
+            if sync:
+                self._wait_synced(self._written)
+        return offset
+
+    def publish_many(self, events: Iterable[Dict[str, Any]], sync: bool = True) -> List[int]:
+        """Append a batch with one write and one fsync; returns each event's offset."""
+        records = [self.encode(event) for event in events]
+        if not records:
+            return []
+        with self._mutex:
+            first = self._append(b"".join(records))
+            if sync:
+                self._wait_synced(self._written)
+        offsets, position = [], first
+        for record in records:
+            offsets.append(position)
+            position += len(record)
+        return offsets
+
+    def sync(self) -> None:
+        """Make every append so far durable (after publish(..., sync=False))."""
+        with self._mutex:
+            self._wait_synced(self._written)
+
+    # --- reading ----------------------------------------------------------
+
+    def read(self, offset: int, max_records: int = 1000) -> Tuple[List[Tuple[int, Dict[str, Any]]], int]:
+        """Up to `max_records` complete events from `offset`: ([(offset, event)], next offset)."""
+        bases = self.segments()
+        i = bisect_right(bases, offset) - 1
+        if i < 0:
+            # Before the first segment (none yet): nothing to read
+            return [], max(offset, bases[0] if bases else 0)
+        records: List[Tuple[int, Dict[str, Any]]] = []
+        while i < len(bases) and len(records) < max_records:
+            base = bases[i]
+            with open(self.segment_path(base), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                f.seek(offset - base)
+                while len(records) < max_records:
+                    chunk = f.read(READ_CHUNK)
+                    # A record longer than a chunk: keep reading to its newline
+                    while chunk and b"\n" not in chunk:
+                        more = f.read(READ_CHUNK)
+                        if not more:
+                            break
+                        chunk += more
+                    end = chunk.rfind(b"\n") + 1
+                    if not end:
+                        break
+                    position = offset
+                    for line in chunk[:end].split(b"\n")[:-1]:
+                        if len(records) == max_records:
+                            break
+                        try:
+                            records.append((position, json.loads(line)))
+                        except ValueError:
+                            logger.warning(f"Event bus: skipping unreadable record at {position}")
+                        position += len(line) + 1
+                    f.seek(position - base)
+                    offset = position
+            # Next segment only once this one is full and fully read
+            if offset - base < size or size < SEGMENT_MAX_BYTES or i + 1 == len(bases) or bases[i + 1] != base + size:
+                break
+            i += 1
+        return records, offset
+
+    def consumer(self, name: str, start: str = "earliest") -> "Consumer":
+        return Consumer(self, name, start)
+
+    def close(self) -> None:
+        with self._mutex:
+            if self._fd >= 0:
+                self._wait_synced(self._written)
+                os.close(self._fd)
+                self._fd = -1
+        os.close(self._lock_fd)
+
+
+class Consumer:
+    """A named reader of the log with a durable committed offset.
+
+    `poll()` returns events after the current position; `commit(offset)`
+    records that everything before `offset` is handled, and a new Consumer
+    with the same name starts there. `start` ("earliest" or "latest")
+    only applies to a name that has never committed.
+    """
+
+    def __init__(self, log: EventLog, name: str, start: str = "earliest"):
+        if not name or "/" in name or name.startswith("."):
+            raise ValueError(f"Bad consumer name {name!r}")
+        self.log = log
+        self.name = name
+        self.path = log.root / CONSUMERS_DIR / f"{name}.offset"
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        self._sequence, committed = self._load()
+        if committed is None:
+            committed = log.end_offset() if start == "latest" else 0
+        self.committed = committed
+        self.position = committed
+        self._waiter: Optional[_Waiter] = None
+
+    def _load(self) -> Tuple[int, Optional[int]]:
+        best = (0, None)
+        data = os.pread(self._fd, 2 * OFFSET_SLOT_SIZE, 0)
+        for slot in range(2):
+            raw = data[slot * OFFSET_SLOT_SIZE:slot * OFFSET_SLOT_SIZE + OFFSET_SLOT.size]
+            if len(raw) < OFFSET_SLOT.size:
+                continue
+            sequence, offset, crc = OFFSET_SLOT.unpack(raw)
+            if crc == zlib.crc32(raw[:16]) and sequence and sequence > best[0]:
+                best = (sequence, offset)
+        return best
+
+    def commit(self, offset: Optional[int] = None, sync: bool = True) -> None:
+        """Mark everything before `offset` (default: the current position) as handled."""
+        offset = self.position if offset is None else offset
+        if offset == self.committed:
+            return
+        self._sequence += 1
+        head = struct.pack("<QQ", self._sequence, offset)
+        slot = OFFSET_SLOT.pack(self._sequence, offset, zlib.crc32(head))
+        os.pwrite(self._fd, slot, (self._sequence % 2) * OFFSET_SLOT_SIZE)
+        if sync:
+            _fdatasync(self._fd)
+        self.committed = offset
+
+    def sync(self) -> None:
+        """fsync commits made with sync=False."""
+        _fdatasync(self._fd)
+
+    def seek(self, offset: int) -> None:
+        self.position = offset
+
+    def lag(self) -> int:
+        """Bytes of log after the committed offset."""
+        return max(self.log.end_offset() - self.committed, 0)
+
+    def poll(self, timeout: Optional[float] = 0, max_records: int = 1000) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """[(offset, next_offset, event)] after the position, waiting up to `timeout` (None = forever)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._waiter is not None:
+                self._waiter.drain()
+            records, end = self.log.read(self.position, max_records)
+            if records or end != self.position:
+                nexts = [offset for offset, _ in records[1:]] + [end]
+                self.position = end
+                if self._waiter is not None:
+                    self._waiter.reset()
+                return [(offset, next_offset, event) for (offset, event), next_offset in zip(records, nexts)]
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+            if self._waiter is None:
+                self._waiter = _Waiter(self.log.root)
+                continue
+            self._waiter.wait(remaining)
+
+    def __iter__(self) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+        while True:
+            yield from self.poll(timeout=None)
+
+    def close(self) -> None:
+        if self._waiter is not None:
+            self._waiter.close()
+            self._waiter = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class ParallelConsumer:
+    """Runs `handler(event)` for a consumer's events on a thread pool.
+
+    Events with the same key (`key(event)`, e.g. file_relpath) run one at
+    a time in log order; different keys run concurrently. At most
+    `max_in_flight` events are taken from the log before they are
+    committed past. The committed offset only moves past an event once it
+    and every earlier event have finished, so after a restart nothing
+    unfinished is skipped (events that finished out of order may run
+    again). A handler that raises is retried up to `max_attempts` runs in
+    all; an event that still fails is appended to the `dead_letter` log
+    (by default one under DEAD_LETTER_DIR in the bus directory) with its
+    consumer, offset and error, and committed past, so one bad event
+    cannot hold the group back. If even that append fails, the event
+    stays uncommitted and is redelivered after a restart. Events
+    `accept(event)` rejects are committed without running. Progress,
+    throughput and lag are logged every `status_interval` seconds.
+    """
+
+    def __init__(self, reader: Consumer, handler: Callable[[Dict[str, Any]], Any],
+                 key: Callable[[Dict[str, Any]], Any] = lambda event: event.get("file_relpath"),
+                 accept: Callable[[Dict[str, Any]], bool] = lambda event: True,
+                 workers: int = 4, max_in_flight: int = 16,
+                 status_interval: float = STATUS_INTERVAL_SEC,
+                 max_attempts: int = MAX_ATTEMPTS, retry_delay: float = RETRY_DELAY_SEC,
+                 dead_letter: Optional[EventLog] = None):
+        self.reader = reader
+        self.handler = handler
+        self.key = key
+        self.accept = accept
+        self.workers = max(workers, 1)
+        self.max_in_flight = max(max_in_flight, self.workers)
+        self.status_interval = status_interval
+        self.max_attempts = max(max_attempts, 1)
+        self.retry_delay = retry_delay
+        self.dead_letter = dead_letter
+        self._owns_dead_letter = False
+        self._cond = threading.Condition()
+        # offset -> [next_offset, finished], in log order; never longer than max_in_flight
+        self._pending: "OrderedDict[int, List[Any]]" = OrderedDict()
+        # key -> events waiting behind the one running for that key
+        self._waiting: Dict[Any, Deque[Tuple[int, Dict[str, Any]]]] = {}
+        self._running = 0
+        self._stopping = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.handled = 0
+        self.failed = 0
+
+    def _in_flight(self) -> int:
+        return len(self._pending)
+
+    def _finish(self, offset: int, finished: bool = True) -> None:
+        """Mark `offset` done and commit the finished prefix (lock held).
+
+        An event that is not `finished` (its dead-letter append failed)
+        stays in _pending, so nothing from it on is committed.
+        """
+        self._pending[offset][1] = finished
+        committed = None
+        while self._pending:
+            first = next(iter(self._pending.values()))
+            if not first[1]:
+                break
+            committed = first[0]
+            self._pending.popitem(last=False)
+        if committed is not None:
+            self.reader.commit(committed, sync=False)
+        self._cond.notify_all()
+
+    def _dead_letter_log(self) -> EventLog:
+        with self._cond:
+            if self.dead_letter is None:
+                self.dead_letter = EventLog(self.reader.log.root / DEAD_LETTER_DIR)
+                self._owns_dead_letter = True
+            return self.dead_letter
+
+    def _handle(self, offset: int, event: Dict[str, Any]) -> Tuple[bool, bool]:
+        """(succeeded, finished) for one event, retrying and dead-lettering it."""
+        name = self.reader.name
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.handler(event)
+                return True, True
+            except Exception as e:
+                error = e
+                if attempt == self.max_attempts or self._stopping:
+                    break
+                logger.warning(f"Event bus: {name} failed on event at {offset} "
+                               f"(attempt {attempt}/{self.max_attempts}): {e}")
+                time.sleep(self.retry_delay * attempt)
+
+        logger.error(f"Event bus: {name} failed on event at {offset} after {attempt} attempts: {error}",
+                     exc_info=error)
+        try:
+            self._dead_letter_log().publish({
+                "type": "dead_letter", "consumer": name, "offset": offset, "attempts": attempt,
+                "error": f"{type(error).__name__}: {error}", "event": event,
+            })
+        except Exception as e:
+            logger.error(f"Event bus: could not dead-letter event at {offset} ({e}); "
+                         f"{name} will redeliver it after a restart")
+            return False, False
+        logger.warning(f"Event bus: event at {offset} moved to the dead-letter log")
+        return False, True
+
+    def _run(self, key: Any, offset: int, event: Dict[str, Any]) -> None:
+        while True:
+            ok, finished = self._handle(offset, event)
+            with self._cond:
+                self.handled += ok
+                self.failed += not ok
+                self._finish(offset, finished)
+                queue = self._waiting.get(key)
+                if not queue or self._stopping:
+                    # Events still queued on shutdown stay uncommitted and run after a restart
+                    self._waiting.pop(key, None)
+                    self._running -= 1
+                    return
+                offset, event = queue.popleft()
+
+    def _dispatch(self, offset: int, next_offset: int, event: Dict[str, Any]) -> None:
+        """Queue one polled event (lock held)."""
+        self._pending[offset] = [next_offset, False]
+        if not self.accept(event):
+            self._finish(offset)
+            return
+        key = self.key(event)
+        if key is None:
+            key = ("offset", offset)
+        if key in self._waiting:
+            self._waiting[key].append((offset, event))
+            return
+        self._waiting[key] = deque()
+        self._running += 1
+        self._executor.submit(self._run, key, offset, event)
+
+    def status(self, started: float) -> str:
+        elapsed = max(time.monotonic() - started, 1e-9)
+        with self._cond:
+            unfinished = sum(1 for _, finished in self._pending.values() if not finished)
+            running = self._running
+        return (f"{self.handled + self.failed} events in {elapsed:.0f}s "
+                f"({60 * (self.handled + self.failed) / elapsed:.1f}/min, {self.failed} failed), "
+                f"{running} running, {unfinished - running} queued, lag {self.reader.lag()} bytes")
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Consume until `stop` is set (or KeyboardInterrupt), then wait for running events."""
+        started = last_status = time.monotonic()
+        synced = self.reader.committed
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.reader.name}-worker")
+        try:
+            while stop is None or not stop.is_set():
+                with self._cond:
+                    while self._in_flight() >= self.max_in_flight and not (stop is not None and stop.is_set()):
+                        self._cond.wait(PARALLEL_POLL_SEC)
+                    capacity = self.max_in_flight - self._in_flight()
+                if capacity <= 0:
+                    continue
+                for offset, next_offset, event in self.reader.poll(timeout=PARALLEL_POLL_SEC, max_records=capacity):
+                    with self._cond:
+                        self._dispatch(offset, next_offset, event)
+                if self.reader.committed != synced:
+                    synced = self.reader.committed
+                    self.reader.sync()
+                if time.monotonic() - last_status >= self.status_interval:
+                    last_status = time.monotonic()
+                    logger.info(f"📈 {self.reader.name}: {self.status(started)}")
+        finally:
+            with self._cond:
+                self._stopping = True
+                if self._running:
+                    logger.info(f"⏳ {self.reader.name}: waiting for {self._running} running events")
+            self._executor.shutdown(wait=True)
+            self.reader.sync()
+            if self._owns_dead_letter:
+                self.dead_letter.close()
+                self.dead_letter, self._owns_dead_letter = None, False
+            logger.info(f"📈 {self.reader.name}: {self.status(started)}")
+
+
+_default_log: Optional[EventLog] = None
+_default_lock = threading.Lock()
+
+
+def default_log() -> EventLog:
+    global _default_log
+    with _default_lock:
+        if _default_log is None:
+            _default_log = EventLog()
+        return _default_log
+
+
+def publish(event: Dict[str, Any]) -> int:
+    """Durably append `event` to the default log; returns its offset."""
+    return default_log().publish(event)
+
+
+def publish_many(events: Iterable[Dict[str, Any]]) -> List[int]:
+    return default_log().publish_many(events)
+
+
+def consume(consumer: str = "default", start: str = "earliest") -> Iterator[Dict[str, Any]]:
+    """Events for `consumer` from its committed offset, blocking for new ones.
+
+    An event's offset is committed when the loop asks for the next event,
+    i.e. once the loop body has finished with it, so a restarted consumer
+    resumes with the first event it had not finished (at-least-once).
+    Commits reach the disk before the consumer blocks for more events.
+    """
+    reader = default_log().consumer(consumer, start)
+    try:
+        while True:
+            batch = reader.poll(timeout=0) or reader.poll(timeout=None)
+            for _, next_offset, event in batch:
+                yield event
+                # Survives a restart of this process at once; fsync'd per batch
+                reader.commit(next_offset, sync=False)
+            reader.sync()
+    finally:
+        reader.close()
+
+
+def status(log: EventLog) -> str:
+    end = log.end_offset()
+    lines = [f"{log.root}: {len(log.segments())} segments, end offset {end}"]
+    for path in sorted((log.root / CONSUMERS_DIR).glob("*.offset")):
+        reader = Consumer(log, path.stem)
+        lines.append(f"   {reader.name:<20} committed {reader.committed:>14}  lag {end - reader.committed:>12} bytes")
+        reader.close()
+    return "\n".join(lines)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Phase 2 event bus")
+    parser.add_argument("command", choices=("status", "tail"))
+    parser.add_argument("--dir", help=f"log directory (default: ${ENV_VAR} or 09_APP/Database/event_bus)")
+    parser.add_argument("--from", dest="start", type=int, help="tail from this offset (default: the end)")
+    args = parser.parse_args()
+
+    log = EventLog(args.dir)
+    if args.command == "status":
+        print(status(log))
+        return
+    offset = log.end_offset() if args.start is None else args.start
+    try:
+        while True:
+            records, offset_next = log.read(offset)
+            for position, event in records:
+                print(position, json.dumps(event, ensure_ascii=False), flush=True)
+            if offset_next == offset:
+                time.sleep(POLL_MAX_SEC)
+            offset = offset_next
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
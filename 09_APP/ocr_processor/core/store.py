@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Indexed JSONL record store for the Phase 2 agents (timeline.jsonl etc.)
+Each stream (e.g. "timeline.jsonl") is a directory of JSONL segments under
+09_APP/Database/store (or $PROSE_STORE_DIR), rotated at 16 MB. Next to each
+segment a sidecar .idx holds one line per record: [offset, length, ts,
+kind, file_relpath]. When a segment fills up, its ts range, kinds and
+files go into segments.json, so queries skip whole segments and then read
+only the matching records. Appends from threads that arrive together are
+written and fsync'd as one batch (group commit); appends from several
+processes take an flock on stream.lock
+
+Usage:
+    python -m core.store status
+    python -m core.store query timeline.jsonl [--file REL] [--kind KIND] [--since 7d] [--until ISO]
+"""
+
+import os
+import json
+import time
+import fcntl
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "PROSE_STORE_DIR"
+SEGMENT_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+MANIFEST_NAME = "segments.json"
+LOCK_NAME = "stream.lock"
+
+SEGMENT_MAX_BYTES = 16 * 1024 * 1024
+
+# Records appended with sync=False are written once this many are waiting
+# (or on flush/close/exit)
+BUFFER_MAX_RECORDS = 256
+
+# Index entry: (offset, length, ts in epoch ms, kind, file_relpath)
+Entry = Tuple[int, int, int, Optional[str], Optional[str]]
+
+
+def default_store_dir() -> Path:
+    env = os.environ.get(ENV_VAR)
+    if env:
+        return Path(env)
+    return Path(__file__).resolve().parent.parent.parent / "Database" / "store"
+
+
+def now() -> str:
+    """Current UTC time as an ISO 8601 timestamp (the `ts` of events and timeline records)."""
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def ts_millis(value: Any) -> Optional[int]:
+    """Epoch milliseconds for an ISO string, datetime or epoch seconds; None if unparseable."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value * 1000)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return None
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _parse_index(data: bytes) -> List[Entry]:
+    entries = []
+    for line in data.split(b"\n")[:-1]:
+        try:
+            offset, length, ts, kind, relpath = json.loads(line)
+        except ValueError:
+            break
+        entries.append((offset, length, ts, kind, relpath))
+    return entries
+
+
+class Stream:
+    """One named JSONL stream: buffered group-committed appends plus indexed queries."""
+
+    def __init__(self, root: Path, name: str):
+        self.name = name
+        self.dir = Path(root) / (name[:-len(SEGMENT_SUFFIX)] if name.endswith(SEGMENT_SUFFIX) else name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._lock_fd = os.open(self.dir / LOCK_NAME, os.O_RDWR | os.O_CREAT | os.O_CLOEXEC, 0o644)
+        self._mutex = threading.Lock()
+        self._flushed_cond = threading.Condition(self._mutex)
+        self._buffer: List[Tuple[bytes, int, Optional[str], Optional[str]]] = []
+        self._queued = 0    # records appended by this process (a sequence number)
+        self._durable = 0   # records known to be on disk
+        self._flushing = False
+        self._fd = -1
+        self._idx_fd = -1
+        self._seq = 0
+        self._sealed_cache: Dict[int, List[Entry]] = {}
+        with self._flock():
+            self._open_active()
+
+    # --- segments ---------------------------------------------------------
+
+    def segment_path(self, seq: int) -> Path:
+        return self.dir / f"{seq:06d}{SEGMENT_SUFFIX}"
+
+    def index_path(self, seq: int) -> Path:
+        return self.dir / f"{seq:06d}{INDEX_SUFFIX}"
+
+    def segments(self) -> List[int]:
+        return sorted(int(p.name[:-len(SEGMENT_SUFFIX)]) for p in self.dir.iterdir()
+                      if p.name.endswith(SEGMENT_SUFFIX) and p.name[:-len(SEGMENT_SUFFIX)].isdigit())
+
+    def manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Summaries of the full (sealed) segments, by segment number."""
+        try:
+            with open(self.dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)["segments"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    @contextmanager
+    def _flock(self):
+        # flock belongs to the open file, so threads are kept apart by _flushing
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _open_segment(self, seq: int) -> None:
+        for fd in (self._fd, self._idx_fd):
+            if fd >= 0:
+                os.close(fd)
+        flags = os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_CLOEXEC
+        self._fd = os.open(self.segment_path(seq), flags, 0o644)
+        self._idx_fd = os.open(self.index_path(seq), flags, 0o644)
+        self._seq = seq
+
+    def _open_active(self) -> None:
+        """Open the newest segment (flock held); repair a torn tail and bring its index up to date."""
+        seq = (self.segments() or [0])[-1]
+        self._open_segment(seq)
+        size = os.fstat(self._fd).st_size
+        if size and os.pread(self._fd, 1, size - 1) != b"\n":
+            # A crash mid-append: drop the partial line (it was never acknowledged)
+            data = os.pread(self._fd, size, 0)
+            keep = data.rfind(b"\n") + 1
+            logger.warning(f"Store {self.name}: truncating torn record in segment {seq} ({size - keep} bytes)")
+            os.ftruncate(self._fd, keep)
+        entries = self.entries(seq)
+        data = b"".join(json.dumps(list(e)).encode() + b"\n" for e in entries)
+        if os.fstat(self._idx_fd).st_size != len(data) or os.pread(self._idx_fd, len(data), 0) != data:
+            os.ftruncate(self._idx_fd, 0)
+            _write_all(self._idx_fd, data)
+
+    def _roll_if_full(self) -> None:
+        """Seal the current segment and move on once it is full (flock held)."""
+        while os.fstat(self._fd).st_size >= SEGMENT_MAX_BYTES:
+            self._seal(self._seq)
+            self._open_segment(self._seq + 1)
+
+    def _seal(self, seq: int) -> None:
+        key = f"{seq:06d}"
+        manifest = self.manifest()
+        if key in manifest:
+            return  # another process got there first
+        entries = self.entries(seq)
+        times = [e[2] for e in entries]
+        manifest[key] = {
+            "count": len(entries),
+            "min_ts": min(times) if times else None,
+            "max_ts": max(times) if times else None,
+            "kinds": sorted({e[3] for e in entries if e[3] is not None}),
+            "files": sorted({e[4] for e in entries if e[4] is not None}),
+        }
+        tmp = self.dir / (MANIFEST_NAME + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "segments": manifest}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.dir / MANIFEST_NAME)
+
+    def entries(self, seq: int, sealed: bool = False) -> List[Entry]:
+        """Index entries of a segment; records the sidecar is missing are read from the segment.
+
+        Entries of sealed segments never change and are kept in memory.
+        """
+        if seq in self._sealed_cache:
+            return self._sealed_cache[seq]
+        try:
+            with open(self.segment_path(seq), 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                try:
+                    entries = _parse_index(self.index_path(seq).read_bytes())
+                except OSError:
+                    entries = []
+                # Entries past a torn tail, or out of step with the data, are dropped
+                valid, end = [], 0
+                for entry in entries:
+                    if entry[0] != end or entry[0] + entry[1] > size:
+                        break
+                    valid.append(entry)
+                    end = entry[0] + entry[1]
+                if end < size:
+                    # Index behind the data (a crash, or a writer between its two writes)
+                    f.seek(end)
+                    tail = f.read(size - end)
+                    for line in tail.split(b"\n")[:-1]:
+                        valid.append(self._entry(end, line + b"\n"))
+                        end += len(line) + 1
+        except FileNotFoundError:
+            return []
+        if sealed:
+            self._sealed_cache[seq] = valid
+        return valid
+
+    @staticmethod
+    def _entry(offset: int, line: bytes) -> Entry:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = {}
+        ts = ts_millis(record.get("ts"))
+        return (offset, len(line), ts if ts is not None else int(time.time() * 1000),
+                record.get("kind"), record.get("file_relpath"))
+
+    # --- appending --------------------------------------------------------
+
+    def _write(self, batch: List[Tuple[bytes, int, Optional[str], Optional[str]]]) -> None:
+        """Write a batch and its index lines in one go, then fdatasync the data."""
+        with self._flock():
+            self._roll_if_full()
+            offset = os.lseek(self._fd, 0, os.SEEK_END)
+            lines = []
+            for data, ts, kind, relpath in batch:
+                lines.append(json.dumps([offset, len(data), ts, kind, relpath]).encode() + b"\n")
+                offset += len(data)
+            _write_all(self._fd, b"".join(item[0] for item in batch))
+            _write_all(self._idx_fd, b"".join(lines))
+            fd = os.dup(self._fd)
+        try:
+            # The index is rebuilt from the data after a crash, so only the data is synced
+            _fdatasync(fd)
+        finally:
+            os.close(fd)
+
+    def _wait_flushed(self, ticket: int) -> None:
+        """Group commit: one thread writes and syncs everything buffered before it started."""
+        while self._durable < ticket:
+            if self._flushing:
+                self._flushed_cond.wait()
+                continue
+            self._flushing = True
+            batch, self._buffer = self._buffer, []
+            upto = self._queued
+            self._mutex.release()
+            try:
+                self._write(batch)
+            except BaseException:
+                self._mutex.acquire()
+                self._buffer[:0] = batch
+                self._flushing = False
+                self._flushed_cond.notify_all()
+                raise
+            self._mutex.acquire()
+            self._flushing = False
+            self._durable = max(self._durable, upto)
+            self._flushed_cond.notify_all()
+
+    def append_many(self, records: Iterable[Dict[str, Any]], sync: bool = True) -> None:
+        """Append records; returns once they are durable (unless sync=False)."""
+        encoded = []
+        for record in records:
+            data = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+            ts = ts_millis(record.get("ts"))
+            encoded.append((data, ts if ts is not None else int(time.time() * 1000),
+                            record.get("kind"), record.get("file_relpath")))
+        if not encoded:
+            return
+        with self._mutex:
+            self._buffer.extend(encoded)
+            self._queued += len(encoded)
+            if sync or len(self._buffer) >= BUFFER_MAX_RECORDS:
+                self._wait_flushed(self._queued)
+
+    def append(self, record: Dict[str, Any], sync: bool = True) -> None:
+        self.append_many([record], sync)
+
+    def flush(self) -> None:
+        """Write and sync every buffered record."""
+        with self._mutex:
+            self._wait_flushed(self._queued)
+
+    # --- queries ----------------------------------------------------------
+
+    def query(self, file_relpath: Optional[str] = None, kind: Optional[str] = None,
+              since: Any = None, until: Any = None) -> Iterator[Dict[str, Any]]:
+        """Records matching every given filter, in append order; `since` inclusive, `until` exclusive.
+
+        Segments whose summary rules them out are skipped; of the rest only
+        the index and the matching records are read.
+        """
+        self.flush()
+        lo, hi = ts_millis(since), ts_millis(until)
+        manifest = self.manifest()
+        for seq in self.segments():
+            summary = manifest.get(f"{seq:06d}")
+            if summary is not None:
+                if not summary["count"]:
+                    continue
+                if lo is not None and summary["max_ts"] < lo or hi is not None and summary["min_ts"] >= hi:
+                    continue
+                if kind is not None and kind not in summary["kinds"]:
+                    continue
+                if file_relpath is not None and file_relpath not in summary["files"]:
+                    continue
+            matches = [e for e in self.entries(seq, sealed=summary is not None)
+                       if (file_relpath is None or e[4] == file_relpath)
+                       and (kind is None or e[3] == kind)
+                       and (lo is None or e[2] >= lo) and (hi is None or e[2] < hi)]
+            if not matches:
+                continue
+            with open(self.segment_path(seq), 'rb') as f:
+                fd = f.fileno()
+                for offset, length, _, _, _ in matches:
+                    try:
+                        yield json.loads(os.pread(fd, length, offset))
+                    except ValueError:
+                        logger.warning(f"Store {self.name}: skipping unreadable record in segment {seq} at {offset}")
+
+    def status(self) -> str:
+        seqs = self.segments()
+        size = sum(self.segment_path(seq).stat().st_size for seq in seqs)
+        manifest = self.manifest()
+        count = sum(manifest[f"{seq:06d}"]["count"] if f"{seq:06d}" in manifest else len(self.entries(seq))
+                    for seq in seqs)
+        return f"{self.name}: {len(seqs)} segments, {count} records, {size / 1024 ** 2:.1f} MB"
+
+    def close(self) -> None:
+        self.flush()
+        with self._mutex:
+            for fd in (self._fd, self._idx_fd, self._lock_fd):
+                if fd >= 0:
+                    os.close(fd)
+            self._fd = self._idx_fd = self._lock_fd = -1
+
+
+class Store:
+    """The streams under one directory, opened on first use."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else default_store_dir()
+        self._streams: Dict[str, Stream] = {}
+        self._lock = threading.Lock()
+
+    def stream(self, name: str) -> Stream:
+        with self._lock:
+            if name not in self._streams:
+                self._streams[name] = Stream(self.root, name)
+            return self._streams[name]
+
+    def names(self) -> List[str]:
+        if not self.root.is_dir():
+            return []
+        return sorted(p.name + SEGMENT_SUFFIX for p in self.root.iterdir() if (p / LOCK_NAME).exists())
+
+    def close(self) -> None:
+        with self._lock:
+            for stream in self._streams.values():
+                stream.close()
+            self._streams.clear()
+
+
+_default_store: Optional[Store] = None
+_default_lock = threading.Lock()
+
+
+def default_store() -> Store:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = Store()
+            atexit.register(_default_store.close)
+        return _default_store
+
+
+def append_jsonl(name: str, record: Dict[str, Any], sync: bool = True) -> None:
+    """Durably append `record` to stream `name` of the default store."""
+    default_store().stream(name).append(record, sync)
+
+
+def append_many_jsonl(name: str, records: Iterable[Dict[str, Any]], sync: bool = True) -> None:
+    default_store().stream(name).append_many(records, sync)
+
+
+def query(name: str, file_relpath: Optional[str] = None, kind: Optional[str] = None,
+          since: Any = None, until: Any = None) -> Iterator[Dict[str, Any]]:
+    """Records of stream `name` matching every given filter (see Stream.query)."""
+    return default_store().stream(name).query(file_relpath, kind, since, until)
+
+
+def _cli_time(value: Optional[str]) -> Optional[datetime]:
+    """ISO timestamp, or a span back from now such as 90m, 24h or 7d."""
+    if value is None:
+        return None
+    units = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+    if value[:-1].isdigit() and value[-1:] in units:
+        return datetime.now(timezone.utc) - timedelta(**{units[value[-1]]: int(value[:-1])})
+    return datetime.fromisoformat(value)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Phase 2 record store")
+    parser.add_argument("command", choices=("status", "query"))
+    parser.add_argument("stream", nargs="?", default="timeline.jsonl")
+    parser.add_argument("--dir", help=f"store directory (default: ${ENV_VAR} or 09_APP/Database/store)")
+    parser.add_argument("--file", help="only records for this file_relpath")
+    parser.add_argument("--kind", help="only records of this kind")
+    parser.add_argument("--since", help="ISO timestamp or span back from now (7d, 24h)")
+    parser.add_argument("--until", help="ISO timestamp or span back from now")
+    args = parser.parse_args()
+
+    store = Store(args.dir)
+    if args.command == "status":
+        print(f"{store.root}")
+        for name in store.names():
+            print("   " + store.stream(name).status())
+        return
+    for record in store.stream(args.stream).query(args.file, args.kind, _cli_time(args.since), _cli_time(args.until)):
+        print(json.dumps(record, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
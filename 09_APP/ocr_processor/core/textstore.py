@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for extracted text (evidence_index/text)
+Text is kept once per content hash in blobs/ab/cd/<sha256>.txt, with its
+page index alongside. Word boxes, when OCR produced them, are kept once
+per layout in boxes/ab/cd/<sha256 of the box file>.wbx, since the same
+text can come from differently laid-out pages. Each file_relpath has a
+small ref file, refs/ab/cd/<sha256 of the relpath>.json, naming its blob
+(and boxes), so a lookup is one file open however many documents are
+stored, and files with the same name in different INBOX folders no longer
+collide. Every file is written to a temp name and renamed into place, and
+a ref only after its blob, so readers never see a partial document
+
+Usage:
+    python -m core.textstore get FILE_RELPATH [--page N]
+    python -m core.textstore status
+    python -m core.textstore gc              # remove blobs no ref points to
+"""
+
+import os
+import json
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from page_index import PageIndex, write_paged_text, index_path_for
+from word_boxes import write_word_boxes
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = "PROSE_TEXT_DIR"
+BLOBS_DIR = "blobs"
+BOXES_DIR = "boxes"
+REFS_DIR = "refs"
+TEXT_SUFFIX = ".txt"
+BOXES_SUFFIX = ".wbx"
+
+
+def default_text_dir() -> Path:
+    env = os.environ.get(ENV_VAR)
+    if env:
+        return Path(env)
+    return Path(__file__).resolve().parent.parent.parent / "Database" / "evidence_index" / "text"
+
+
+def _shard(root: Path, digest: str) -> Path:
+    """Two-level prefix directory for a hex digest: root/ab/cd."""
+    return root / digest[:2] / digest[2:4]
+
+
+def _sha256_path(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_path(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class TextStore:
+    """Extracted text by content hash, looked up by file_relpath."""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else default_text_dir()
+
+    # --- paths ------------------------------------------------------------
+
+    def blob_path(self, key: str) -> Path:
+        return _shard(self.root / BLOBS_DIR, key) / f"{key}{TEXT_SUFFIX}"
+
+    def boxes_path(self, key: str) -> Path:
+        return _shard(self.root / BOXES_DIR, key) / f"{key}{BOXES_SUFFIX}"
+
+    def ref_path(self, file_relpath: str) -> Path:
+        digest = hashlib.sha256(file_relpath.encode("utf-8")).hexdigest()
+        return _shard(self.root / REFS_DIR, digest) / f"{digest}.json"
+
+    def _tmp(self, path: Path) -> Path:
+        return path.with_name(f".{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+
+    # --- writing ----------------------------------------------------------
+
+    def put(self, file_relpath: str, page_texts: List[str], separator: str = "\n",
+            word_box_pages: Optional[Iterable[Dict[str, Any]]] = None, image: bool = False) -> Dict[str, Any]:
+        """Store a document's pages and point `file_relpath` at them; returns the ref.
+
+        Identical text is stored once, and so are identical word boxes;
+        each ref names the boxes of its own document, so two documents
+        with the same text but different layouts keep their own.
+        """
+        encoded = [(page + separator).encode("utf-8") for page in page_texts]
+        digest = hashlib.sha256()
+        for data in encoded:
+            digest.update(data)
+        key = digest.hexdigest()
+
+        text_path = self.blob_path(key)
+        text_path.parent.mkdir(parents=True, exist_ok=True)
+        if not text_path.exists():
+            tmp_text, tmp_index = self._tmp(text_path), self._tmp(index_path_for(text_path))
+            try:
+                write_paged_text(tmp_text, page_texts, separator, index_path=tmp_index)
+                _fsync_path(tmp_index)
+                _fsync_path(tmp_text)
+                # The text last: its presence means the blob is complete
+                os.replace(tmp_index, index_path_for(text_path))
+                os.replace(tmp_text, text_path)
+            finally:
+                for tmp in (tmp_text, tmp_index):
+                    if tmp.exists():
+                        tmp.unlink()
+
+        boxes = None
+        word_box_pages = list(word_box_pages or [])
+        if word_box_pages:
+            boxes_dir = self.root / BOXES_DIR
+            boxes_dir.mkdir(parents=True, exist_ok=True)
+            tmp_words = self._tmp(boxes_dir / f"new{BOXES_SUFFIX}")
+            try:
+                write_word_boxes(tmp_words, word_box_pages, image=image)
+                boxes = _sha256_path(tmp_words)
+                boxes_path = self.boxes_path(boxes)
+                if not boxes_path.exists():
+                    _fsync_path(tmp_words)
+                    boxes_path.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp_words, boxes_path)
+            finally:
+                if tmp_words.exists():
+                    tmp_words.unlink()
+
+        ref = {
+            "file_relpath": file_relpath,
+            "blob": key,
+            "pages": len(page_texts),
+            "bytes": sum(len(data) for data in encoded),
+            "word_boxes": boxes is not None,
+        }
+        if boxes is not None:
+            ref["boxes"] = boxes
+        self._write_ref(file_relpath, ref)
+        return ref
+
+    def _write_ref(self, file_relpath: str, ref: Dict[str, Any]) -> None:
+        path = self.ref_path(file_relpath)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self._tmp(path)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(ref, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def remove(self, file_relpath: str) -> bool:
+        """Forget `file_relpath` (its blob stays until gc())."""
+        try:
+            self.ref_path(file_relpath).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+    # --- reading ----------------------------------------------------------
+
+    def lookup(self, file_relpath: str) -> Optional[Dict[str, Any]]:
+        """The ref for `file_relpath` ({"blob", "pages", "bytes", "word_boxes", ...}), or None."""
+        try:
+            with open(self.ref_path(file_relpath), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def text_path(self, file_relpath: str) -> Optional[Path]:
+        ref = self.lookup(file_relpath)
+        return self.blob_path(ref["blob"]) if ref else None
+
+    def words_path(self, file_relpath: str) -> Optional[Path]:
+        ref = self.lookup(file_relpath)
+        if not ref or not ref.get("boxes"):
+            return None
+        return self.boxes_path(ref["boxes"])
+
+    def read_text(self, file_relpath: str) -> Optional[str]:
+        path = self.text_path(file_relpath)
+        return path.read_text(encoding="utf-8") if path else None
+
+    def pages(self, file_relpath: str) -> Optional[PageIndex]:
+        """Random access to the pages of `file_relpath`'s text (close it when done)."""
+        path = self.text_path(file_relpath)
+        return PageIndex(path) if path else None
+
+    # --- maintenance ------------------------------------------------------
+
+    def refs(self) -> Iterable[Dict[str, Any]]:
+        for path in (self.root / REFS_DIR).glob("*/*/*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def blobs(self) -> Iterable[str]:
+        for path in (self.root / BLOBS_DIR).glob(f"*/*/*{TEXT_SUFFIX}"):
+            yield path.name[:-len(TEXT_SUFFIX)]
+
+    def gc(self) -> int:
+        """Delete blobs (and their sidecars) and word boxes that no ref points to.
+
+        Returns how many blobs were removed. Run it while no agent is
+        writing: a blob and its boxes are stored before their ref.
+        """
+        refs = list(self.refs())
+        live = {ref["blob"] for ref in refs}
+        live_boxes = {ref["boxes"] for ref in refs if "boxes" in ref}
+        removed = 0
+        for key in list(self.blobs()):
+            if key in live:
+                continue
+            text_path = self.blob_path(key)
+            for path in (text_path, index_path_for(text_path)):
+                if path.exists():
+                    path.unlink()
+            removed += 1
+        for path in (self.root / BOXES_DIR).glob(f"*/*/*{BOXES_SUFFIX}"):
+            if path.name[:-len(BOXES_SUFFIX)] not in live_boxes:
+                path.unlink()
+        return removed
+
+
+_default_store: Optional[TextStore] = None
+
+
+def default_text_store() -> TextStore:
+    global _default_store
+    if _default_store is None:
+        _default_store = TextStore()
+    return _default_store
+
+
+def lookup(file_relpath: str) -> Optional[Dict[str, Any]]:
+    return default_text_store().lookup(file_relpath)
+
+
+def read_text(file_relpath: str) -> Optional[str]:
+    """Extracted text of `file_relpath` (as published in its text.ready event), or None."""
+    return default_text_store().read_text(file_relpath)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Phase 2 extracted-text store")
+    parser.add_argument("command", choices=("get", "status", "gc"))
+    parser.add_argument("file_relpath", nargs="?")
+    parser.add_argument("--page", type=int, help="print only this 1-based page")
+    parser.add_argument("--dir", help=f"store directory (default: ${ENV_VAR} or 09_APP/Database/evidence_index/text)")
+    args = parser.parse_args()
+
+    store = TextStore(args.dir)
+    if args.command == "status":
+        refs = sum(1 for _ in store.refs())
+        blobs = list(store.blobs())
+        size = sum(store.blob_path(key).stat().st_size for key in blobs)
+        print(f"{store.root}: {refs} files, {len(blobs)} distinct texts, {size / 1024 ** 2:.1f} MB")
+    elif args.command == "gc":
+        print(f"Removed {store.gc()} unreferenced blobs")
+    else:
+        if not args.file_relpath:
+            parser.error("get needs a FILE_RELPATH")
+        if args.page:
+            index = store.pages(args.file_relpath)
+            if index is None:
+                raise SystemExit(f"Not in the store: {args.file_relpath}")
+            with index:
+                print(index.page(args.page), end="")
+        else:
+            text = store.read_text(args.file_relpath)
+            if text is None:
+                raise SystemExit(f"Not in the store: {args.file_relpath}")
+            print(text, end="")
+
+
+if __name__ == "__main__":
+    main()
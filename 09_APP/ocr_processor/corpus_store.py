@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+Segment-file store for extracted text
+An alternative to one `_extracted.txt` + `_metadata.json` pair per input in
+a flat OCR_COMPLETE: documents are appended as zlib blocks (sharing a
+trained preset dictionary) to a few large segment files, and sorted,
+memory-mapped key tables map content hash and stem to a block, so reading
+any document is one positioned read and one decompress
+
+Usage:
+    python corpus_store.py stats [--store DIR]
+    python corpus_store.py cat HASH_OR_STEM [--page N] [--store DIR]
+    python corpus_store.py export OUT_DIR [--store DIR]
+    python corpus_store.py reindex [--store DIR]
+"""
+
+import os
+import sys
+import json
+import mmap
+import zlib
+import struct
+import hashlib
+import argparse
+import logging
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from page_index import write_paged_text, index_path_for
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+logger = logging.getLogger(__name__)
+
+STORES = ("loose", "segments")
+
+# A new segment is started once the current one passes this size
+SEGMENT_MAX_BYTES = 256 * 1024 ** 2
+
+# Blocks: magic, payload length, CRC-32 of the payload, dictionary id (0 = none).
+# The payload is a 4-byte metadata length, the metadata JSON, then the text.
+BLOCK = struct.Struct("<4sIIH")
+BLOCK_MAGIC = b"OBLK"
+PAYLOAD_HEAD = struct.Struct("<I")
+COMPRESS_LEVEL = 6
+
+# entries.bin: header, then one fixed-size entry per stored block, in order.
+# Entry: sha256, stem key, segment number, block offset, block length, dict id,
+# and the metadata's settings_key (zeros if none), so a writer can tell
+# whether a document is stored with its current settings without reading it.
+ENTRIES_HEADER = struct.Struct("<4sH2x")
+ENTRIES_MAGIC = b"OENT"
+ENTRY = struct.Struct("<32s8sIQIH32s6x")
+
+# by_hash.idx / by_stem.idx: header (magic, entry count covered), then
+# (key, entry number) records sorted by key. Entries appended after the
+# last rebuild are read from entries.bin once and kept in memory by key.
+TABLE_HEADER = struct.Struct("<4sI")
+TABLE_MAGIC = b"OKEY"
+VERSION = 2
+
+# Documents compressed without a dictionary before one is trained from
+# them (read back from the segments, so they may span several runs), and
+# the preset dictionary size (zlib uses at most 32 KiB)
+DICT_TRAIN_DOCS = 64
+DICT_MAX_BYTES = 32 * 1024
+
+
+def default_store_dir() -> Path:
+    """06_SCANS/OCR_STORE at the repo root."""
+    repo_root = Path(__file__).parent.parent.parent
+    return repo_root / "06_SCANS" / "OCR_STORE"
+
+
+def stem_key(stem: str) -> bytes:
+    return hashlib.blake2b(stem.encode("utf-8"), digest_size=8).digest()
+
+
+def _settings_digest(metadata: Dict[str, Any]) -> bytes:
+    key = metadata.get("settings_key")
+    return bytes.fromhex(key) if key else bytes(32)
+
+
+def build_dictionary(samples: List[bytes], max_bytes: int = DICT_MAX_BYTES) -> bytes:
+    """A zlib preset dictionary from lines that recur across `samples`.
+
+    Lines found in more than one sample (metadata keys, letterheads,
+    captions, boilerplate) are kept by bytes saved; zlib matches the end
+    of the dictionary most cheaply, so the most valuable lines go last.
+    """
+    seen = Counter()
+    for sample in samples:
+        seen.update(set(line for line in sample.splitlines(keepends=True) if len(line) > 4))
+    common = [(count * len(line), line) for line, count in seen.items() if count > 1]
+    common.sort()
+    chosen, size = [], 0
+    for _, line in reversed(common):
+        if size + len(line) > max_bytes:
+            continue
+        chosen.append(line)
+        size += len(line)
+    return b"".join(reversed(chosen))
+
+
+class Entry:
+    """Where one stored document lives."""
+
+    __slots__ = ("number", "digest", "stem_key", "segment", "offset", "length", "dict_id", "settings_digest")
+
+    def __init__(self, number: int, raw: bytes):
+        self.number = number
+        (self.digest, self.stem_key, self.segment, self.offset, self.length, self.dict_id,
+         self.settings_digest) = ENTRY.unpack(raw)
+
+    @property
+    def sha256(self) -> str:
+        return self.digest.hex()
+
+    @property
+    def settings_key(self) -> Optional[str]:
+        """The stored metadata's settings_key, or None if it had none."""
+        return self.settings_digest.hex() if any(self.settings_digest) else None
+
+
+class _Keys:
+    """Sorted key column of a key table, as a sequence for bisect."""
+
+    def __init__(self, table: Any, key_size: int, count: int):
+        self.table, self.key_size, self.count = table, key_size, count
+        self.record = key_size + 4
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = TABLE_HEADER.size + i * self.record
+        return self.table[start:start + self.key_size]
+
+    def entry_number(self, i: int) -> int:
+        return struct.unpack_from("<I", self.table, TABLE_HEADER.size + i * self.record + self.key_size)[0]
+
+
+class CorpusStore:
+    """Append-only segment store; open with writable=True to add documents.
+
+    One writer at a time (an flock on the store's LOCK file); readers
+    never block. Key tables are rebuilt when a writer closes.
+    """
+
+    def __init__(self, root: Optional[Path] = None, writable: bool = False):
+        self.root = Path(root) if root else default_store_dir()
+        self.writable = writable
+        self._lock = None
+        self._dicts: Dict[int, bytes] = {}
+        self._segment_fds: Dict[int, int] = {}
+        self._appender = None
+        if writable:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._lock = open(self.root / "LOCK", 'w')
+            if HAS_FCNTL:
+                fcntl.flock(self._lock, fcntl.LOCK_EX)
+            self._init_entries()
+        self._entries_map = None
+        self._tables: Dict[str, Tuple[Any, _Keys]] = {}
+        # Per table: (first, end, key -> entry numbers) for the entries
+        # appended since it was built, extended as more are appended
+        self._pending: Dict[str, Tuple[int, int, Dict[bytes, List[int]]]] = {}
+        self._open_tables()
+
+    # --- files ---
+
+    @property
+    def entries_path(self) -> Path:
+        return self.root / "entries.bin"
+
+    def segment_path(self, number: int) -> Path:
+        return self.root / f"segment-{number:05d}.seg"
+
+    def dict_path(self, dict_id: int) -> Path:
+        return self.root / f"dict-{dict_id:04d}.zdict"
+
+    def _init_entries(self) -> None:
+        if not self.entries_path.exists():
+            with open(self.entries_path, 'wb') as f:
+                f.write(ENTRIES_HEADER.pack(ENTRIES_MAGIC, VERSION))
+
+    def _open_tables(self) -> None:
+        for name, key_size in (("by_hash", 32), ("by_stem", 8)):
+            self._pending.pop(name, None)
+            path = self.root / f"{name}.idx"
+            if not path.exists():
+                continue
+            with open(path, 'rb') as f:
+                table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = TABLE_HEADER.unpack_from(table, 0)
+            if magic != TABLE_MAGIC:
+                table.close()
+                raise ValueError(f"Not a store key table: {path}")
+            self._tables[name] = (table, _Keys(table, key_size, count))
+
+    def _refresh_entries(self) -> int:
+        """Map entries.bin again if it has grown; returns the entry count."""
+        size = self.entries_path.stat().st_size if self.entries_path.exists() else 0
+        mapped = len(self._entries_map) if self._entries_map is not None else 0
+        if size != mapped:
+            if self._entries_map is not None:
+                self._entries_map.close()
+                self._entries_map = None
+            if size > ENTRIES_HEADER.size:
+                with open(self.entries_path, 'rb') as f:
+                    self._entries_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version = ENTRIES_HEADER.unpack_from(self._entries_map, 0)
+                if magic != ENTRIES_MAGIC or version != VERSION:
+                    self._entries_map.close()
+                    self._entries_map = None
+                    raise ValueError(f"{self.entries_path} is not a version {VERSION} entry file; "
+                                     f"rebuild it with `corpus_store.py reindex`")
+        return max(size - ENTRIES_HEADER.size, 0) // ENTRY.size
+
+    def __len__(self) -> int:
+        return self._refresh_entries()
+
+    def entry(self, number: int) -> Entry:
+        start = ENTRIES_HEADER.size + number * ENTRY.size
+        if self._entries_map is None or len(self._entries_map) < start + ENTRY.size:
+            self._refresh_entries()
+        return Entry(number, self._entries_map[start:start + ENTRY.size])
+
+    def dictionary(self, dict_id: int) -> bytes:
+        if dict_id and dict_id not in self._dicts:
+            self._dicts[dict_id] = self.dict_path(dict_id).read_bytes()
+        return self._dicts.get(dict_id, b"")
+
+    def current_dict_id(self) -> int:
+        dict_id = 0
+        while self.dict_path(dict_id + 1).exists():
+            dict_id += 1
+        return dict_id
+
+    # --- lookup ---
+
+    def _lookup(self, table_name: str, key: bytes, field: str) -> List[Entry]:
+        """Entries whose `field` equals `key`, oldest first."""
+        found = []
+        covered = 0
+        if table_name in self._tables:
+            _, keys = self._tables[table_name]
+            covered = keys.count
+            i = bisect_left(keys, key)
+            while i < keys.count and keys[i] == key:
+                found.append(self.entry(keys.entry_number(i)))
+                i += 1
+        # Entries appended since the tables were last rebuilt; each is
+        # decoded once per table, so lookups in a long session stay cheap
+        first, end, pending = self._pending.get(table_name, (covered, covered, {}))
+        if first != covered:
+            first, end, pending = covered, covered, {}
+        count = len(self)
+        for number in range(end, count):
+            pending.setdefault(getattr(self.entry(number), field), []).append(number)
+        self._pending[table_name] = (first, count, pending)
+        found.extend(self.entry(number) for number in pending.get(key, []))
+        return sorted(found, key=lambda e: e.number)
+
+    def find(self, sha256: str) -> Optional[Entry]:
+        """Latest entry for a content hash."""
+        found = self._lookup("by_hash", bytes.fromhex(sha256), "digest")
+        return found[-1] if found else None
+
+    def find_stem(self, stem: str) -> List[Entry]:
+        """Every entry stored under `stem` (different inputs can share one), oldest first."""
+        return self._lookup("by_stem", stem_key(stem), "stem_key")
+
+    def latest(self) -> Iterator[Entry]:
+        """The newest entry per content hash, in storage order."""
+        newest: Dict[str, Entry] = {}
+        for number in range(len(self)):
+            entry = self.entry(number)
+            newest[entry.sha256] = entry
+        return iter(sorted(newest.values(), key=lambda e: e.number))
+
+    # --- reading ---
+
+    def _segment_fd(self, number: int) -> int:
+        fd = self._segment_fds.get(number)
+        if fd is None:
+            fd = self._segment_fds[number] = os.open(self.segment_path(number), os.O_RDONLY)
+        return fd
+
+    def _payload(self, entry: Entry) -> bytes:
+        """The decompressed block of an entry (metadata header + text)."""
+        block = os.pread(self._segment_fd(entry.segment), entry.length, entry.offset)
+        magic, length, crc, dict_id = BLOCK.unpack_from(block, 0)
+        compressed = block[BLOCK.size:BLOCK.size + length]
+        if magic != BLOCK_MAGIC or len(compressed) != length or zlib.crc32(compressed) != crc:
+            raise ValueError(f"Corrupt block at {self.segment_path(entry.segment)}:{entry.offset}")
+        decompressor = zlib.decompressobj(zdict=self.dictionary(dict_id)) if dict_id else zlib.decompressobj()
+        return decompressor.decompress(compressed) + decompressor.flush()
+
+    def read(self, entry: Entry) -> Tuple[Dict[str, Any], str]:
+        """(metadata, text) of an entry: one pread of the block, one decompress."""
+        payload = self._payload(entry)
+        (meta_len,) = PAYLOAD_HEAD.unpack_from(payload, 0)
+        meta_end = PAYLOAD_HEAD.size + meta_len
+        return json.loads(payload[PAYLOAD_HEAD.size:meta_end]), payload[meta_end:].decode("utf-8")
+
+    def text(self, sha256: str) -> Optional[str]:
+        entry = self.find(sha256)
+        return self.read(entry)[1] if entry else None
+
+    def page_texts(self, entry: Entry) -> List[str]:
+        """The stored pages (without their trailing newline)."""
+        metadata, text = self.read(entry)
+        offsets = metadata["page_offsets"]
+        return [text[offsets[i]:offsets[i + 1] - 1] for i in range(len(offsets) - 1)]
+
+    # --- writing ---
+
+    def _open_appender(self):
+        """(number, file) of the newest segment, rotating once it is full."""
+        if self._appender is None:
+            number = 0
+            while self.segment_path(number + 1).exists():
+                number += 1
+            self._appender = (number, open(self.segment_path(number), 'ab'))
+        number, f = self._appender
+        if f.tell() >= SEGMENT_MAX_BYTES:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+            self._appender = (number + 1, open(self.segment_path(number + 1), 'ab'))
+        return self._appender
+
+    def put(self, sha256: str, stem: str, page_texts: List[str], metadata: Dict[str, Any]) -> Entry:
+        """Append a document (pages each followed by a newline, like _extracted.txt)."""
+        if not self.writable:
+            raise RuntimeError("CorpusStore opened read-only")
+        text = "".join(page + "\n" for page in page_texts)
+        offsets = [0]
+        for page in page_texts:
+            offsets.append(offsets[-1] + len(page) + 1)
+        metadata = dict(metadata, sha256=sha256, stem=stem, page_offsets=offsets)
+        meta = json.dumps(metadata, sort_keys=True).encode("utf-8")
+        payload = PAYLOAD_HEAD.pack(len(meta)) + meta + text.encode("utf-8")
+
+        dict_id = self.current_dict_id()
+        stored = len(self)
+        if dict_id == 0 and (stored + 1) % DICT_TRAIN_DOCS == 0:
+            # Train from this document and the ones before it, however many
+            # runs they were stored in (retried every DICT_TRAIN_DOCS
+            # documents if they had too little in common)
+            samples = [self._payload(self.entry(n)) for n in range(stored + 1 - DICT_TRAIN_DOCS, stored)]
+            self.train_dictionary(samples + [payload])
+        compressor = (zlib.compressobj(COMPRESS_LEVEL, zdict=self.dictionary(dict_id)) if dict_id
+                      else zlib.compressobj(COMPRESS_LEVEL))
+        compressed = compressor.compress(payload) + compressor.flush()
+
+        number, f = self._open_appender()
+        offset = f.tell()
+        f.write(BLOCK.pack(BLOCK_MAGIC, len(compressed), zlib.crc32(compressed), dict_id))
+        f.write(compressed)
+        f.flush()
+        # Durable before the entry points at it (callers drop page checkpoints after put)
+        os.fsync(f.fileno())
+
+        raw = ENTRY.pack(bytes.fromhex(sha256), stem_key(stem), number, offset,
+                         BLOCK.size + len(compressed), dict_id, _settings_digest(metadata))
+        with open(self.entries_path, 'ab') as entries:
+            entry_number = (entries.tell() - ENTRIES_HEADER.size) // ENTRY.size
+            entries.write(raw)
+            entries.flush()
+            os.fsync(entries.fileno())
+        return Entry(entry_number, raw)
+
+    def train_dictionary(self, samples: List[bytes]) -> int:
+        """Save a new preset dictionary from `samples`; later blocks use it."""
+        zdict = build_dictionary(samples)
+        if not zdict:
+            return self.current_dict_id()
+        dict_id = self.current_dict_id() + 1
+        tmp = self.dict_path(dict_id).with_suffix(".tmp")
+        tmp.write_bytes(zdict)
+        os.replace(tmp, self.dict_path(dict_id))
+        logger.info(f"📚 Store dictionary {dict_id}: {len(zdict)} bytes from {len(samples)} documents")
+        return dict_id
+
+    def rebuild_tables(self) -> None:
+        """Rewrite by_hash.idx and by_stem.idx to cover every entry."""
+        count = len(self)
+        entries = [self.entry(n) for n in range(count)]
+        for name, key in (("by_hash", lambda e: e.digest), ("by_stem", lambda e: e.stem_key)):
+            records = sorted((key(e), e.number) for e in entries)
+            path = self.root / f"{name}.idx"
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, 'wb') as f:
+                f.write(TABLE_HEADER.pack(TABLE_MAGIC, count))
+                for k, number in records:
+                    f.write(k + struct.pack("<I", number))
+            if name in self._tables:
+                self._tables.pop(name)[0].close()
+            os.replace(tmp, path)
+        self._open_tables()
+
+    def close(self) -> None:
+        if self._appender is not None:
+            self._appender[1].flush()
+            os.fsync(self._appender[1].fileno())
+            self._appender[1].close()
+            self._appender = None
+        if self.writable:
+            with open(self.entries_path, 'rb+') as entries:
+                os.fsync(entries.fileno())
+            self.rebuild_tables()
+        for fd in self._segment_fds.values():
+            os.close(fd)
+        self._segment_fds = {}
+        for table, _ in self._tables.values():
+            table.close()
+        self._tables = {}
+        self._pending = {}
+        if self._entries_map is not None:
+            self._entries_map.close()
+            self._entries_map = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- maintenance ---
+
+    def reindex(self) -> int:
+        """Rebuild entries.bin and the key tables by scanning the segments."""
+        if not self.writable:
+            raise RuntimeError("CorpusStore opened read-only")
+        raws = []
+        number = 0
+        while self.segment_path(number).exists():
+            data = self.segment_path(number).read_bytes()
+            offset = 0
+            while offset + BLOCK.size <= len(data):
+                magic, length, _, dict_id = BLOCK.unpack_from(data, offset)
+                if magic != BLOCK_MAGIC or offset + BLOCK.size + length > len(data):
+                    logger.warning(f"Stopping at a torn block in {self.segment_path(number)} @ {offset}")
+                    break
+                entry = Entry(0, ENTRY.pack(b"\0" * 32, b"\0" * 8, number, offset, BLOCK.size + length,
+                                            dict_id, bytes(32)))
+                metadata, _ = self.read(entry)
+                raws.append(ENTRY.pack(bytes.fromhex(metadata["sha256"]), stem_key(metadata["stem"]),
+                                       number, offset, BLOCK.size + length, dict_id, _settings_digest(metadata)))
+                offset += BLOCK.size + length
+            number += 1
+        tmp = self.entries_path.with_suffix(".tmp")
+        with open(tmp, 'wb') as f:
+            f.write(ENTRIES_HEADER.pack(ENTRIES_MAGIC, VERSION))
+            f.write(b"".join(raws))
+        if self._entries_map is not None:
+            self._entries_map.close()
+            self._entries_map = None
+        os.replace(tmp, self.entries_path)
+        self.rebuild_tables()
+        return len(raws)
+
+
+def export_loose(store: CorpusStore, out_dir: Path) -> int:
+    """Write the newest version of every document as the loose OCR_COMPLETE layout.
+
+    `{stem}_extracted.txt`, `{stem}_extracted_pages.idx` and
+    `{stem}_metadata.json`, as standalone_ocr writes them; when several
+    inputs share a stem, the last one stored wins, as it would there.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    written = {}
+    for entry in store.latest():
+        metadata, _ = store.read(entry)
+        stem = metadata["stem"]
+        if stem in written:
+            logger.warning(f"Stem collision: {stem} ({written[stem][:12]} replaced by {entry.sha256[:12]})")
+        output_file = out_dir / f"{stem}_extracted.txt"
+        index_file = index_path_for(output_file)
+        write_paged_text(output_file, store.page_texts(entry), index_path=index_file)
+        for key in ("sha256", "stem", "page_offsets", "settings_key"):
+            metadata.pop(key, None)
+        metadata.update({"output_file": str(output_file), "page_index": str(index_file)})
+        with open(out_dir / f"{stem}_metadata.json", 'w') as f:
+            json.dump(metadata, f, indent=2)
+        written[stem] = entry.sha256
+    return len(written)
+
+
+def store_stats(store: CorpusStore) -> Dict[str, Any]:
+    segments = sorted(store.root.glob("segment-*.seg"))
+    return {
+        "entries": len(store),
+        "documents": sum(1 for _ in store.latest()),
+        "segments": len(segments),
+        "segment_bytes": sum(p.stat().st_size for p in segments),
+        "dictionaries": store.current_dict_id(),
+    }
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+    parser = argparse.ArgumentParser(description="Inspect, read and export the OCR segment store")
+    parser.add_argument("command", choices=("stats", "cat", "export", "reindex"))
+    parser.add_argument("target", nargs="?", help="cat: content hash or stem; export: output folder")
+    parser.add_argument("--page", type=int, help="cat: only this page (1-based)")
+    parser.add_argument("--store", help="store location (default: 06_SCANS/OCR_STORE)")
+    args = parser.parse_args()
+
+    writable = args.command == "reindex"
+    with CorpusStore(args.store, writable=writable) as store:
+        if args.command == "stats":
+            print(json.dumps(store_stats(store), indent=2))
+        elif args.command == "reindex":
+            logger.info(f"🔧 Reindexed {store.reindex()} blocks")
+        elif args.command == "export":
+            if not args.target:
+                parser.error("export needs an output folder")
+            logger.info(f"📤 Exported {export_loose(store, Path(args.target))} documents to {args.target}")
+        else:
+            if not args.target:
+                parser.error("cat needs a content hash or stem")
+            is_hash = len(args.target) == 64 and all(c in "0123456789abcdef" for c in args.target)
+            entry = store.find(args.target) if is_hash else (store.find_stem(args.target) or [None])[-1]
+            if entry is None:
+                logger.error(f"Not in store: {args.target}")
+                sys.exit(1)
+            if args.page:
+                pages = store.page_texts(entry)
+                if not 1 <= args.page <= len(pages):
+                    logger.error(f"Page {args.page} out of range 1..{len(pages)}")
+                    sys.exit(1)
+                print(pages[args.page - 1])
+            else:
+                sys.stdout.write(store.read(entry)[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Dedupe agent (Phase 2)
+Scans 06_SCANS/INBOX and publishes one `dedupe` event per new or changed
+file: `accepted` (new content), `superseded` (a known path with new
+content) or `duplicate` (same bytes as another file, which ocr_processor
+skips). Files are compared in three steps, each only where the previous
+one collides: size, then a hash of the first and last blocks, then a full
+SHA-256. Results are kept in a hash index keyed by path, size, mtime and
+inode, so a rescan of an unchanged inbox reads no file content
+
+Usage:
+    python dedupe_agent.py [--inbox DIR] [--watch SECONDS] [--dry-run]
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.bus import publish_many
+from core.store import append_many_jsonl, now
+
+logger = logging.getLogger("DedupeAgent")
+
+STATUS_ACCEPTED = "accepted"
+STATUS_SUPERSEDED = "superseded"
+STATUS_DUPLICATE = "duplicate"
+
+INDEX_VERSION = 1
+
+# Bytes hashed from each end of a file for the partial hash; files up to
+# twice this size are read whole and get their SHA-256 in the same pass
+PARTIAL_BLOCK = 64 * 1024
+HASH_CHUNK = 1024 * 1024
+HASH_WORKERS = 4
+
+# Files modified this recently may still be copying in; they wait for the next scan
+SETTLE_SEC = 2.0
+SKIP_SUFFIXES = (".tmp", ".part", ".crdownload", ".download")
+
+TIMELINE_FIELDS = ("id", "ts", "kind", "file_relpath", "title", "details")
+
+
+def repo_root() -> Path:
+    return Path(__file__).resolve().parent.parent.parent
+
+
+def default_inbox() -> Path:
+    return repo_root() / "06_SCANS" / "INBOX"
+
+
+def default_index_path() -> Path:
+    return repo_root() / "09_APP" / "Database" / "dedupe_index.json"
+
+
+def walk_inbox(inbox: Path) -> Dict[str, os.stat_result]:
+    """relpath → stat for every regular file under `inbox` (dotfiles and partial downloads skipped)."""
+    files = {}
+    stack = [inbox]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as e:
+            logger.warning(f"Cannot read {directory}: {e}")
+            continue
+        for entry in entries:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            elif entry.is_file(follow_symlinks=False) and not entry.name.lower().endswith(SKIP_SUFFIXES):
+                files[Path(entry.path).relative_to(inbox).as_posix()] = entry.stat(follow_symlinks=False)
+    return files
+
+
+class HashIndex:
+    """What the agent knows about each inbox path, persisted as JSON.
+
+    Entries: {"size", "mtime_ns", "inode", "partial", "sha256", "status",
+    "duplicate_of"}; partial/sha256 are null until a collision needed them.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else default_index_path()
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                self.entries = data["files"]
+        except (OSError, ValueError):
+            pass
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"version": INDEX_VERSION, "files": self.entries}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+def _same_file(entry: Dict[str, Any], st: os.stat_result) -> bool:
+    return (entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+            and entry["inode"] == st.st_ino)
+
+
+class Scanner:
+    """One pass over the inbox against a HashIndex; counts the bytes it reads."""
+
+    def __init__(self, inbox: Path, index: HashIndex, workers: int = HASH_WORKERS):
+        self.inbox = Path(inbox)
+        self.index = index
+        self.workers = workers
+        self.bytes_read = 0
+
+    def partial_hash(self, relpath: str, size: int) -> Tuple[str, Optional[str], int]:
+        """(hash of size + first and last PARTIAL_BLOCK bytes, SHA-256 if the file was read whole, bytes read)."""
+        with open(self.inbox / relpath, 'rb') as f:
+            if size <= 2 * PARTIAL_BLOCK:
+                data = f.read()
+                partial = hashlib.blake2b(size.to_bytes(8, "little") + data, digest_size=16).hexdigest()
+                return partial, hashlib.sha256(data).hexdigest(), len(data)
+            head = f.read(PARTIAL_BLOCK)
+            f.seek(-PARTIAL_BLOCK, os.SEEK_END)
+            tail = f.read(PARTIAL_BLOCK)
+        partial = hashlib.blake2b(size.to_bytes(8, "little") + head + tail, digest_size=16).hexdigest()
+        return partial, None, len(head) + len(tail)
+
+    def full_hash(self, relpath: str) -> Tuple[str, int]:
+        """(SHA-256 of the file, bytes read)."""
+        digest = hashlib.sha256()
+        read = 0
+        with open(self.inbox / relpath, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+                read += len(chunk)
+        return digest.hexdigest(), read
+
+    def _fill(self, relpaths: List[str], entries: Dict[str, Dict[str, Any]], field: str) -> None:
+        """Compute `field` ("partial" or "sha256") for the entries that lack it."""
+        todo = [r for r in relpaths if entries[r][field] is None]
+        if not todo:
+            return
+        if field == "partial":
+            work = lambda r: self.partial_hash(r, entries[r]["size"])
+        else:
+            work = lambda r: (None, *self.full_hash(r))
+        # Workers return their byte counts; only this thread adds them up
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for relpath, (partial, sha256, read) in zip(todo, pool.map(work, todo)):
+                self.bytes_read += read
+                if partial is not None:
+                    entries[relpath]["partial"] = partial
+                if sha256 is not None:
+                    entries[relpath]["sha256"] = sha256
+
+    def scan(self) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """Update the index from the inbox; returns (dedupe events, stats)."""
+        settle_before = time.time_ns() - int(SETTLE_SEC * 1e9)
+        files = walk_inbox(self.inbox)
+        previous = self.index.entries
+        removed = [r for r in previous if r not in files]
+        settling = [r for r, st in files.items() if st.st_mtime_ns > settle_before
+                    and not (r in previous and _same_file(previous[r], st))]
+        for relpath in settling:
+            del files[relpath]
+
+        # Fresh entries for new/changed files; unchanged ones keep their hashes
+        entries: Dict[str, Dict[str, Any]] = {}
+        changed = []
+        for relpath, st in files.items():
+            entry = previous.get(relpath)
+            if entry is not None and _same_file(entry, st):
+                entries[relpath] = dict(entry)
+            else:
+                entries[relpath] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "inode": st.st_ino,
+                                    "partial": None, "sha256": None, "status": None, "duplicate_of": None}
+                changed.append(relpath)
+
+        # Duplicates whose original is gone (or changed) are decided again
+        orphaned = [r for r, e in entries.items() if r not in changed and e["status"] == STATUS_DUPLICATE
+                    and (e["duplicate_of"] not in entries or e["duplicate_of"] in changed)]
+
+        # Step 1: size buckets; only buckets holding a new/changed file matter
+        by_size: Dict[int, List[str]] = {}
+        for relpath, entry in entries.items():
+            by_size.setdefault(entry["size"], []).append(relpath)
+        pending = set(changed) | set(orphaned)
+        buckets = [group for group in by_size.values() if len(group) > 1 and pending.intersection(group)]
+
+        # Step 2: partial hashes within those buckets; step 3: full hashes on partial collisions
+        for group in buckets:
+            self._fill(group, entries, "partial")
+            by_partial: Dict[str, List[str]] = {}
+            for relpath in group:
+                by_partial.setdefault(entries[relpath]["partial"], []).append(relpath)
+            for same in by_partial.values():
+                if len(same) > 1:
+                    self._fill(same, entries, "sha256")
+
+        # Originals: settled files that are not duplicates, then pending files oldest first
+        owners: Dict[str, str] = {}
+        for relpath in sorted(entries):
+            entry = entries[relpath]
+            if relpath not in pending and entry["sha256"] and entry["status"] != STATUS_DUPLICATE:
+                owners.setdefault(entry["sha256"], relpath)
+
+        events = []
+        ts = now()
+        for relpath in sorted(pending, key=lambda r: (entries[r]["mtime_ns"], r)):
+            entry = entries[relpath]
+            owner = owners.get(entry["sha256"]) if entry["sha256"] else None
+            if owner is not None and owner != relpath:
+                entry.update(status=STATUS_DUPLICATE, duplicate_of=owner)
+            else:
+                # A changed known path supersedes its old text; an orphaned duplicate is new to OCR
+                entry.update(status=STATUS_SUPERSEDED if relpath in previous and relpath in changed
+                             else STATUS_ACCEPTED, duplicate_of=None)
+                if entry["sha256"]:
+                    owners[entry["sha256"]] = relpath
+            events.append(dedupe_event(relpath, entry, ts))
+
+        self.index.entries = entries
+        stats = {"files": len(files), "new_or_changed": len(changed), "orphaned": len(orphaned),
+                 "removed": len(removed), "settling": len(settling),
+                 "duplicates": sum(1 for e in events if e["details"]["status"] == STATUS_DUPLICATE),
+                 "bytes_read": self.bytes_read,
+                 "bytes_total": sum(e["size"] for e in entries.values())}
+        return events, stats
+
+
+def dedupe_event(relpath: str, entry: Dict[str, Any], ts: str) -> Dict[str, Any]:
+    details = {"status": entry["status"], "size": entry["size"]}
+    if entry["sha256"]:
+        details["sha256"] = entry["sha256"]
+    if entry["duplicate_of"]:
+        details["duplicate_of"] = entry["duplicate_of"]
+    return {
+        "type": "dedupe",
+        "id": hashlib.sha256(f"{relpath}:dedupe:{ts}".encode()).hexdigest()[:16],
+        "ts": ts,
+        "kind": "dedupe",
+        "file_relpath": relpath,
+        "title": f"Dedupe: {Path(relpath).name} ({entry['status']})",
+        "details": details,
+    }
+
+
+def scan_once(inbox: Path, index: HashIndex, dry_run: bool = False) -> List[Dict[str, Any]]:
+    """Scan, publish and record the events, then save the index (so a crash re-announces rather than drops)."""
+    start = time.perf_counter()
+    events, stats = Scanner(inbox, index).scan()
+    if events and not dry_run:
+        publish_many(events)
+        append_many_jsonl("timeline.jsonl", [{key: event[key] for key in TIMELINE_FIELDS} for event in events])
+    if not dry_run:
+        index.save()
+    settling = f", {stats['settling']} still copying" if stats["settling"] else ""
+    logger.info(f"[Dedupe] {stats['files']} files, {stats['new_or_changed']} new/changed, "
+                f"{stats['duplicates']} duplicates, {stats['removed']} removed{settling}; "
+                f"read {stats['bytes_read'] / 1024 ** 2:.1f} of {stats['bytes_total'] / 1024 ** 2:.1f} MB "
+                f"in {time.perf_counter() - start:.2f}s")
+    return events
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Phase 2 dedupe agent: publish dedupe events for the inbox")
+    parser.add_argument("--inbox", help="folder to scan (default: 06_SCANS/INBOX)")
+    parser.add_argument("--index", help="hash index file (default: 09_APP/Database/dedupe_index.json)")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="rescan every SECONDS until interrupted")
+    parser.add_argument("--dry-run", action="store_true", help="print the events instead of publishing them")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    inbox = Path(args.inbox) if args.inbox else default_inbox()
+    if not inbox.is_dir():
+        logger.error(f"Inbox not found: {inbox}")
+        raise SystemExit(1)
+    index = HashIndex(args.index)
+    try:
+        while True:
+            events = scan_once(inbox, index, args.dry_run)
+            if args.dry_run:
+                for event in events:
+                    print(json.dumps(event))
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    except KeyboardInterrupt:
+        logger.info("[Dedupe] Shutting down")
+
+
+if __name__ == "__main__":
+    main()
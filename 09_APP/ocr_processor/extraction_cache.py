@@ -0,0 +1,199 @@
+"""
+Content-addressed extraction cache for standalone_ocr
+Keys are the SHA-256 of the input file plus the settings that affect the
+extracted text, so an unchanged file is never opened or OCR'd twice
+"""
+
+import os
+import json
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from page_ocr import sha256_file, settings_key
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Eviction trims the cache to this fraction of max_bytes so it does not
+# run again on the very next store.
+EVICT_TO = 0.9
+
+
+def default_cache_dir() -> Path:
+    """06_SCANS/OCR_CACHE next to OCR_COMPLETE."""
+    repo_root = Path(__file__).parent.parent.parent
+    return repo_root / "06_SCANS" / "OCR_CACHE"
+
+
+def _copy(src: Path, dest: Path) -> None:
+    """Copy src to dest (replacing dest).
+
+    Never a hard link: outputs in OCR_COMPLETE may be edited in place,
+    which would silently change the cached object too.
+    """
+    tmp = dest.with_name(dest.name + ".tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+class ExtractionCache:
+    """Extraction results stored under objects/<k[:2]>/<key>.{txt,json,idx[,wbx]}.
+
+    File hashes are memoised by (size, mtime) in hashes.json so a rerun
+    over an unchanged inbox only stats files. Entries are evicted oldest
+    access first once the cache grows past max_bytes.
+    """
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else default_cache_dir()
+        self.objects = self.root / "objects"
+        self.max_bytes = max_bytes
+        self._hash_index_path = self.root / "hashes.json"
+        self._hashes = self._load_hashes()
+        self._dirty = False
+        self._size = None
+
+    def _load_hashes(self) -> Dict[str, Any]:
+        if self._hash_index_path.exists():
+            try:
+                with open(self._hash_index_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable hash index {self._hash_index_path}: {e}")
+        return {}
+
+    def save(self) -> None:
+        """Persist the memoised file hashes."""
+        if not self._dirty:
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._hash_index_path.with_suffix(".json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._hashes, f)
+        os.replace(tmp, self._hash_index_path)
+        self._dirty = False
+
+    def file_hash(self, path: Path) -> str:
+        """SHA-256 of `path`, reusing the memoised value if size/mtime match."""
+        path = Path(path).resolve()
+        st = path.stat()
+        cached = self._hashes.get(str(path))
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = sha256_file(path)
+        self._hashes[str(path)] = [st.st_size, st.st_mtime_ns, digest]
+        self._dirty = True
+        return digest
+
+    def key(self, path: Path, settings: Dict[str, Any]) -> str:
+        """Cache key for `path` extracted with `settings`."""
+        return settings_key(self.file_hash(path), settings)
+
+    def _paths(self, key: str):
+        shard = self.objects / key[:2]
+        return shard / f"{key}.txt", shard / f"{key}.json", shard / f"{key}.idx", shard / f"{key}.wbx"
+
+    def restore(self, key: str, text_dest: Path, metadata_dest: Path, index_dest: Path,
+                overrides: Dict[str, Any], words_dest: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+        """On a hit, copy the cached text and page index and write metadata.
+
+        `overrides` replaces per-run fields (source/output paths) in the
+        cached metadata. With `words_dest`, the entry must also have word
+        boxes. Returns the metadata, or None on a miss.
+        """
+        text_path, meta_path, index_path, words_path = self._paths(key)
+        if not (text_path.exists() and meta_path.exists() and index_path.exists()):
+            return None
+        if words_dest is not None and not words_path.exists():
+            return None
+
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+        metadata.update(overrides)
+        metadata["cache_hit"] = True
+
+        _copy(text_path, text_dest)
+        _copy(index_path, index_dest)
+        if words_dest is not None:
+            _copy(words_path, words_dest)
+        with open(metadata_dest, 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        # Touch for LRU eviction
+        os.utime(meta_path)
+        return metadata
+
+    def store(self, key: str, text_file: Path, metadata: Dict[str, Any],
+              index_file: Path, words_file: Optional[Path] = None) -> None:
+        """Add an extraction result to the cache, evicting if over budget."""
+        text_path, meta_path, index_path, words_path = self._paths(key)
+        text_path.parent.mkdir(parents=True, exist_ok=True)
+        if self._size is not None:
+            # Replacing an existing entry: its old files stop counting
+            self._size -= self._entry_size(key)
+
+        copies = [(text_file, text_path), (index_file, index_path)]
+        if words_file is not None:
+            copies.append((words_file, words_path))
+        for src, dest in copies:
+            shutil.copyfile(src, dest.with_name(dest.name + ".tmp"))
+            os.replace(dest.with_name(dest.name + ".tmp"), dest)
+        with open(meta_path.with_suffix(".json.tmp"), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, indent=2)
+        os.replace(meta_path.with_suffix(".json.tmp"), meta_path)
+
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += self._entry_size(key)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entry_size(self, key: str) -> int:
+        """Bytes on disk for one entry (0 if it is not cached)."""
+        return sum(p.stat().st_size for p in self._paths(key) if p.exists())
+
+    def _entries(self):
+        """(atime-ish mtime, bytes, key) for every cached entry."""
+        entries = []
+        if not self.objects.exists():
+            return entries
+        for meta_path in self.objects.glob("*/*.json"):
+            try:
+                size = meta_path.stat().st_size
+                mtime = meta_path.stat().st_mtime
+                for suffix in (".txt", ".idx", ".wbx"):
+                    other = meta_path.with_suffix(suffix)
+                    if other.exists():
+                        size += other.stat().st_size
+            except OSError:
+                continue
+            entries.append((mtime, size, meta_path.stem))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self) -> int:
+        """Drop least recently used entries until under the size budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        removed = 0
+        for _, size, key in entries:
+            if total <= target:
+                break
+            for path in self._paths(key):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            total -= size
+            removed += 1
+        self._size = total
+        if removed:
+            logger.info(f"🧹 Cache evicted {removed} entries ({total / 1024 ** 2:.1f} MiB kept)")
+        return removed
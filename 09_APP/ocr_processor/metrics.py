@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Per-stage timing for the extraction pipeline
+Times each file's stages (open, native, render, preprocess, ocr, reocr,
+write) and each OCR'd page's render/preprocess/ocr, appends them to a
+JSONL stream and summarises p50/p95 per stage. Off unless configure() is
+called (or OCR_METRICS names a stream file), and then stage() is a shared
+no-op context manager
+
+Usage:
+    python metrics.py METRICS_JSONL     # summary of a recorded stream
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+import functools
+from array import array
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("open", "native", "render", "preprocess", "ocr", "reocr", "write")
+PAGE_STAGES = ("render", "preprocess", "ocr")
+
+ENV_VAR = "OCR_METRICS"
+STREAM_NAME = "metrics.jsonl"
+SUMMARY_SUFFIX = ".summary.json"
+
+_NULL = nullcontext()
+
+_stream = None
+_stream_path: Optional[Path] = None
+_lock = threading.Lock()
+# (level, stage) -> durations seen by this process, for the summary
+_samples: Dict[tuple, array] = {}
+# The file being timed in this thread / task: {"file", "stages", "pages", "start"}
+_current: ContextVar[Optional[Dict[str, Any]]] = ContextVar("ocr_metrics_file", default=None)
+
+
+def enabled() -> bool:
+    return _stream is not None
+
+
+def configure(path: Path) -> Path:
+    """Start appending metrics to `path`; the summary is written at exit."""
+    global _stream, _stream_path
+    close()
+    _stream_path = Path(path)
+    _stream_path.parent.mkdir(parents=True, exist_ok=True)
+    _stream = open(_stream_path, 'a', encoding='utf-8', buffering=1)
+    return _stream_path
+
+
+def configure_from_env() -> Optional[Path]:
+    """configure($OCR_METRICS) if it is set and metrics are not on yet."""
+    path = os.environ.get(ENV_VAR)
+    if path and not enabled():
+        return configure(Path(path))
+    return None
+
+
+def close() -> None:
+    """Write the summary next to the stream and stop recording."""
+    global _stream
+    if _stream is None:
+        return
+    if _samples:
+        write_summary(summary(), _stream_path.with_name(_stream_path.name + SUMMARY_SUFFIX))
+    _stream.close()
+    _stream = None
+    _samples.clear()
+
+
+atexit.register(close)
+
+
+def _emit(event: Dict[str, Any]) -> None:
+    line = json.dumps(event) + "\n"
+    with _lock:
+        _stream.write(line)
+
+
+def _sample(level: str, stage: str, seconds: float) -> None:
+    with _lock:
+        _samples.setdefault((level, stage), array("d")).append(seconds)
+
+
+def file_timer(path: Any):
+    """Context for one file; stages timed inside it are emitted as one "file" event.
+
+    Nested file_timer() calls (e.g. ocr_tasks around run_backend) join
+    the outer file.
+    """
+    if _stream is None or _current.get() is not None:
+        return _NULL
+    return _file_timer(str(path))
+
+
+@contextmanager
+def _file_timer(path: str):
+    entry = {"file": path, "stages": {}, "pages": 0, "start": time.perf_counter()}
+    token = _current.set(entry)
+    try:
+        yield entry
+    finally:
+        _current.reset(token)
+        total = time.perf_counter() - entry["start"]
+        stages = {name: round(seconds, 4) for name, seconds in entry["stages"].items()}
+        for name, seconds in entry["stages"].items():
+            _sample("file", name, seconds)
+        _sample("file", "total", total)
+        _emit({"type": "file", "ts": time.time(), "file": path, "pages": entry["pages"],
+               "total": round(total, 4), "stages": stages})
+
+
+def timed_file(func):
+    """Decorator: run func(path, ...) inside file_timer(path)."""
+    @functools.wraps(func)
+    def wrapper(path, *args, **kwargs):
+        with file_timer(path):
+            return func(path, *args, **kwargs)
+    return wrapper
+
+
+def _add(stage: str, seconds: float) -> None:
+    entry = _current.get()
+    if entry is not None:
+        entry["stages"][stage] = entry["stages"].get(stage, 0.0) + seconds
+
+
+def stage(name: str):
+    """Time a block as `name` for the current file (no-op when metrics are off)."""
+    if _stream is None:
+        return _NULL
+    return _stage(name)
+
+
+@contextmanager
+def _stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _add(name, time.perf_counter() - start)
+
+
+def page(path: Any, page_number: int, timings: Dict[str, float]) -> None:
+    """Record one OCR'd page's stage times (measured in whichever process OCR'd it)."""
+    if _stream is None:
+        return
+    entry = _current.get()
+    if entry is not None:
+        entry["pages"] += 1
+    for name, seconds in timings.items():
+        _add(name, seconds)
+        _sample("page", name, seconds)
+    _emit({"type": "page", "ts": time.time(), "file": str(path), "page": page_number,
+           **{name: round(seconds, 4) for name, seconds in timings.items()}})
+
+
+def percentile(ordered: Iterable[float], pct: float) -> float:
+    """Linear-interpolated percentile of sorted values."""
+    ordered = list(ordered)
+    pos = (len(ordered) - 1) * pct / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def summarize(samples: Dict[tuple, Iterable[float]]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """{"file"|"page": {stage: {count, total, mean, p50, p95, max}}}."""
+    result: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for (level, name), values in sorted(samples.items()):
+        ordered = sorted(values)
+        if not ordered:
+            continue
+        result.setdefault(level, {})[name] = {
+            "count": len(ordered),
+            "total": round(sum(ordered), 3),
+            "mean": round(sum(ordered) / len(ordered), 4),
+            "p50": round(percentile(ordered, 50), 4),
+            "p95": round(percentile(ordered, 95), 4),
+            "max": round(ordered[-1], 4),
+        }
+    return result
+
+
+def summary() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Summary of everything this process has recorded since configure()."""
+    with _lock:
+        return summarize(dict(_samples))
+
+
+def summarize_stream(path: Path) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Summary of a JSONL stream (e.g. one written by several processes)."""
+    samples: Dict[tuple, list] = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if event.get("type") == "file":
+                for name, seconds in event["stages"].items():
+                    samples.setdefault(("file", name), []).append(seconds)
+                samples.setdefault(("file", "total"), []).append(event["total"])
+            elif event.get("type") == "page":
+                for name in PAGE_STAGES:
+                    if name in event:
+                        samples.setdefault(("page", name), []).append(event[name])
+    return summarize(samples)
+
+
+def write_summary(result: Dict[str, Any], path: Path) -> None:
+    tmp = Path(path).with_name(Path(path).name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    os.replace(tmp, path)
+
+
+def format_summary(result: Dict[str, Dict[str, Dict[str, float]]]) -> str:
+    lines = []
+    for level in ("file", "page"):
+        if level not in result:
+            continue
+        lines.append(f"{'per ' + level:<12} {'count':>7} {'total s':>9} {'p50 s':>8} {'p95 s':>8} {'max s':>8}")
+        order = {name: i for i, name in enumerate(STAGES + ("total",))}
+        for name, s in sorted(result[level].items(), key=lambda item: order.get(item[0], len(order))):
+            lines.append(f"  {name:<10} {s['count']:>7} {s['total']:>9.2f} {s['p50']:>8.3f} "
+                         f"{s['p95']:>8.3f} {s['max']:>8.3f}")
+    return "\n".join(lines)
+
+
+def log_summary() -> None:
+    if enabled() and _samples:
+        logger.info(f"⏱️  Stage timings ({_stream_path}):\n{format_summary(summary())}")
+
+
+configure_from_env()
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__.split("Usage:")[1].strip())
+        sys.exit(1)
+    print(format_summary(summarize_stream(Path(sys.argv[1]))))
+
+
+if __name__ == "__main__":
+    main()
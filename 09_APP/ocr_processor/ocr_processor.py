@@ -6,75 +6,48 @@ Listens for dedupe events → extracts text from PDFs → emits text.ready event
 import os
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import hashlib
-import json
-
-# Try pytesseract + pdf2image; fall back to basic extraction
-try:
-    import pytesseract
-    from pdf2image import convert_from_path
-    HAS_OCR = True
-except ImportError:
-    HAS_OCR = False
-    logging.warning("pytesseract/pdf2image not installed; OCR will use fallback text extraction")
-
-try:
-    import pdfplumber
-    HAS_PDFPLUMBER = True
-except ImportError:
-    HAS_PDFPLUMBER = False
-
-from core.bus import publish, consume
+
+from page_ocr import (
+    join_pages, page_summary, document_method, is_image_file, page_checkpoints, clear_checkpoints,
+)
+from backends import run_backend
+import metrics
+from core.bus import publish, default_log, ParallelConsumer
 from core.store import append_jsonl, now
+from core.textstore import default_text_store
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("OCRAgent")
 
+# Evidence text keeps OCR word boxes for exhibit highlighting
+OCR_SETTINGS = {"word_boxes": True}
 
-def extract_text_native(pdf_path: str) -> str:
-    """Try pdfplumber for native text extraction (faster, no OCR)."""
-    if not HAS_PDFPLUMBER:
-        return ""
-    
-    try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text
-    except Exception as e:
-        logger.warning(f"Native extraction failed for {pdf_path}: {e}")
-        return ""
-
-
-def extract_text_ocr(pdf_path: str) -> str:
-    """Fall back to pytesseract OCR."""
-    if not HAS_OCR:
-        return ""
-    
-    try:
-        images = convert_from_path(pdf_path)
-        text = ""
-        for img in images:
-            text += pytesseract.image_to_string(img)
-        return text
-    except Exception as e:
-        logger.error(f"OCR failed for {pdf_path}: {e}")
-        return ""
+# Event bus consumer name; its committed offset is where a restarted agent resumes
+CONSUMER_NAME = "ocr_processor"
+# Files extracted concurrently, and events read ahead of the committed offset
+EVENT_WORKERS = 4
+MAX_IN_FLIGHT = 32
+# text.ready events from handlers finishing within this window share one fsync
+PUBLISH_LINGER_SEC = 0.005
 
 
-def extract_text(pdf_path: str) -> Dict[str, Any]:
-    """Extract text from PDF: try native first, then OCR, then fail gracefully."""
+def extract_text(pdf_path: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Extract text from a PDF or image page by page (native or OCR), then fail gracefully."""
     result = {
         "text": "",
         "used_native": False,
         "used_ocr": False,
+        "pages": [],
+        "page_texts": [],
+        "backend": None,
     }
 
-    if not pdf_path.lower().endswith('.pdf'):
-        # Non-PDF files: try to read as text
+    pdf_path = str(pdf_path)
+    if not pdf_path.lower().endswith('.pdf') and not is_image_file(pdf_path):
+        # Other files: try to read as text
         try:
             with open(pdf_path, 'r', encoding='utf-8', errors='ignore') as f:
                 text = f.read()
@@ -84,18 +57,22 @@ def extract_text(pdf_path: str) -> Dict[str, Any]:
             logger.error(f"Failed to read {pdf_path}: {e}")
             return result
     
-    # For PDFs: native extraction first
-    native_text = extract_text_native(pdf_path)
-    if native_text.strip():
-        logger.info(f"Native extraction got {len(native_text)} chars from {Path(pdf_path).name}")
-        result.update({"text": native_text, "used_native": True})
-        return result
-    
-    # Fall back to OCR
-    ocr_text = extract_text_ocr(pdf_path)
-    if ocr_text.strip():
-        logger.info(f"OCR got {len(ocr_text)} chars from {Path(pdf_path).name}")
-        result.update({"text": ocr_text, "used_ocr": True})
+    # PDFs and images: per-page dicts from the configured (or calibrated) backend
+    backend, pages = run_backend(pdf_path, settings)
+    text = join_pages(pages)
+    if text.strip():
+        method = document_method(pages)
+        logger.info(f"{method.capitalize()} extraction got {len(text)} chars from {Path(pdf_path).name}")
+        result.update({
+            "text": text,
+            "used_native": method in ("native", "hybrid"),
+            "used_ocr": method in ("ocr", "hybrid"),
+            "pages": page_summary(pages),
+            "page_texts": [p["text"] for p in pages],
+            "word_box_pages": [p for p in pages if "tsv" in p],
+            "checkpoints": page_checkpoints(pages),
+            "backend": backend,
+        })
         return result
     
     logger.warning(f"No text extracted from {pdf_path}")
@@ -115,7 +92,7 @@ def handle_dedupe_event(event: Dict[str, Any]) -> None:
     
     logger.info(f"[OCR] Processing {file_relpath}")
 
-    extraction = extract_text(file_abs_path)
+    extraction = extract_text(file_abs_path, OCR_SETTINGS)
     text = extraction.get("text", "")
 
     text_ready_event = {
@@ -128,15 +105,26 @@ def handle_dedupe_event(event: Dict[str, Any]) -> None:
         "details": {
             "char_count": len(text),
             "word_count": len(text.split()),
-            "source": "native" if extraction.get("used_native") else "ocr" if extraction.get("used_ocr") else "none",
+            "source": ("hybrid" if extraction.get("used_native") and extraction.get("used_ocr")
+                       else "native" if extraction.get("used_native")
+                       else "ocr" if extraction.get("used_ocr") else "none"),
+            "page_methods": [p["method"] for p in extraction.get("pages", [])],
+            "backend": extraction.get("backend"),
         }
     }
 
-    # Store extracted text for summarizer
-    text_store_path = f"evidence_index/text/{Path(file_relpath).stem}.txt"
-    os.makedirs(os.path.dirname(text_store_path), exist_ok=True)
-    with open(text_store_path, 'w', encoding='utf-8') as f:
-        f.write(text)
+    # Store extracted text for summarizer (read back with core.textstore.read_text(file_relpath))
+    with metrics.stage("write"):
+        if extraction.get("page_texts"):
+            ref = default_text_store().put(file_relpath, extraction["page_texts"],
+                                           word_box_pages=extraction.get("word_box_pages"),
+                                           image=is_image_file(str(file_abs_path)))
+        else:
+            ref = default_text_store().put(file_relpath, [text], separator="")
+        clear_checkpoints(extraction.get("checkpoints", []))
+    text_ready_event["details"]["text_blob"] = ref["blob"]
+    if ref["word_boxes"]:
+        text_ready_event["details"]["word_boxes"] = str(default_text_store().words_path(file_relpath))
 
     # Publish downstream for summarizer (after text saved)
     publish(text_ready_event)
@@ -154,29 +142,55 @@ def handle_dedupe_event(event: Dict[str, Any]) -> None:
     logger.info(f"[OCR] ✅ {file_relpath} → {text_ready_event['details']['char_count']} chars ({text_ready_event['details']['source']})")
 
 
-def run() -> None:
-    """Main OCR agent loop: listen for dedupe events."""
-    logger.info("[OCR Agent] Starting (listening for dedupe events)")
-    
+def wants_event(event: Dict[str, Any]) -> bool:
+    """Accepted or superseding dedupe events; duplicates are already marked in the timeline by dedupe."""
+    if event.get("type") != "dedupe":
+        return False
+    return event.get("details", {}).get("status") in {"accepted", "superseded"}
+
+
+def handle_event(event: Dict[str, Any]) -> None:
+    with metrics.file_timer(event.get("file_relpath", "")):
+        handle_dedupe_event(event)
+
+
+def run(workers: int = EVENT_WORKERS, max_in_flight: int = MAX_IN_FLIGHT) -> None:
+    """Main OCR agent loop: listen for dedupe events.
+
+    Up to `workers` files are extracted at once (their OCR pages share one
+    process pool); events for the same file_relpath run in log order. An
+    event's offset is committed once it and every earlier event are done,
+    i.e. after its text.ready was published, so a restarted agent resumes
+    with the first unfinished event. Set OCR_METRICS to a JSONL path to
+    record per-stage timings.
+    """
+    logger.info(f"[OCR Agent] Starting (listening for dedupe events, {workers} workers)")
+    log = default_log()
+    if workers > 1:
+        log.linger = PUBLISH_LINGER_SEC
+    reader = log.consumer(CONSUMER_NAME)
     try:
-        for event in consume():
-            try:
-                if event.get("type") != "dedupe":
-                    continue
-
-                status = event.get("details", {}).get("status")
-                if status not in {"accepted", "superseded"}:
-                    # Ignore duplicates but mark them in timeline via dedupe
-                    continue
-
-                handle_dedupe_event(event)
-            except Exception as loop_err:
-                logger.error(f"[OCR Agent] Failed to handle event {event}: {loop_err}", exc_info=True)
+        ParallelConsumer(reader, handle_event, accept=wants_event,
+                         workers=workers, max_in_flight=max_in_flight).run()
     except KeyboardInterrupt:
         logger.info("[OCR Agent] Shutting down")
     except Exception as e:
         logger.error(f"[OCR Agent] Error: {e}", exc_info=True)
+    finally:
+        reader.close()
+        metrics.log_summary()
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Phase 2 OCR agent: extract text for dedupe events")
+    parser.add_argument("--workers", type=int, default=EVENT_WORKERS,
+                        help=f"files extracted at once (default: {EVENT_WORKERS}; 1 = one event at a time)")
+    parser.add_argument("--max-in-flight", type=int, default=MAX_IN_FLIGHT,
+                        help=f"events read ahead of the committed offset (default: {MAX_IN_FLIGHT})")
+    args = parser.parse_args()
+    run(args.workers, args.max_in_flight)
 
 
 if __name__ == "__main__":
-    run()
+    main()
@@ -0,0 +1,235 @@
+"""
+Priority scheduler for batch OCR
+Orders a batch by priority class, then shortest job first by file size,
+and gives each document a wall-clock budget in the foreground lane;
+documents that run over are deferred to a background lane that runs once
+the foreground queue is empty. Queue state is written to queue_state.json
+between jobs, at most every few seconds, so a running batch can be inspected
+"""
+
+import os
+import json
+import time
+import logging
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from page_ocr import is_budget_exceeded
+
+logger = logging.getLogger(__name__)
+
+QUEUE_STATE_NAME = "queue_state.json"
+# The whole queue is rewritten on each save, so a batch of many short files
+# saves at most this often (and always when the batch ends)
+STATE_SAVE_INTERVAL_SEC = 2.0
+
+# Highest priority first
+PRIORITY_CLASSES = ("urgent", "normal", "background")
+DEFAULT_PRIORITY = "normal"
+
+# repo_agent intake categories → priority class
+CATEGORY_PRIORITIES = {
+    "Court Filing": "urgent",
+    "Incident": "urgent",
+    "Evidence": "normal",
+    "Communication": "normal",
+    "Timeline": "normal",
+    "Note": "background",
+    "Other": "background",
+}
+
+# An intake flag that forces a file to the front
+URGENT_FLAG = "urgent"
+
+LANE_FOREGROUND = "foreground"
+LANE_BACKGROUND = "background"
+
+# Page-count estimate from file size: one page per this many bytes
+BYTES_PER_PAGE_GUESS = 100 * 1024
+
+
+def default_intake_log() -> Path:
+    """repo_agent's intake log (categories and flags per file)."""
+    return Path(__file__).parent.parent / "Database" / "intake_log.json"
+
+
+def load_intake(log_file: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """Latest intake entry per filename, or {} if there is no log."""
+    log_file = Path(log_file) if log_file else default_intake_log()
+    if not log_file.exists():
+        return {}
+    try:
+        with open(log_file, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable intake log {log_file}: {e}")
+        return {}
+    return {entry["filename"]: entry for entry in entries if "filename" in entry}
+
+
+def parse_priority_rule(rule: str) -> Tuple[str, str]:
+    """'GLOB=CLASS' → (glob, class), e.g. '*/SCREENSHOTS/*=urgent'."""
+    pattern, _, priority = rule.rpartition("=")
+    if not pattern or priority not in PRIORITY_CLASSES:
+        raise ValueError(f"Priority rule {rule!r} should be GLOB=CLASS with CLASS one of {PRIORITY_CLASSES}")
+    return pattern, priority
+
+
+def priority_for(path: Path, rules: List[Tuple[str, str]],
+                 intake: Dict[str, Dict[str, Any]]) -> str:
+    """Explicit rule first, then intake flags/categories, else DEFAULT_PRIORITY."""
+    for pattern, priority in rules:
+        if fnmatch(path.as_posix(), pattern) or fnmatch(path.name, pattern):
+            return priority
+    entry = intake.get(path.name)
+    if entry:
+        if URGENT_FLAG in entry.get("flags", []):
+            return "urgent"
+        classes = [CATEGORY_PRIORITIES.get(c, DEFAULT_PRIORITY) for c in entry.get("categories", [])]
+        if classes:
+            return min(classes, key=PRIORITY_CLASSES.index)
+    return DEFAULT_PRIORITY
+
+
+def estimate_pages(size: int) -> int:
+    """Rough page count for a file of `size` bytes, for the queue display.
+
+    Sizing a batch must not open every file (pdfinfo per PDF up front
+    delays the first job on large folders), so this is only a guess.
+    """
+    return 1 + size // BYTES_PER_PAGE_GUESS
+
+
+class OcrScheduler:
+    """Runs a batch of files through `handler` in priority / SJF order.
+
+    `handler(path, deadline)` processes one file and returns its result
+    dict (a "status" other than "success" counts as failed); it should
+    raise BudgetExceeded once time.time() passes `deadline` (None = no
+    limit). A file that does is requeued in the background lane, where it
+    runs without a budget after the foreground lane drains; with page
+    checkpoints on, it resumes where it stopped.
+    """
+
+    def __init__(self, paths: List[Path], budget: Optional[float] = None,
+                 rules: Optional[List[Tuple[str, str]]] = None,
+                 intake: Optional[Dict[str, Dict[str, Any]]] = None,
+                 state_path: Optional[Path] = None,
+                 save_interval: float = STATE_SAVE_INTERVAL_SEC):
+        self.budget = budget
+        self.state_path = Path(state_path) if state_path else None
+        self.save_interval = save_interval
+        self._saved_at = None
+        intake = load_intake() if intake is None else intake
+        self.jobs = []
+        for path in paths:
+            path = Path(path)
+            size = path.stat().st_size
+            self.jobs.append({
+                "path": str(path),
+                "priority": priority_for(path, rules or [], intake),
+                "bytes": size,
+                "pages": estimate_pages(size),
+                "lane": LANE_FOREGROUND,
+                "status": "queued",
+                "elapsed_sec": 0.0,
+            })
+        self.jobs.sort(key=self._order)
+        self.current = None
+
+    @staticmethod
+    def _order(job: Dict[str, Any]):
+        return (PRIORITY_CLASSES.index(job["priority"]), job["bytes"], job["path"])
+
+    def state(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs:
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid": os.getpid(),
+            "budget_sec": self.budget,
+            "current": self.current,
+            "counts": counts,
+            "jobs": self.jobs,
+        }
+
+    def save_state(self, force: bool = False) -> None:
+        """Write queue_state.json, unless it was written under save_interval ago."""
+        if self.state_path is None:
+            return
+        now = time.monotonic()
+        if not force and self._saved_at is not None and now - self._saved_at < self.save_interval:
+            return
+        self._saved_at = now
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_suffix(".json.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.state(), f, indent=2)
+        os.replace(tmp, self.state_path)
+
+    def _run_job(self, job: Dict[str, Any], handler: Callable, deadline: Optional[float]) -> Optional[Dict[str, Any]]:
+        self.current = job["path"]
+        job["status"] = "running"
+        self.save_state()
+        start = time.time()
+        result = None
+        try:
+            result = handler(Path(job["path"]), deadline)
+            job["status"] = "done" if result.get("status", "success") == "success" else "failed"
+        except Exception as e:
+            if not is_budget_exceeded(e):
+                raise
+            job.update({"lane": LANE_BACKGROUND, "status": "deferred"})
+            logger.info(f"⏳ {Path(job['path']).name} ran past its {self.budget:g}s budget; "
+                        f"deferred to the background lane")
+        finally:
+            job["elapsed_sec"] = round(job["elapsed_sec"] + time.time() - start, 2)
+            self.current = None
+            self.save_state()
+        return result
+
+    def run(self, handler: Callable[[Path, Optional[float]], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Foreground lane (with budgets), then the deferred background lane."""
+        results = []
+        self.save_state(force=True)
+        try:
+            for job in list(self.jobs):
+                deadline = time.time() + self.budget if self.budget else None
+                result = self._run_job(job, handler, deadline)
+                if result is not None:
+                    results.append(result)
+
+            deferred = sorted((job for job in self.jobs if job["status"] == "deferred"), key=self._order)
+            if deferred:
+                logger.info(f"🐢 Background lane: {len(deferred)} deferred documents")
+            for job in deferred:
+                results.append(self._run_job(job, handler, None))
+        finally:
+            self.save_state(force=True)
+        return results
+
+
+def load_queue_state(state_path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def format_queue_state(state: Dict[str, Any], limit: int = 20) -> str:
+    """Human-readable summary of a queue_state.json."""
+    budget = f"{state['budget_sec']:g}s" if state["budget_sec"] else "none"
+    lines = [f"Queue as of {state['updated']} (pid {state['pid']}, budget {budget}): "
+             + ", ".join(f"{n} {status}" for status, n in sorted(state["counts"].items()))]
+    if state.get("current"):
+        lines.append(f"▶️  Running: {state['current']}")
+    pending = [job for job in state["jobs"] if job["status"] in ("queued", "running", "deferred")]
+    for job in pending[:limit]:
+        lines.append(f"   {job['status']:<8} {job['lane']:<10} {job['priority']:<10} "
+                     f"~{job['pages']:>4} pages  {Path(job['path']).name}")
+    if len(pending) > limit:
+        lines.append(f"   ... {len(pending) - limit} more")
+    return "\n".join(lines)
@@ -9,20 +9,55 @@ from pathlib import Path
 import json
 import time
 
+# Shared extraction backends (pdfplumber, PyPDF2, tesseract, hybrid)
+try:
+    from backends import run_backend
+    from page_ocr import sha256_file, DEFAULT_SETTINGS, is_budget_exceeded, page_checkpoints, clear_checkpoints
+    from ocr_scheduler import OcrScheduler
+    from reocr import reocr_weak_pages
+    import metrics
+    HAS_BACKENDS = True
+except ImportError:
+    HAS_BACKENDS = False
+
+
+def _backend_settings(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """The page_ocr settings among a task's keyword arguments."""
+    return {k: v for k, v in kwargs.items() if k in DEFAULT_SETTINGS}
+
+
 def extract_text_from_pdf(file_path: str, **kwargs) -> Dict[str, Any]:
-    """Extract text from PDF using basic method"""
+    """Extract text from PDF with the extraction backend registry (PyPDF2 if unavailable).
+
+    'page_texts' holds each page's text; 'page_offsets' gives the
+    character offset of each page in 'text' (plus the end offset).
+    Pass backend=... (or other page_ocr settings) to override "auto".
+    """
     try:
-        import PyPDF2
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        
+        backend = "pypdf2"
+        if HAS_BACKENDS:
+            with metrics.file_timer(file_path):
+                backend, pages = run_backend(file_path, _backend_settings(kwargs))
+            # The text is handed back in memory; nothing later rebuilds it from the checkpoint
+            clear_checkpoints(page_checkpoints(pages))
+            page_texts = [page["text"] for page in pages]
+        else:
+            import PyPDF2
+            with open(file_path, 'rb') as file:
+                reader = PyPDF2.PdfReader(file)
+                page_texts = [page.extract_text() for page in reader.pages]
+
+        offsets = [0]
+        for page_text in page_texts:
+            offsets.append(offsets[-1] + len(page_text) + 1)
+
         return {
             'status': 'success',
-            'text': text,
-            'pages': len(reader.pages),
+            'text': "".join(page_text + "\n" for page_text in page_texts),
+            'pages': len(page_texts),
+            'page_texts': page_texts,
+            'page_offsets': offsets,
+            'backend': backend,
             'file_path': file_path
         }
     except Exception as e:
@@ -49,13 +84,36 @@ def process_scanned_document(file_path: str, **kwargs) -> Dict[str, Any]:
             'file_path': file_path
         }
 
+def ocr_pdf_with_backends(pdf_path: str, **kwargs) -> Dict[str, Any]:
+    """Stand-in for ingestion.ocr_tesseract built on the backend registry.
+
+    Same shape: file, sha256 and per-page text/avg_confidence/source.
+    """
+    with metrics.file_timer(pdf_path):
+        with metrics.stage("open"):
+            sha256 = sha256_file(pdf_path)
+        backend, pages = run_backend(pdf_path, _backend_settings(kwargs))
+    clear_checkpoints(page_checkpoints(pages))
+    return {
+        "file": pdf_path,
+        "sha256": sha256,
+        "backend": backend,
+        "pages": [{"page": p["page"], "text": p["text"],
+                   "avg_confidence": p.get("confidence"), "source": p["method"]}
+                  for p in pages],
+    }
+
 # --- OCR -> Indexer integration ---
 try:
     # your robust function module path; adjust if different
     from ingestion.ocr_tesseract import ocr_pdf_with_tesseract
 except Exception as e:
-    logging.warning(f"OCR pipeline not available: {e}")
-    ocr_pdf_with_tesseract = None
+    if HAS_BACKENDS:
+        logging.info(f"ingestion.ocr_tesseract not available ({e}); using the extraction backend registry")
+        ocr_pdf_with_tesseract = ocr_pdf_with_backends
+    else:
+        logging.warning(f"OCR pipeline not available: {e}")
+        ocr_pdf_with_tesseract = None
 
 def ocr_pdf_with_tesseract_task(pdf_path: str, **kwargs) -> Dict[str, Any]:
     if not ocr_pdf_with_tesseract:
@@ -64,24 +122,58 @@ def ocr_pdf_with_tesseract_task(pdf_path: str, **kwargs) -> Dict[str, Any]:
     res["pipeline_ts"] = int(time.time())
     return res
 
-def batch_ocr_folder(folder: str, extensions: Optional[List[str]] = None, **kwargs):
+def batch_ocr_folder(folder: str, extensions: Optional[List[str]] = None,
+                     budget: Optional[float] = None, priority_rules: Optional[List] = None,
+                     state_path: Optional[str] = None, **kwargs):
+    """OCR every matching file under `folder`.
+
+    With the backend registry available, files go through ocr_scheduler:
+    priority class, then smallest files first, and a `budget` in seconds
+    per document before it is deferred to the background lane.
+    """
     extensions = [e.lower() for e in (extensions or [".pdf"])]
-    results = []
-    for p in Path(folder).rglob("*"):
-        if p.suffix.lower() in extensions:
-            try:
-                results.append(ocr_pdf_with_tesseract_task(str(p), **kwargs))
-            except Exception as e:
-                logging.exception(f"OCR failed for {p}: {e}")
-    return results
+    paths = [p for p in Path(folder).rglob("*") if p.suffix.lower() in extensions]
+
+    def run_file(p: Path, deadline: Optional[float] = None) -> Dict[str, Any]:
+        options = dict(kwargs)
+        # Only the registry-backed pipeline knows about deadlines
+        if deadline is not None and ocr_pdf_with_tesseract is ocr_pdf_with_backends:
+            options["deadline"] = deadline
+        try:
+            return ocr_pdf_with_tesseract_task(str(p), **options)
+        except Exception as e:
+            if HAS_BACKENDS and is_budget_exceeded(e):
+                raise
+            logging.exception(f"OCR failed for {p}: {e}")
+            return {"status": "error", "file": str(p), "error": str(e)}
+
+    if HAS_BACKENDS:
+        results = OcrScheduler(paths, budget, priority_rules, state_path=state_path).run(run_file)
+        metrics.log_summary()
+    else:
+        results = [run_file(p) for p in paths]
+    return [r for r in results if r.get("status") != "error"]
 
 def ocr_then_index(pdf_path: str, index_folder: str = "evidence_index", **kwargs):
     """
     OCR a single PDF and hand the extracted per-page text off to Data Indexer.
     Returns index entries created.
+    Pass reocr_below=CONF to re-OCR pages whose avg_confidence is below it
+    (at most reocr_max_pages of them) before indexing.
     """
     from .data_tasks import add_text_snippets_to_index
     ocr = ocr_pdf_with_tesseract_task(pdf_path, **kwargs)
+    if (kwargs.get("reocr_below") is not None and HAS_BACKENDS
+            and ocr_pdf_with_tesseract is not ocr_pdf_with_backends):
+        # The registry pipeline re-OCRs inside run_backend; other pipelines get it here
+        pages = [{"page": p["page"], "method": p.get("source"), "text": p.get("text") or "",
+                  "confidence": p.get("avg_confidence")} for p in ocr.get("pages", [])]
+        reocr_weak_pages(pdf_path, pages, _backend_settings(kwargs))
+        for page, redone in zip(ocr["pages"], pages):
+            if "reocr" in redone:
+                page.update({"text": redone["text"], "avg_confidence": redone["confidence"]})
+    # Indexes the pages just OCR'd in memory: this path never goes through
+    # the dedupe agent, so the text store has no blob for the file to look up
     entries = []
     for page in ocr.get("pages", []):
         if not page.get("text"):
@@ -94,4 +186,4 @@ def ocr_then_index(pdf_path: str, index_folder: str = "evidence_index", **kwargs
             "avg_conf": page.get("avg_confidence"),
             "source": page.get("source"),
         })
-    return add_text_snippets_to_index(entries, out_dir=index_folder)
\ No newline at end of file
+    return add_text_snippets_to_index(entries, out_dir=index_folder)
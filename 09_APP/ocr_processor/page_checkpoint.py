@@ -0,0 +1,70 @@
+"""
+Page-level OCR checkpoints
+Each OCR'd page is written to its own sidecar file as soon as it is done,
+so a restart of the same document only OCRs the pages still missing
+"""
+
+import os
+import json
+import shutil
+import logging
+from pathlib import Path
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+def default_checkpoint_dir() -> Path:
+    """06_SCANS/OCR_CACHE/checkpoints at the repo root."""
+    repo_root = Path(__file__).parent.parent.parent
+    return repo_root / "06_SCANS" / "OCR_CACHE" / "checkpoints"
+
+
+class PageCheckpoint:
+    """Per-document directory of page_NNNNN.json files.
+
+    One file per page (written via temp file + rename) keeps concurrent
+    workers from interleaving writes and means a crash can never leave a
+    half-written page behind.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _page_path(self, page_number: int) -> Path:
+        return self.directory / f"page_{page_number:05d}.json"
+
+    def save(self, record: Dict[str, Any]) -> None:
+        """Persist one page's {"page", "text", "confidence"} record."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._page_path(record["page"])
+        # Unique per writer: threads of one process may checkpoint the same page
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{os.urandom(4).hex()}.tmp")
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(record, f)
+                f.flush()
+                # On disk before the rename, so a crash never leaves an empty page behind
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+
+    def completed(self) -> Dict[int, Dict[str, Any]]:
+        """Pages already checkpointed, by page number."""
+        pages = {}
+        if not self.directory.exists():
+            return pages
+        for path in self.directory.glob("page_*.json"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                pages[record["page"]] = record
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+        return pages
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the output built from it has been written."""
+        shutil.rmtree(self.directory, ignore_errors=True)
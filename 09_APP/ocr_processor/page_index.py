@@ -0,0 +1,105 @@
+"""
+Page-offset index for extracted text files
+Writes `_extracted.txt` one page at a time and records each page's byte
+offset in a compact sidecar, so readers can mmap the text and jump to
+page N without re-reading or re-splitting the whole file
+"""
+
+import sys
+import mmap
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+INDEX_SUFFIX = "_pages.idx"
+
+# Header: magic, version, page count; then page_count + 1 little-endian
+# uint64 byte offsets (start of each page, then end of file).
+MAGIC = b"PGIX"
+VERSION = 1
+HEADER = struct.Struct("<4sHI")
+
+
+def index_path_for(text_path: Path) -> Path:
+    """`foo_extracted.txt` → `foo_extracted_pages.idx` alongside it."""
+    text_path = Path(text_path)
+    return text_path.with_name(text_path.stem + INDEX_SUFFIX)
+
+
+def write_paged_text(text_path: Path, page_texts: Iterable[str],
+                     separator: str = "\n",
+                     index_path: Optional[Path] = None) -> List[int]:
+    """Write pages (each followed by `separator`) and their offset index.
+
+    Returns the byte offsets written to the index.
+    """
+    text_path = Path(text_path)
+    offsets = array("Q", [0])
+    with open(text_path, 'wb') as f:
+        for page in page_texts:
+            f.write((page + separator).encode("utf-8"))
+            offsets.append(f.tell())
+    write_index(index_path or index_path_for(text_path), offsets)
+    return offsets.tolist()
+
+
+def write_index(index_path: Path, offsets: Iterable[int]) -> None:
+    """Write a page-offset index (page_count + 1 offsets)."""
+    offsets = array("Q", offsets)
+    if offsets.itemsize != 8:
+        raise RuntimeError("array('Q') is not 64-bit on this platform")
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    with open(index_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(offsets) - 1))
+        offsets.tofile(f)
+
+
+class PageIndex:
+    """Random access to the pages of an indexed text file.
+
+    Both files are memory-mapped; `page(n)` is two offset reads and one
+    slice, independent of document length.
+    """
+
+    def __init__(self, text_path: Path, index_path: Optional[Path] = None):
+        self.text_path = Path(text_path)
+        self.index_path = Path(index_path) if index_path else index_path_for(self.text_path)
+
+        with open(self.index_path, 'rb') as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.page_count = HEADER.unpack_from(self._index, 0)
+        if magic != MAGIC or version != VERSION:
+            self._index.close()
+            raise ValueError(f"Not a page index: {self.index_path}")
+
+        with open(self.text_path, 'rb') as f:
+            size = f.seek(0, 2)
+            self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def _offset(self, i: int) -> int:
+        return struct.unpack_from("<Q", self._index, HEADER.size + 8 * i)[0]
+
+    def page_bytes(self, page_number: int) -> bytes:
+        """Raw UTF-8 bytes of a 1-based page (including its separator)."""
+        if not 1 <= page_number <= self.page_count:
+            raise IndexError(f"page {page_number} out of range 1..{self.page_count}")
+        return self._text[self._offset(page_number - 1):self._offset(page_number)]
+
+    def page(self, page_number: int) -> str:
+        return self.page_bytes(page_number).decode("utf-8")
+
+    def __len__(self) -> int:
+        return self.page_count
+
+    def close(self) -> None:
+        self._index.close()
+        if isinstance(self._text, mmap.mmap):
+            self._text.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,841 @@
+"""
+Page-level extraction shared by standalone_ocr and ocr_processor
+Uses the native text layer where a page has one, and OCRs the remaining
+image-only pages on a process pool, rendering a bounded window at a time.
+Image files (.jpg/.png/.tif) go through the same pool, one frame per page
+"""
+
+import os
+import json
+import time
+import queue
+import atexit
+import itertools
+import multiprocessing
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pytesseract
+    from PIL import Image
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    HAS_OCR = True
+except ImportError:
+    HAS_OCR = False
+
+try:
+    import pdfplumber
+    HAS_PDFPLUMBER = True
+except ImportError:
+    HAS_PDFPLUMBER = False
+
+# Optional in-process Tesseract binding: loads the language model once per
+# worker instead of once per page (pytesseract spawns the CLI every call).
+try:
+    import tesserocr
+    HAS_TESSEROCR = True
+except ImportError:
+    HAS_TESSEROCR = False
+
+from page_checkpoint import PageCheckpoint, default_checkpoint_dir
+from preprocess import preprocess_page, choose_dpi, is_blank_page, PROBE_DPI
+from pipe_render import iter_pages_pipe, tesseract_tsv, text_from_tsv, has_pdftoppm
+from shm_ring import PageRing, ensure_tracker
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Ranges handed to each worker; several per worker keeps the pool busy
+# when some pages take much longer than others.
+CHUNKS_PER_WORKER = 4
+
+# Pages rendered per poppler call. Each worker holds at most this many
+# full-resolution images, so peak memory is ~workers * window pages.
+DEFAULT_WINDOW = 4
+
+# A page whose text layer has fewer non-whitespace characters than this
+# is treated as image-only and sent to OCR.
+MIN_PAGE_CHARS = 20
+
+ENGINES = ("tesseract", "tesserocr")
+
+# pdf2image: poppler output buffered per window, pytesseract via temp files.
+# pipe: pdftoppm streamed page by page, tesseract on stdin/stdout (no temp files).
+RENDERERS = ("pdf2image", "pipe")
+
+# worker: each pool worker renders its own page ranges.
+# shm: one render stream fills a shared-memory page ring that workers OCR from.
+TRANSPORTS = ("worker", "shm")
+
+# Page slots in the shared-memory ring; bounds render-ahead and memory
+# regardless of how many workers read from it.
+SHM_SLOTS = 6
+
+# Seconds between checks for a failed worker while waiting for a free slot
+SLOT_WAIT = 1.0
+
+# Page budget per document for the low-confidence second pass
+REOCR_MAX_PAGES = 20
+
+# Raster formats OCR'd directly; multi-frame TIFFs are one page per frame
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+DEFAULT_SETTINGS = {
+    # extraction backend name (see backends.py), or "auto" to use the
+    # calibrated fastest backend for the document's class
+    "backend": "auto",
+    # the class "auto" picked the backend for (set by backends.resolve_backend)
+    "document_class": None,
+    # fingerprint of the calibrated choices "auto" picks from (set by backends.lookup_settings)
+    "calibration": None,
+    "engine": "tesseract",
+    "renderer": "pdf2image",
+    # int, or "auto" to pick per document from the measured text height
+    "dpi": 200,
+    "lang": "eng",
+    "min_page_chars": MIN_PAGE_CHARS,
+    # grayscale, border crop, deskew and binarize before OCR
+    "preprocess": False,
+    # record pages with (almost) no ink as blank instead of OCRing them
+    "skip_blank": True,
+    "workers": None,
+    "window": DEFAULT_WINDOW,
+    "transport": "worker",
+    "shm_slots": SHM_SLOTS,
+    # "" disables page checkpoints
+    "checkpoint_dir": str(default_checkpoint_dir()),
+    # time.time() after which OCR stops at the next page (see BudgetExceeded)
+    "deadline": None,
+    # re-OCR pages whose mean word confidence is below this (None = off; see reocr.py)
+    "reocr_below": None,
+    # at most this many (weakest) pages per document get the second pass
+    "reocr_max_pages": REOCR_MAX_PAGES,
+    # keep each OCR'd page's tesseract TSV ("tsv") for word_boxes.py
+    "word_boxes": False,
+    # attach per-page stage times ("timings"); set from metrics.enabled() by ocr_pdf_pages
+    "metrics": False,
+}
+
+# Settings that change the extracted text (and so belong in cache keys);
+# the rest only change how fast and how much memory it takes.
+OUTPUT_SETTINGS = ("backend", "calibration", "engine", "renderer", "dpi", "lang", "min_page_chars",
+                   "preprocess", "skip_blank", "reocr_below", "reocr_max_pages", "word_boxes")
+
+# Bumped when the text written for the same settings changes, so cached
+# outputs, manifests and checkpoints from before are not reused.
+# 2: every page is followed by a newline (pages used to run together)
+OUTPUT_FORMAT = 2
+
+# Used when "auto" DPI cannot measure any text on the probe page
+FALLBACK_DPI = 200
+
+HASH_CHUNK = 1024 * 1024
+
+
+def default_workers() -> int:
+    """Number of OCR worker processes to use when none is given."""
+    return os.cpu_count() or 1
+
+
+def resolve_settings(settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """DEFAULT_SETTINGS overlaid with any non-None values from `settings`."""
+    resolved = dict(DEFAULT_SETTINGS)
+    resolved.update({k: v for k, v in (settings or {}).items() if v is not None})
+    if not resolved["workers"]:
+        resolved["workers"] = default_workers()
+    if resolved["engine"] not in ENGINES:
+        raise ValueError(f"Unknown OCR engine {resolved['engine']!r}; expected one of {ENGINES}")
+    if resolved["engine"] == "tesserocr" and not HAS_TESSEROCR:
+        _warn_once("tesserocr not installed (pip install tesserocr); using the tesseract CLI")
+        resolved["engine"] = "tesseract"
+    if resolved["transport"] not in TRANSPORTS:
+        raise ValueError(f"Unknown transport {resolved['transport']!r}; expected one of {TRANSPORTS}")
+    if resolved["renderer"] not in RENDERERS:
+        raise ValueError(f"Unknown renderer {resolved['renderer']!r}; expected one of {RENDERERS}")
+    if resolved["renderer"] == "pipe" and HAS_OCR and not has_pdftoppm():
+        _warn_once("pdftoppm not on PATH; using the pdf2image renderer")
+        resolved["renderer"] = "pdf2image"
+    return resolved
+
+
+class BudgetExceeded(Exception):
+    """OCR passed settings["deadline"]; finished pages are left checkpointed."""
+    budget_exceeded = True
+
+
+def is_budget_exceeded(exc: BaseException) -> bool:
+    """True for a BudgetExceeded from any copy of this module.
+
+    Loading page_ocr both top-level and inside a package gives two
+    distinct classes, so callers match on the marker attribute instead.
+    """
+    return getattr(exc, "budget_exceeded", False) is True
+
+
+def check_deadline(settings: Dict[str, Any], pdf_path: str) -> None:
+    if settings.get("deadline") and time.time() > settings["deadline"]:
+        raise BudgetExceeded(f"time budget exceeded for {pdf_path}")
+
+
+# Guards the module state below: documents may be OCR'd from several
+# threads at once (core.bus.ParallelConsumer handlers)
+_lock = threading.Lock()
+
+_warned = set()
+
+
+def _warn_once(message: str) -> None:
+    with _lock:
+        if message in _warned:
+            return
+        _warned.add(message)
+    logger.warning(message)
+
+
+# One pool per worker count, kept for the life of the process so worker
+# start-up (and any per-worker OCR engine) is paid once, not per document.
+_pools: Dict[int, ProcessPoolExecutor] = {}
+
+# Serves the slot queues of the shared-memory transport (proxies can be
+# passed to pool tasks, unlike plain multiprocessing queues)
+_manager = None
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool with `workers` processes."""
+    with _lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # Workers must share this process's resource tracker (see shm_ring)
+            ensure_tracker()
+            pool = ProcessPoolExecutor(max_workers=workers)
+            _pools[workers] = pool
+        return pool
+
+
+def discard_pool(workers: int, pool: ProcessPoolExecutor) -> None:
+    """Forget a broken pool so the next get_pool() starts a new one."""
+    with _lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+
+
+def get_manager() -> Any:
+    global _manager
+    with _lock:
+        if _manager is None:
+            _manager = multiprocessing.Manager()
+        return _manager
+
+
+def shutdown_pools() -> None:
+    global _manager
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        manager, _manager = _manager, None
+    for pool in pools:
+        pool.shutdown()
+    if manager is not None:
+        manager.shutdown()
+
+
+atexit.register(shutdown_pools)
+
+
+def sha256_file(path: str) -> str:
+    """Streaming SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _output_material(settings: Dict[str, Any]) -> Dict[str, Any]:
+    material = {name: settings.get(name) for name in OUTPUT_SETTINGS}
+    material["format"] = OUTPUT_FORMAT
+    return material
+
+
+def output_key(settings: Dict[str, Any]) -> str:
+    """Identity of the output settings alone (no file content), e.g. for the run manifest."""
+    return hashlib.sha256(json.dumps(_output_material(settings), sort_keys=True).encode()).hexdigest()
+
+
+def settings_key(sha256: str, settings: Dict[str, Any]) -> str:
+    """Identity of "this content extracted with these output settings".
+
+    With backend "auto", settings should come from backends.lookup_settings
+    (or resolve_backend) so a recalibrated backend gets a new key.
+    """
+    material = {"sha256": sha256}
+    material.update(_output_material(settings))
+    return hashlib.sha256(json.dumps(material, sort_keys=True).encode()).hexdigest()
+
+
+def is_image_file(path: str) -> bool:
+    return Path(path).suffix.lower() in IMAGE_SUFFIXES
+
+
+def count_pages(pdf_path: str) -> int:
+    """Page count from poppler's pdfinfo (no rendering), or frames in an image."""
+    if is_image_file(pdf_path):
+        with Image.open(pdf_path) as img:
+            return getattr(img, "n_frames", 1)
+    return int(pdfinfo_from_path(pdf_path)["Pages"])
+
+
+def page_runs(page_numbers: List[int], workers: int) -> List[Tuple[int, int]]:
+    """Group ascending page numbers into contiguous inclusive (first, last) runs.
+
+    Runs are capped in length so the pool gets a few ranges per worker.
+    """
+    if not page_numbers:
+        return []
+    chunks = max(1, min(len(page_numbers), workers * CHUNKS_PER_WORKER))
+    size = -(-len(page_numbers) // chunks)
+
+    runs = []
+    first = prev = page_numbers[0]
+    for number in page_numbers[1:]:
+        if number == prev + 1 and number - first < size:
+            prev = number
+            continue
+        runs.append((first, prev))
+        first = prev = number
+    runs.append((first, prev))
+    return runs
+
+
+def iter_pages(pdf_path: str, first: int = 1, last: Optional[int] = None,
+               window: int = DEFAULT_WINDOW,
+               dpi: int = DEFAULT_SETTINGS["dpi"],
+               renderer: str = DEFAULT_SETTINGS["renderer"]) -> Iterator[Tuple[int, Any]]:
+    """Yield (page_number, PIL image) for pages first..last.
+
+    Pages are rendered `window` at a time with first_page/last_page, and
+    each image is closed as soon as the consumer asks for the next one,
+    so memory is bounded by the window rather than the document length.
+    Image files are decoded frame by frame instead (`dpi` does not apply).
+    The "pipe" renderer streams one pdftoppm process instead of windows.
+    """
+    if is_image_file(pdf_path):
+        yield from iter_image_frames(pdf_path, first, last)
+        return
+    if renderer == "pipe":
+        yield from iter_pages_pipe(pdf_path, first, last, dpi)
+        return
+    if last is None:
+        last = count_pages(pdf_path)
+    window = max(1, window)
+
+    for start in range(first, last + 1, window):
+        end = min(start + window - 1, last)
+        images = convert_from_path(pdf_path, dpi=dpi, first_page=start, last_page=end)
+        images.reverse()
+        page_number = start
+        while images:
+            img = images.pop()
+            try:
+                yield page_number, img
+            finally:
+                img.close()
+            page_number += 1
+
+
+def _flatten(frame: Any) -> Any:
+    """Copy of a frame in a mode Tesseract reads; transparency becomes white."""
+    if frame.mode in ("RGBA", "LA") or (frame.mode == "P" and "transparency" in frame.info):
+        rgba = frame.convert("RGBA")
+        flat = Image.new("RGB", rgba.size, "white")
+        flat.paste(rgba, mask=rgba.getchannel("A"))
+        rgba.close()
+        return flat
+    if frame.mode not in ("1", "L", "RGB"):
+        return frame.convert("RGB")
+    return frame.copy()
+
+
+def iter_image_frames(image_path: str, first: int = 1,
+                      last: Optional[int] = None) -> Iterator[Tuple[int, Any]]:
+    """Yield (frame_number, PIL image) for frames first..last of an image file.
+
+    Only the current frame is decoded, so a long multi-page TIFF costs
+    one frame of memory at a time.
+    """
+    with Image.open(image_path) as img:
+        frames = getattr(img, "n_frames", 1)
+        last = frames if last is None else min(last, frames)
+        for frame_number in range(first, last + 1):
+            img.seek(frame_number - 1)
+            frame = _flatten(img)
+            try:
+                yield frame_number, frame
+            finally:
+                frame.close()
+
+
+# tesserocr's GetTSVText() omits the header row that the CLI writes
+TSV_HEADER = ("level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+              "left\ttop\twidth\theight\tconf\ttext\n")
+
+
+def mean_confidence(tsv: str) -> Optional[float]:
+    """Mean word confidence (0-100) from tesseract TSV output."""
+    confidences = []
+    for line in tsv.splitlines()[1:]:
+        cols = line.split("\t")
+        # level 5 = word; conf -1 marks non-word layout rows
+        if len(cols) == 12 and cols[0] == "5":
+            try:
+                conf = float(cols[10])
+            except ValueError:
+                continue
+            if conf >= 0:
+                confidences.append(conf)
+    if not confidences:
+        return None
+    return round(sum(confidences) / len(confidences), 2)
+
+
+# .api = (lang, PyTessBaseAPI) for each thread, created on first use
+# (a PyTessBaseAPI holds one image at a time, so threads cannot share it)
+_tess = threading.local()
+
+
+def tesserocr_api(lang: str) -> Any:
+    """This thread's tesserocr API, loading the language model only once."""
+    current = getattr(_tess, "api", None)
+    if current is None or current[0] != lang:
+        if current is not None:
+            current[1].End()
+        _tess.api = current = (lang, tesserocr.PyTessBaseAPI(lang=lang))
+    return current[1]
+
+
+def ocr_image(img: Any, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """OCR one page image with settings["engine"].
+
+    "tesseract": txt and tsv come from a single CLI run, so the confidence
+    costs no extra recognition pass and the text is identical to
+    image_to_string. With the "pipe" renderer the image goes to the CLI
+    on stdin and only TSV comes back on stdout; the text is rebuilt from
+    its words. "tesserocr": the image is handed to a long-lived
+    in-process API, with no subprocess or temp file per page.
+    With settings["word_boxes"], the TSV is returned too ("tsv").
+    """
+    if settings["engine"] == "tesserocr":
+        api = tesserocr_api(settings["lang"])
+        api.SetImage(img)
+        text = api.GetUTF8Text()
+        confidences = [c for c in api.AllWordConfidences() if c >= 0]
+        confidence = round(sum(confidences) / len(confidences), 2) if confidences else None
+        result = {"text": text, "confidence": confidence}
+        if settings["word_boxes"]:
+            result["tsv"] = TSV_HEADER + api.GetTSVText(0)
+        return result
+
+    if settings["renderer"] == "pipe":
+        tsv = tesseract_tsv(img, settings["lang"], pytesseract.pytesseract.tesseract_cmd)
+        text = text_from_tsv(tsv)
+    else:
+        text, tsv = pytesseract.run_and_get_multiple_output(
+            img, extensions=["txt", "tsv"], lang=settings["lang"])
+    result = {"text": text, "confidence": mean_confidence(tsv)}
+    if settings["word_boxes"]:
+        result["tsv"] = tsv
+    return result
+
+
+def ocr_page_range(pdf_path: str, first: int, last: int,
+                   settings: Optional[Dict[str, Any]] = None,
+                   checkpoint_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Render and OCR pages first..last; one {"page", "text", "confidence"} per page.
+
+    Blank pages (when settings["skip_blank"]) are not sent to Tesseract and
+    come back as {"page", "text": "", "confidence": None, "blank": True}.
+    With `checkpoint_dir`, each page is checkpointed as soon as it is done.
+    Raises BudgetExceeded before starting a page past settings["deadline"].
+    """
+    settings = resolve_settings(settings)
+    checkpoint = PageCheckpoint(checkpoint_dir) if checkpoint_dir else None
+    pages = []
+    for page_number, img, render in timed_pages(iter_pages(pdf_path, first, last, settings["window"],
+                                                           settings["dpi"], settings["renderer"])):
+        check_deadline(settings, pdf_path)
+        record = ocr_page(page_number, img, settings)
+        if settings["metrics"]:
+            record["timings"]["render"] = render
+        if checkpoint is not None:
+            checkpoint.save(record)
+        pages.append(record)
+    return pages
+
+
+def timed_pages(pages: Iterator[Tuple[int, Any]]) -> Iterator[Tuple[int, Any, float]]:
+    """(page_number, image, seconds spent rendering it) for each rendered page."""
+    pages = iter(pages)
+    while True:
+        start = time.perf_counter()
+        item = next(pages, None)
+        if item is None:
+            return
+        yield item[0], item[1], time.perf_counter() - start
+
+
+def ocr_page(page_number: int, img: Any, settings: Dict[str, Any]) -> Dict[str, Any]:
+    """Blank check, optional preprocessing and OCR for one rendered page.
+
+    With settings["metrics"], the record has "timings" ({"preprocess",
+    "ocr"} seconds; the blank check counts as preprocessing).
+    """
+    start = time.perf_counter()
+    if settings["skip_blank"] and is_blank_page(img):
+        record = {"page": page_number, "text": "", "confidence": None, "blank": True}
+        if settings["metrics"]:
+            record["timings"] = {"preprocess": time.perf_counter() - start, "ocr": 0.0}
+        return record
+    if settings["preprocess"]:
+        img = preprocess_page(img)
+    ocr_start = time.perf_counter()
+    record = {"page": page_number}
+    record.update(ocr_image(img, settings))
+    # The DPI actually rendered at ("auto" is resolved per document by now),
+    # which box coordinates are in and a re-OCR pass escalates from
+    record["dpi"] = settings["dpi"]
+    if settings["metrics"]:
+        record["timings"] = {"preprocess": ocr_start - start, "ocr": time.perf_counter() - ocr_start}
+    return record
+
+
+def _shm_worker_task(args: Tuple[str, int, int, Any, Any, Dict[str, Any], Optional[str]]) -> List[Dict[str, Any]]:
+    """OCR pages from the shared ring until a None descriptor arrives."""
+    ring_name, slots, slot_bytes, ready, free, settings, checkpoint_dir = args
+    checkpoint = PageCheckpoint(checkpoint_dir) if checkpoint_dir else None
+    ring = PageRing(slots, slot_bytes, name=ring_name)
+    records = []
+    try:
+        while True:
+            desc = ready.get()
+            if desc is None:
+                break
+            try:
+                check_deadline(settings, f"page {desc['page']}")
+                with ring.image(desc) as img:
+                    record = ocr_page(desc["page"], img, settings)
+                if "render" in desc:
+                    record["timings"]["render"] = desc["render"]
+            finally:
+                if desc["slot"] is not None:
+                    free.put(desc["slot"])
+            if checkpoint is not None:
+                checkpoint.save(record)
+            records.append(record)
+    finally:
+        ring.close()
+    return records
+
+
+def _next_free_slot(free: Any, futures: List[Any]) -> int:
+    """Wait for a free ring slot, surfacing any worker failure instead of hanging."""
+    while True:
+        try:
+            return free.get(timeout=SLOT_WAIT)
+        except queue.Empty:
+            for future in futures:
+                if future.done():
+                    future.result()
+                    raise RuntimeError("OCR worker exited before the document was finished")
+
+
+def ocr_pages_shm(pdf_path: str, page_numbers: List[int], settings: Dict[str, Any],
+                  checkpoint_dir: Optional[str], workers: int) -> List[Dict[str, Any]]:
+    """OCR `page_numbers` with one render stream feeding `workers` through a PageRing.
+
+    Pages are rendered here (poppler runs in its own process) and copied
+    once into a free slot; workers read them in place and hand the slot
+    back, so at most settings["shm_slots"] pages are in flight.
+    """
+    rendered = timed_pages(itertools.chain.from_iterable(
+        iter_pages(pdf_path, first, last, settings["window"], settings["dpi"], settings["renderer"])
+        for first, last in page_runs(page_numbers, 1)))
+    head = next(rendered, None)
+    if head is None:
+        return []
+
+    ring = PageRing.for_page(settings["shm_slots"], head[1])
+    manager = get_manager()
+    free, ready = manager.Queue(), manager.Queue()
+    for slot in range(ring.slots):
+        free.put(slot)
+
+    pool = get_pool(workers)
+    task = (ring.name, ring.slots, ring.slot_bytes, ready, free, settings, checkpoint_dir)
+    futures = [pool.submit(_shm_worker_task, task) for _ in range(workers)]
+    records = []
+    try:
+        try:
+            for page_number, img, render in itertools.chain([head], rendered):
+                check_deadline(settings, pdf_path)
+                slot = _next_free_slot(free, futures)
+                desc = ring.put(slot, page_number, img)
+                if desc["slot"] is None:
+                    free.put(slot)
+                if settings["metrics"]:
+                    desc["render"] = render
+                ready.put(desc)
+        finally:
+            for _ in futures:
+                ready.put(None)
+            for future in futures:
+                records.extend(future.result())
+    except BrokenProcessPool:
+        discard_pool(workers, pool)
+        raise
+    finally:
+        ring.close()
+    return records
+
+
+def auto_dpi(pdf_path: str, page_number: int) -> int:
+    """Render DPI for a document, from the text height on one probe page."""
+    probe = convert_from_path(pdf_path, dpi=PROBE_DPI,
+                              first_page=page_number, last_page=page_number)[0]
+    try:
+        dpi = choose_dpi(probe, PROBE_DPI)
+    finally:
+        probe.close()
+    return dpi or FALLBACK_DPI
+
+
+def _ocr_page_range_task(args: Tuple[str, int, int, Dict[str, Any], Optional[str]]) -> List[Dict[str, Any]]:
+    return ocr_page_range(*args)
+
+
+def ocr_pdf_pages(pdf_path: str, settings: Optional[Dict[str, Any]] = None,
+                  page_numbers: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """OCR pages of a PDF (or frames of an image), fanning page ranges out to a process pool.
+
+    `page_numbers` (1-based, ascending) defaults to every page. Returns
+    {"page", "text", "confidence"} for those pages in order; text is
+    identical to OCRing them one at a time in a single process.
+
+    When settings["checkpoint_dir"] is set, pages are checkpointed under a
+    key of the file's content hash + output settings, and pages found there
+    from an interrupted run are reused. Each record then names its
+    checkpoint ("checkpoint"); the caller removes it with
+    clear_checkpoints() once its output is safely written. With metrics
+    on, each newly OCR'd page's stage times go to metrics.page().
+    """
+    settings = dict(resolve_settings(settings), metrics=metrics.enabled())
+    workers = settings["workers"]
+    start = time.perf_counter()
+
+    if page_numbers is None:
+        with metrics.stage("open"):
+            page_numbers = list(range(1, count_pages(pdf_path) + 1))
+
+    checkpoint = None
+    done: Dict[int, Dict[str, Any]] = {}
+    if settings["checkpoint_dir"] and page_numbers:
+        with metrics.stage("open"):
+            key = settings_key(sha256_file(pdf_path), settings)
+        checkpoint = PageCheckpoint(Path(settings["checkpoint_dir"]) / key)
+        wanted = set(page_numbers)
+        done = {n: r for n, r in checkpoint.completed().items() if n in wanted}
+        if done:
+            logger.info(f"↩️  Resuming OCR: {len(done)}/{len(page_numbers)} pages already checkpointed")
+    checkpoint_dir = str(checkpoint.directory) if checkpoint else None
+
+    missing = [n for n in page_numbers if n not in done]
+    ranges = page_runs(missing, workers)
+
+    if settings["dpi"] == "auto" and missing and not is_image_file(pdf_path):
+        with metrics.stage("render"):
+            settings = dict(settings, dpi=auto_dpi(pdf_path, missing[0]))
+        logger.info(f"Adaptive DPI: rendering at {settings['dpi']} dpi")
+
+    if settings["transport"] == "shm" and workers > 1 and len(missing) > 1:
+        for record in ocr_pages_shm(pdf_path, missing, settings, checkpoint_dir, workers):
+            done[record["page"]] = record
+    elif workers <= 1 or len(ranges) <= 1:
+        for first, last in ranges:
+            for record in ocr_page_range(pdf_path, first, last, settings, checkpoint_dir):
+                done[record["page"]] = record
+    else:
+        tasks = [(pdf_path, first, last, settings, checkpoint_dir) for first, last in ranges]
+        pool = get_pool(workers)
+        try:
+            # map() yields in submission order, so pages come back in order
+            for chunk in pool.map(_ocr_page_range_task, tasks):
+                for record in chunk:
+                    done[record["page"]] = record
+        except BrokenProcessPool:
+            discard_pool(workers, pool)
+            raise
+
+    pages = [done[n] for n in page_numbers]
+    fresh = set(missing)
+    for record in pages:
+        if checkpoint_dir:
+            record["checkpoint"] = checkpoint_dir
+        timings = record.pop("timings", None)
+        if timings and record["page"] in fresh:
+            metrics.page(pdf_path, record["page"], timings)
+
+    elapsed = time.perf_counter() - start
+    rate = len(missing) / elapsed if elapsed > 0 else 0.0
+    blank = sum(1 for p in pages if p.get("blank"))
+    logger.info(f"OCR: {len(missing)} pages in {elapsed:.1f}s "
+                f"({rate:.2f} pages/sec, {min(workers, max(len(ranges), 1))} workers"
+                f"{f', {blank} blank skipped' if blank else ''})")
+    return pages
+
+
+def word_box_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The render "dpi" of an OCR record, and its "tsv" when word boxes were kept."""
+    return {k: record[k] for k in ("tsv", "dpi") if k in record}
+
+
+def checkpoint_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The "checkpoint" of an OCR record, when its pages were checkpointed."""
+    return {"checkpoint": record["checkpoint"]} if "checkpoint" in record else {}
+
+
+def page_checkpoints(pages: List[Dict[str, Any]]) -> List[str]:
+    """Checkpoint directories the OCR'd pages of a document came from."""
+    return sorted({p["checkpoint"] for p in pages if p.get("checkpoint")})
+
+
+def clear_checkpoints(directories: List[str]) -> None:
+    """Remove page checkpoints; call only once the output built from them is on disk."""
+    for directory in directories:
+        PageCheckpoint(Path(directory)).clear()
+
+
+def extract_native_pages(pdf_path: str) -> List[str]:
+    """Text layer of each page via pdfplumber ("" for pages without one)."""
+    if not HAS_PDFPLUMBER:
+        return []
+
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            return [page.extract_text() or "" for page in pdf.pages]
+    except Exception as e:
+        logger.warning(f"Native extraction failed for {pdf_path}: {e}")
+        return []
+
+
+def has_text_layer(text: str, min_chars: int = MIN_PAGE_CHARS) -> bool:
+    """True if a page's native text is dense enough to skip OCR."""
+    return sum(1 for c in text if not c.isspace()) >= min_chars
+
+
+def extract_pdf_pages(pdf_path: str,
+                      settings: Optional[Dict[str, Any]] = None,
+                      native: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Extract a PDF page by page: native text where present, OCR elsewhere.
+
+    Returns one {"page", "method", "text"} dict per page (plus "confidence"
+    for OCR'd pages), where method is "native", "ocr", "blank" (image-only
+    page with no ink, OCR skipped) or "none" (no text layer and OCR
+    unavailable). `native` is the text layer per page when another reader
+    already has it (default: pdfplumber's).
+    """
+    settings = resolve_settings(settings)
+    if native is None:
+        with metrics.stage("native"):
+            native = extract_native_pages(pdf_path)
+    if not native and HAS_OCR:
+        try:
+            with metrics.stage("open"):
+                native = [""] * count_pages(pdf_path)
+        except Exception as e:
+            logger.error(f"Could not read page count for {pdf_path}: {e}")
+            return []
+
+    pages = [{"page": number, "method": "native", "text": text}
+             for number, text in enumerate(native, 1)]
+
+    targets = [p["page"] for p in pages
+               if not has_text_layer(p["text"], settings["min_page_chars"])]
+    if targets and HAS_OCR:
+        try:
+            for record in ocr_pdf_pages(pdf_path, settings, page_numbers=targets):
+                pages[record["page"] - 1].update({
+                    "method": "blank" if record.get("blank") else "ocr",
+                    "text": record["text"],
+                    "confidence": record["confidence"],
+                    **word_box_fields(record),
+                    **checkpoint_fields(record),
+                })
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            logger.error(f"OCR failed for {pdf_path}: {e}")
+    elif targets:
+        logger.warning(f"{len(targets)} pages of {pdf_path} have no text layer and OCR is unavailable")
+
+    for page in pages:
+        if page["method"] == "native" and not page["text"].strip():
+            page["method"] = "none"
+
+    return pages
+
+
+def extract_ocr_pages(path: str,
+                      settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """OCR every page of a PDF (or frame of an image); same page dicts as extract_pdf_pages."""
+    if not HAS_OCR:
+        return []
+    try:
+        records = ocr_pdf_pages(path, settings)
+    except BudgetExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"OCR failed for {path}: {e}")
+        return []
+    return [{"page": r["page"], "method": "blank" if r.get("blank") else "ocr",
+             "text": r["text"], "confidence": r["confidence"], **word_box_fields(r), **checkpoint_fields(r)}
+            for r in records]
+
+
+def extract_pages(path: str, settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Per-page extraction for a PDF or an image file, chosen by suffix."""
+    if is_image_file(path):
+        return extract_ocr_pages(path, settings)
+    return extract_pdf_pages(path, settings)
+
+
+def join_pages(pages: List[Dict[str, Any]]) -> str:
+    """Document text from page dicts, one newline after each page."""
+    return "".join(page["text"] + "\n" for page in pages)
+
+
+def page_summary(pages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-page method, size and OCR confidence, for metadata (no text)."""
+    summary = []
+    for p in pages:
+        entry = {"page": p["page"], "method": p["method"], "char_count": len(p["text"])}
+        if "confidence" in p:
+            entry["confidence"] = p["confidence"]
+        if "reocr" in p:
+            entry["reocr"] = p["reocr"]
+        summary.append(entry)
+    return summary
+
+
+def document_method(pages: List[Dict[str, Any]]) -> str:
+    """'native', 'ocr', 'hybrid' or 'none' for a whole document."""
+    methods = {p["method"] for p in pages if p["text"].strip()}
+    if {"native", "ocr"} <= methods:
+        return "hybrid"
+    if methods:
+        return methods.pop()
+    return "none"
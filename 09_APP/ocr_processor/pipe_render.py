@@ -0,0 +1,148 @@
+"""
+Zero-temp-file render → OCR path
+pdftoppm writes raw PPM pages to a pipe that is parsed one page at a time,
+and pages reach the tesseract CLI on stdin with TSV read back from stdout,
+so no page image or OCR result ever touches the filesystem
+"""
+
+import io
+import shutil
+import logging
+import subprocess
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+logger = logging.getLogger(__name__)
+
+# PNM magic → (PIL mode, bytes per pixel)
+PNM_MODES = {b"P5": ("L", 1), b"P6": ("RGB", 3)}
+
+
+def has_pdftoppm() -> bool:
+    return shutil.which("pdftoppm") is not None
+
+
+def _header_token(stream: BinaryIO) -> bytes:
+    """Next whitespace-delimited PNM header token (skipping # comments)."""
+    token = b""
+    while True:
+        c = stream.read(1)
+        if not c:
+            return token
+        if c == b"#" and not token:
+            while c not in (b"\n", b""):
+                c = stream.read(1)
+            continue
+        if c.isspace():
+            if token:
+                return token
+            continue
+        token += c
+
+
+def read_pnm(stream: BinaryIO) -> Optional[Any]:
+    """Read one binary PGM/PPM image from `stream`; None at end of stream."""
+    magic = _header_token(stream)
+    if not magic:
+        return None
+    if magic not in PNM_MODES:
+        raise ValueError(f"Unsupported PNM type {magic!r}")
+    mode, depth = PNM_MODES[magic]
+    width, height, maxval = (int(_header_token(stream)) for _ in range(3))
+    if maxval != 255:
+        raise ValueError(f"Unsupported PNM maxval {maxval}")
+    size = width * height * depth
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError(f"Truncated PNM page ({len(data)} of {size} bytes)")
+    return Image.frombuffer(mode, (width, height), data, "raw", mode, 0, 1)
+
+
+def iter_pages_pipe(pdf_path: str, first: int = 1, last: Optional[int] = None,
+                    dpi: int = 200) -> Iterator[Tuple[int, Any]]:
+    """Yield (page_number, PIL image) streamed from one pdftoppm process.
+
+    pdftoppm blocks on the pipe while a page is being OCR'd, so memory
+    stays at about one page however long the range is.
+    """
+    cmd = ["pdftoppm", "-r", str(dpi), "-f", str(first)]
+    if last is not None:
+        cmd += ["-l", str(last)]
+    cmd.append(str(pdf_path))
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    finished = False
+    try:
+        page_number = first
+        while True:
+            img = read_pnm(proc.stdout)
+            if img is None:
+                break
+            try:
+                yield page_number, img
+            finally:
+                img.close()
+            page_number += 1
+        finished = True
+    finally:
+        proc.stdout.close()
+        if not finished and proc.poll() is None:
+            proc.kill()
+        returncode = proc.wait()
+    if returncode:
+        raise RuntimeError(f"pdftoppm exited with status {returncode} for {pdf_path}")
+
+
+def encode_pnm(img: Any) -> bytes:
+    """In-memory PBM/PGM/PPM encoding (a header plus the raw pixels)."""
+    buf = io.BytesIO()
+    img.save(buf, format="PPM")
+    return buf.getvalue()
+
+
+def tesseract_tsv(img: Any, lang: str, tesseract_cmd: str = "tesseract") -> str:
+    """OCR via `tesseract stdin stdout tsv`: image in, TSV out, no files."""
+    proc = subprocess.run([tesseract_cmd, "stdin", "stdout", "-l", lang, "tsv"],
+                          input=encode_pnm(img), stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE)
+    if proc.returncode:
+        raise RuntimeError(f"tesseract exited with status {proc.returncode}: "
+                           f"{proc.stderr.decode('utf-8', 'replace').strip()}")
+    return proc.stdout.decode("utf-8")
+
+
+def text_from_tsv(tsv: str) -> str:
+    """Plain text as tesseract's txt output lays it out, rebuilt from TSV.
+
+    Words on a line are joined by a space, each line ends with a newline,
+    each paragraph with an extra one, and the page with a form feed.
+    """
+    lines = []
+    words = []
+    current_line = current_par = None
+    for row in tsv.splitlines()[1:]:
+        cols = row.split("\t")
+        # level 5 = word
+        if len(cols) != 12 or cols[0] != "5":
+            continue
+        par = tuple(cols[1:4])
+        line = tuple(cols[1:5])
+        if line != current_line:
+            if words:
+                lines.append(" ".join(words) + "\n")
+                words = []
+            if current_par is not None and par != current_par:
+                lines.append("\n")
+            current_line, current_par = line, par
+        if cols[11].strip():
+            words.append(cols[11])
+    if words:
+        lines.append(" ".join(words) + "\n")
+    if current_par is not None:
+        lines.append("\n")
+    return "".join(lines) + "\f"
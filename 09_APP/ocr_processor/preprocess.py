@@ -0,0 +1,213 @@
+"""
+Image preprocessing between page rendering and OCR
+Grayscale, border crop, deskew and binarization, a quick text-height
+estimate used to pick the render DPI per document, and a pixel-statistics
+blank-page check that lets OCR skip empty pages
+"""
+
+import logging
+from statistics import median
+from typing import Any, List, Optional, Tuple
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+# Deskew search: +/- MAX_SKEW degrees in SKEW_STEP increments, scored on a
+# copy scaled to SKEW_WIDTH pixels wide.
+MAX_SKEW = 5.0
+SKEW_STEP = 0.5
+SKEW_WIDTH = 600
+
+# Rows/columns darker than this (mean 0-255) at a page edge are scanner
+# borders or shadows, and get cropped.
+BORDER_DARKNESS = 100
+CROP_MARGIN = 10
+
+# Adaptive DPI: render a probe page at PROBE_DPI, measure text line height,
+# and scale so lines come out around TARGET_LINE_PX (Tesseract is most
+# accurate with ~20-40px text), within [MIN_DPI, MAX_DPI].
+PROBE_DPI = 100
+TARGET_LINE_PX = 32
+MIN_DPI = 150
+MAX_DPI = 400
+DPI_STEP = 25
+
+# Blank detection: pixels darker than INK_LEVEL count as ink. A page is
+# blank if under BLANK_INK_RATIO of it is ink (bleed-through and scanner
+# dust are lighter/smaller than that), or if it is nearly uniform
+# (stddev under BLANK_STDDEV) like a solid-colour separator sheet.
+# BLANK_MARGIN of each edge is ignored (scanner edges, punch holes).
+INK_LEVEL = 128
+BLANK_INK_RATIO = 0.0001
+BLANK_STDDEV = 2.5
+BLANK_MARGIN = 0.05
+
+
+def to_grayscale(img: Any) -> Any:
+    return img if img.mode == "L" else img.convert("L")
+
+
+def otsu_threshold(gray: Any) -> int:
+    """Otsu's threshold from the 256-bin histogram of a grayscale image."""
+    hist = gray.histogram()[:256]
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    sum_bg = weight_bg = 0
+    best, threshold = -1.0, 127
+    for i, h in enumerate(hist):
+        weight_bg += h
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * h
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if between > best:
+            best, threshold = between, i
+    return threshold
+
+
+def binarize(gray: Any) -> Any:
+    """Black text on white, thresholded with Otsu."""
+    threshold = otsu_threshold(gray)
+    return gray.point(lambda p: 255 if p > threshold else 0)
+
+
+def row_means(gray: Any) -> List[float]:
+    """Mean intensity of each row (a 1-pixel-wide box resize)."""
+    return list(gray.resize((1, gray.height), Image.BOX).getdata())
+
+
+def col_means(gray: Any) -> List[float]:
+    return list(gray.resize((gray.width, 1), Image.BOX).getdata())
+
+
+def _profile_score(binary: Any) -> float:
+    """Variance of the row ink profile; peaks when text lines are level."""
+    rows = row_means(binary)
+    mean = sum(rows) / len(rows)
+    return sum((r - mean) ** 2 for r in rows)
+
+
+def estimate_skew(gray: Any) -> float:
+    """Rotation in degrees (counter-clockwise) that levels the text lines."""
+    scale = SKEW_WIDTH / gray.width
+    small = binarize(gray.resize((SKEW_WIDTH, max(1, int(gray.height * scale))), Image.BILINEAR))
+    best_angle, best_score = 0.0, _profile_score(small)
+    steps = int(MAX_SKEW / SKEW_STEP)
+    for i in range(-steps, steps + 1):
+        angle = i * SKEW_STEP
+        if angle == 0:
+            continue
+        score = _profile_score(small.rotate(angle, resample=Image.NEAREST, fillcolor=255))
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def deskew(gray: Any) -> Any:
+    angle = estimate_skew(gray)
+    if angle == 0:
+        return gray
+    return gray.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def crop_borders(gray: Any) -> Any:
+    """Trim dark scanner borders and blank margins, keeping CROP_MARGIN px."""
+    def span(means: List[float]):
+        lo, hi = 0, len(means)
+        while lo < hi and means[lo] < BORDER_DARKNESS:
+            lo += 1
+        while hi > lo and means[hi - 1] < BORDER_DARKNESS:
+            hi -= 1
+        return lo, hi
+
+    top, bottom = span(row_means(gray))
+    left, right = span(col_means(gray))
+    if bottom - top < gray.height // 4 or right - left < gray.width // 4:
+        # Mostly dark page (photo, dark scan) — cropping would eat content
+        return gray
+
+    cropped = gray.crop((left, top, right, bottom))
+    # Blank margins: bounding box of ink after thresholding
+    bbox = Image.eval(binarize(cropped), lambda p: 255 - p).getbbox()
+    if bbox:
+        l, t, r, b = bbox
+        cropped = cropped.crop((max(0, l - CROP_MARGIN), max(0, t - CROP_MARGIN),
+                                min(cropped.width, r + CROP_MARGIN), min(cropped.height, b + CROP_MARGIN)))
+    return cropped
+
+
+def preprocess_page(img: Any) -> Any:
+    """Full stage: grayscale → border crop → deskew → binarize."""
+    gray = to_grayscale(img)
+    gray = crop_borders(gray)
+    gray = deskew(gray)
+    return binarize(gray)
+
+
+def estimate_line_height(img: Any) -> Optional[float]:
+    """Median height in px of text lines (runs of inked rows), or None."""
+    binary = binarize(to_grayscale(img))
+    rows = row_means(binary)
+    runs = []
+    run = 0
+    for mean in rows:
+        if mean < 250:  # row has some ink
+            run += 1
+        elif run:
+            runs.append(run)
+            run = 0
+    if run:
+        runs.append(run)
+    # Ignore 1-2px specks/rules
+    runs = [r for r in runs if r > 2]
+    if not runs:
+        return None
+    return median(runs)
+
+
+def choose_dpi(probe_img: Any, probe_dpi: int = PROBE_DPI) -> Optional[int]:
+    """Render DPI that brings text lines to about TARGET_LINE_PX."""
+    height = estimate_line_height(probe_img)
+    if not height:
+        return None
+    dpi = probe_dpi * TARGET_LINE_PX / height
+    dpi = int(round(dpi / DPI_STEP) * DPI_STEP)
+    return max(MIN_DPI, min(MAX_DPI, dpi))
+
+
+def ink_stats(img: Any) -> Tuple[float, float]:
+    """(ink ratio, intensity stddev) of a page, ignoring BLANK_MARGIN at the edges."""
+    gray = to_grayscale(img)
+    mx, my = int(gray.width * BLANK_MARGIN), int(gray.height * BLANK_MARGIN)
+    inner = gray.crop((mx, my, gray.width - mx, gray.height - my))
+    if HAS_NUMPY:
+        pixels = np.asarray(inner)
+        return float(np.count_nonzero(pixels < INK_LEVEL)) / pixels.size, float(pixels.std())
+
+    hist = inner.histogram()[:256]
+    total = sum(hist)
+    mean = sum(i * h for i, h in enumerate(hist)) / total
+    variance = sum(h * (i - mean) ** 2 for i, h in enumerate(hist)) / total
+    return sum(hist[:INK_LEVEL]) / total, variance ** 0.5
+
+
+def is_blank_page(img: Any) -> bool:
+    """True for blank backsides and uniform separator sheets (skip OCR)."""
+    ratio, stddev = ink_stats(img)
+    return ratio < BLANK_INK_RATIO or stddev < BLANK_STDDEV
@@ -0,0 +1,127 @@
+"""
+Second OCR pass for low-confidence pages
+Pages whose mean word confidence is below settings["reocr_below"] are
+rendered again at a higher DPI and OCR'd with and without preprocessing;
+whichever result scores best is kept. Only the weakest
+settings["reocr_max_pages"] pages are retried, so a bad scan cannot make a
+document cost as much as OCRing all of it at high DPI
+"""
+
+import time
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from page_ocr import (
+    iter_pages, ocr_page, check_deadline, get_pool, is_image_file, resolve_settings, word_box_fields,
+    FALLBACK_DPI,
+)
+
+logger = logging.getLogger(__name__)
+
+# Re-render at this multiple of the first pass's DPI, and at least REOCR_MIN_DPI
+REOCR_DPI_FACTOR = 1.5
+REOCR_MIN_DPI = 300
+
+
+def weak_pages(pages: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+    """OCR'd pages scoring below `threshold`, worst first."""
+    weak = [p for p in pages if p.get("confidence") is not None and p["confidence"] < threshold]
+    return sorted(weak, key=lambda p: (p["confidence"], p["page"]))
+
+
+def reocr_variants(path: str, settings: Dict[str, Any],
+                   first_dpi: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Settings overrides tried on a weak page, in order.
+
+    `first_dpi` is the DPI the page was first OCR'd at (its page dict's
+    "dpi"), which with --dpi auto can be above FALLBACK_DPI.
+    """
+    toggled = {"preprocess": not settings["preprocess"]}
+    if is_image_file(path):
+        # DPI does not apply to image files; only the preprocessing can change
+        return [toggled]
+    if isinstance(first_dpi, int):
+        base = first_dpi
+    else:
+        base = settings["dpi"] if isinstance(settings["dpi"], int) else FALLBACK_DPI
+    dpi = max(REOCR_MIN_DPI, int(base * REOCR_DPI_FACTOR))
+    return [{"dpi": dpi}, dict(toggled, dpi=dpi)]
+
+
+def reocr_page(path: str, page_number: int, settings: Dict[str, Any],
+               variants: List[Dict[str, Any]], threshold: float) -> Optional[Dict[str, Any]]:
+    """Best-scoring variant for one page (None if none produced a confidence).
+
+    Each distinct DPI is rendered once; variants stop as soon as one
+    reaches `threshold`.
+    """
+    check_deadline(settings, path)
+    best = None
+    rendered: Dict[Any, Any] = {}
+    try:
+        for variant in variants:
+            attempt = dict(settings, skip_blank=False, **variant)
+            dpi = attempt["dpi"]
+            if dpi not in rendered:
+                for _, img in iter_pages(path, page_number, page_number, 1, dpi, attempt["renderer"]):
+                    rendered[dpi] = img.copy()
+            record = ocr_page(page_number, rendered[dpi], attempt)
+            if record["confidence"] is None:
+                continue
+            if best is None or record["confidence"] > best["confidence"]:
+                best = dict(record, variant=variant)
+            if best["confidence"] >= threshold:
+                break
+    finally:
+        for img in rendered.values():
+            img.close()
+    return best
+
+
+def _reocr_page_task(args: Tuple[str, int, Dict[str, Any], List[Dict[str, Any]], float]) -> Optional[Dict[str, Any]]:
+    return reocr_page(*args)
+
+
+def reocr_weak_pages(path: str, pages: List[Dict[str, Any]],
+                     settings: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Re-OCR the weakest pages of `pages` in place and return them.
+
+    A page keeps its first-pass text unless a variant scores higher; pages
+    that were replaced get "reocr": {"from_confidence", plus the variant's
+    dpi/preprocess}.
+    """
+    settings = resolve_settings(settings)
+    threshold = settings["reocr_below"]
+    if threshold is None:
+        return pages
+    weak = weak_pages(pages, threshold)
+    if not weak:
+        return pages
+
+    budget = max(settings["reocr_max_pages"], 0)
+    chosen, over_budget = weak[:budget], len(weak) - budget
+    if not chosen:
+        logger.info(f"🔍 Re-OCR: {len(weak)} pages below {threshold:g} but the page budget is 0")
+        return pages
+
+    start = time.perf_counter()
+    tasks = [(path, p["page"], settings, reocr_variants(path, settings, p.get("dpi")), threshold)
+             for p in chosen]
+    workers = settings["workers"]
+    if workers > 1 and len(tasks) > 1:
+        results = list(get_pool(workers).map(_reocr_page_task, tasks))
+    else:
+        results = [_reocr_page_task(task) for task in tasks]
+
+    improved = 0
+    for page, best in zip(chosen, results):
+        if best is None or best["confidence"] <= page["confidence"]:
+            continue
+        page["reocr"] = dict(best["variant"], from_confidence=page["confidence"])
+        page.update({"text": best["text"], "confidence": best["confidence"], **word_box_fields(best)})
+        improved += 1
+
+    logger.info(f"🔍 Re-OCR: {len(chosen)} pages below {threshold:g}, {improved} improved "
+                f"in {time.perf_counter() - start:.1f}s"
+                f"{f' ({over_budget} more over the {budget}-page budget)' if over_budget > 0 else ''}")
+    return pages
@@ -0,0 +1,117 @@
+"""
+Run manifest for standalone_ocr folder runs
+Append-only JSONL, one record per state change, so a crashed batch can be
+resumed with only the remaining files re-processed
+"""
+
+import os
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "run_manifest.jsonl"
+
+STATUS_IN_PROGRESS = "in_progress"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+# Rewrite the log on load once it holds this many times more lines than files
+COMPACT_RATIO = 4
+
+
+class RunManifest:
+    """Latest status per input file, persisted as it changes.
+
+    Each record carries path, size, mtime, sha256, the key of the output
+    settings it was processed with (page_ocr.output_key), status and
+    output paths. Records are appended and fsync'd immediately; on load
+    the last record for each path wins.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        lines = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                lines += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn final line from a crash mid-write
+                    continue
+                self.entries[record["path"]] = record
+        if lines > COMPACT_RATIO * max(len(self.entries), 1):
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp = self.path.with_suffix(".jsonl.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for record in self.entries.values():
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        record["updated"] = time.time()
+        self.entries[record["path"]] = record
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _stat(file_path: Path) -> Dict[str, Any]:
+        st = file_path.stat()
+        return {"path": str(file_path.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    def is_done(self, file_path: Path, settings_key: str) -> bool:
+        """True if the file finished earlier with the same output settings, is unchanged, and its outputs still exist."""
+        current = self._stat(Path(file_path))
+        record = self.entries.get(current["path"])
+        if not record or record.get("status") != STATUS_DONE:
+            return False
+        if record.get("settings_key") != settings_key:
+            return False
+        if record.get("size") != current["size"] or record.get("mtime_ns") != current["mtime_ns"]:
+            return False
+        return all(Path(p).exists() for p in record.get("outputs", []))
+
+    def status(self, file_path: Path) -> Optional[str]:
+        record = self.entries.get(str(Path(file_path).resolve()))
+        return record.get("status") if record else None
+
+    def start(self, file_path: Path, sha256: Optional[str] = None, settings_key: Optional[str] = None) -> None:
+        record = self._stat(Path(file_path))
+        record.update({"sha256": sha256, "settings_key": settings_key, "status": STATUS_IN_PROGRESS, "outputs": []})
+        self._append(record)
+
+    def finish(self, file_path: Path, outputs: List[str], sha256: Optional[str] = None,
+               settings_key: Optional[str] = None) -> None:
+        record = self._stat(Path(file_path))
+        record.update({"sha256": sha256, "settings_key": settings_key, "status": STATUS_DONE, "outputs": outputs})
+        self._append(record)
+
+    def fail(self, file_path: Path, error: str, sha256: Optional[str] = None,
+             settings_key: Optional[str] = None) -> None:
+        record = self._stat(Path(file_path))
+        record.update({"sha256": sha256, "settings_key": settings_key, "status": STATUS_FAILED,
+                       "outputs": [], "error": error})
+        self._append(record)
+
+    def counts(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for record in self.entries.values():
+            totals[record["status"]] = totals.get(record["status"], 0) + 1
+        return totals
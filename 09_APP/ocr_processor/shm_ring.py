@@ -0,0 +1,111 @@
+"""
+Shared-memory page ring between the renderer and OCR workers
+A fixed number of page-sized slots in one multiprocessing.shared_memory
+block: the renderer copies each page into a free slot, workers OCR it from
+there, and the slot goes back on the free list. No image is pickled, and
+memory is slots × slot size whatever the worker count
+"""
+
+import sys
+import logging
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+logger = logging.getLogger(__name__)
+
+# Slots are sized from the first page plus this margin, since later pages
+# can be a little larger; a page that still does not fit goes inline.
+SLOT_HEADROOM = 1.25
+
+
+def ensure_tracker() -> None:
+    """Start this process's resource tracker before any worker pool exists.
+
+    Forked workers only inherit the tracker if it is already running, and
+    spawn/forkserver workers are handed its fd at start-up. Either way the
+    workers then register ring blocks with the owner's tracker instead of
+    starting their own, which would unlink the block when a worker exits.
+    """
+    resource_tracker.ensure_running()
+
+
+class PageRing:
+    """`slots` fixed-size page buffers in one shared memory block.
+
+    The creating process owns the block and unlinks it on close; workers
+    attach by name. Which slots are free is tracked by the caller (a
+    queue of slot numbers), not by the ring.
+    """
+
+    def __init__(self, slots: int, slot_bytes: int, name: Optional[str] = None):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.owner = name is None
+        if self.owner:
+            ensure_tracker()
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        elif sys.version_info >= (3, 13):
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            # Registers with the tracker the owner started (ensure_tracker)
+            # before the pool; its registry is a set, so this adds nothing
+            # and only the owner's unlink removes the block.
+            self.shm = shared_memory.SharedMemory(name=name)
+
+    @classmethod
+    def for_page(cls, slots: int, img: Any) -> "PageRing":
+        """A ring whose slots fit pages like `img`, with SLOT_HEADROOM to spare."""
+        return cls(slots, int(len(img.tobytes()) * SLOT_HEADROOM))
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def put(self, slot: int, page_number: int, img: Any) -> Dict[str, Any]:
+        """Copy a page into `slot`; returns the descriptor workers read it by.
+
+        A page larger than a slot is carried in the descriptor itself
+        ("slot": None), and the caller can hand the slot straight back.
+        """
+        data = img.tobytes()
+        desc = {"page": page_number, "mode": img.mode, "size": img.size, "nbytes": len(data)}
+        if len(data) > self.slot_bytes:
+            desc.update({"slot": None, "data": data})
+            return desc
+        offset = slot * self.slot_bytes
+        self.shm.buf[offset:offset + len(data)] = data
+        desc["slot"] = slot
+        return desc
+
+    @contextmanager
+    def image(self, desc: Dict[str, Any]) -> Iterator[Any]:
+        """PIL image over a slot's bytes, valid only inside the `with` block."""
+        if desc["slot"] is None:
+            img = Image.frombytes(desc["mode"], tuple(desc["size"]), desc["data"])
+            try:
+                yield img
+            finally:
+                img.close()
+            return
+
+        offset = desc["slot"] * self.slot_bytes
+        view = self.shm.buf[offset:offset + desc["nbytes"]]
+        img = Image.frombuffer(desc["mode"], tuple(desc["size"]), view, "raw", desc["mode"], 0, 1)
+        try:
+            yield img
+        finally:
+            img.close()
+            del img
+            view.release()
+
+    def close(self) -> None:
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -1,17 +1,43 @@
 #!/usr/bin/env python3
 """
 Standalone OCR Processor for ProSe Legal DB
-Processes PDFs from 06_SCANS/INBOX and outputs text to OCR_COMPLETE
+Processes PDFs and scanned images (.jpg/.png/.tif) from 06_SCANS/INBOX
+and outputs text to OCR_COMPLETE
 
 Usage:
-    python standalone_ocr.py [path_to_pdf_or_folder]
+    python standalone_ocr.py [path_to_pdf_image_or_folder] [--output-dir DIR] [--workers N] [--window N]
+                             [--backend auto|NAME] [--min-page-chars N] [--dpi N|auto] [--lang LANG]
+                             [--engine tesseract|tesserocr] [--renderer pdf2image|pipe]
+                             [--transport worker|shm] [--preprocess] [--keep-blank]
+                             [--reocr-below CONF] [--reocr-max-pages N] [--word-boxes]
+                             [--store loose|segments] [--store-dir DIR]
+                             [--no-cache] [--cache-dir DIR] [--cache-max-mb N]
+                             [--fresh] [--no-checkpoint]
+                             [--budget SECONDS] [--priority GLOB=CLASS ...] [--queue-status]
 """
 
 import os
 import sys
+import argparse
 from pathlib import Path
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+
+from page_ocr import (
+    ocr_pdf_pages, extract_native_pages, join_pages, page_summary, document_method,
+    resolve_settings, default_workers, is_image_file, DEFAULT_SETTINGS, ENGINES, RENDERERS, TRANSPORTS,
+    IMAGE_SUFFIXES, BudgetExceeded, settings_key, output_key, page_checkpoints, clear_checkpoints,
+)
+from backends import run_backend, lookup_settings, BACKENDS
+from extraction_cache import ExtractionCache, DEFAULT_MAX_BYTES, sha256_file
+from page_index import write_paged_text, index_path_for
+from word_boxes import write_word_boxes, words_path_for, WORDS_SUFFIX
+from corpus_store import CorpusStore, STORES
+import metrics
+from run_manifest import RunManifest, MANIFEST_NAME, STATUS_IN_PROGRESS, STATUS_FAILED
+from ocr_scheduler import (
+    OcrScheduler, QUEUE_STATE_NAME, parse_priority_rule, load_queue_state, format_queue_state,
+)
 
 # Try to import OCR libraries
 try:
@@ -34,51 +60,45 @@ except ImportError:
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Files picked up in folder mode
+SUPPORTED_SUFFIXES = (".pdf",) + IMAGE_SUFFIXES
+
 
 def extract_text_native(pdf_path: str) -> str:
     """Try pdfplumber for native text extraction (faster, no OCR)."""
     if not HAS_PDFPLUMBER:
         return ""
     
-    try:
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text
-    except Exception as e:
-        logger.warning(f"Native extraction failed: {e}")
-        return ""
+    return "".join(extract_native_pages(pdf_path))
 
 
-def extract_text_ocr(pdf_path: str) -> str:
-    """Fall back to pytesseract OCR."""
+def extract_text_ocr(pdf_path: str, settings: Optional[Dict[str, Any]] = None) -> str:
+    """Fall back to pytesseract OCR, spreading pages over settings["workers"] processes."""
     if not HAS_OCR:
         return ""
     
     try:
-        images = convert_from_path(pdf_path)
-        text = ""
-        for img in images:
-            text += pytesseract.image_to_string(img) + "\n"
-        return text
+        return join_pages(ocr_pdf_pages(pdf_path, settings))
     except Exception as e:
         logger.error(f"OCR failed: {e}")
         return ""
 
 
-def extract_text(pdf_path: str) -> Dict[str, Any]:
-    """Extract text from PDF: try native first, then OCR."""
+def extract_text(pdf_path: str, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Extract text page by page: native text layer, OCR for image-only pages and image files."""
     result = {
         "text": "",
         "used_native": False,
         "used_ocr": False,
         "char_count": 0,
-        "word_count": 0
+        "word_count": 0,
+        "pages": [],
+        "page_texts": [],
+        "backend": None
     }
 
-    if not pdf_path.lower().endswith('.pdf'):
-        # Non-PDF files: try to read as text
+    if not pdf_path.lower().endswith('.pdf') and not is_image_file(pdf_path):
+        # Other files: try to read as text
         try:
             with open(pdf_path, 'r', encoding='utf-8', errors='ignore') as f:
                 text = f.read()
@@ -93,54 +113,130 @@ def extract_text(pdf_path: str) -> Dict[str, Any]:
             logger.error(f"Failed to read {pdf_path}: {e}")
             return result
     
-    # For PDFs: native extraction first
-    native_text = extract_text_native(pdf_path)
-    if native_text.strip():
+    # PDFs and images: per-page dicts from the configured (or calibrated) backend
+    backend, pages = run_backend(pdf_path, settings)
+    result["backend"] = backend
+    text = join_pages(pages)
+    if text.strip():
+        method = document_method(pages)
         result.update({
-            "text": native_text,
-            "used_native": True,
-            "char_count": len(native_text),
-            "word_count": len(native_text.split())
+            "text": text,
+            "used_native": method in ("native", "hybrid"),
+            "used_ocr": method in ("ocr", "hybrid"),
+            "char_count": len(text),
+            "word_count": len(text.split()),
+            "pages": page_summary(pages),
+            "page_texts": [p["text"] for p in pages],
+            "word_box_pages": [p for p in pages if "tsv" in p],
+            "checkpoints": page_checkpoints(pages),
         })
-        logger.info(f"✅ Native extraction: {len(native_text)} chars")
-        return result
-    
-    # Fall back to OCR
-    ocr_text = extract_text_ocr(pdf_path)
-    if ocr_text.strip():
-        result.update({
-            "text": ocr_text,
-            "used_ocr": True,
-            "char_count": len(ocr_text),
-            "word_count": len(ocr_text.split())
-        })
-        logger.info(f"✅ OCR extraction: {len(ocr_text)} chars")
+        ocr_pages = sum(1 for p in pages if p["method"] == "ocr")
+        native_pages = sum(1 for p in pages if p["method"] == "native")
+        logger.info(f"✅ {method.capitalize()} extraction: {len(text)} chars "
+                    f"({native_pages} native, {ocr_pages} OCR pages)")
         return result
     
     logger.warning(f"⚠️  No text extracted from {pdf_path}")
     return result
 
 
-def process_file(input_path: str, output_dir: str = None) -> Dict[str, Any]:
-    """Process a single file and save extracted text."""
+def default_output_dir() -> Path:
+    """06_SCANS/OCR_COMPLETE at the repo root."""
+    repo_root = Path(__file__).parent.parent.parent
+    return repo_root / "06_SCANS" / "OCR_COMPLETE"
+
+
+def extraction_metadata(extraction: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadata fields describing an extraction (no output paths)."""
+    return {
+        "backend": extraction.get("backend"),
+        "extraction_method": ("hybrid" if extraction.get("used_native") and extraction.get("used_ocr")
+                              else "native" if extraction.get("used_native")
+                              else "ocr" if extraction.get("used_ocr") else "none"),
+        "char_count": extraction.get("char_count", 0),
+        "word_count": extraction.get("word_count", 0),
+        "pages": extraction.get("pages", []),
+        "timestamp": str(Path(__file__).stat().st_mtime)
+    }
+
+
+def output_settings(input_path: Path, settings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Resolved settings for `input_path`, as its cache, store and manifest keys see them.
+
+    "auto" stays unresolved (backends.lookup_settings), so a cache hit or
+    a finished manifest entry never opens the file; extract_text picks
+    the backend. Other (text) files never reach a backend, so theirs are
+    left as is.
+    """
+    if input_path.suffix.lower() not in SUPPORTED_SUFFIXES:
+        return resolve_settings(settings)
+    return lookup_settings(str(input_path), settings)
+
+
+@metrics.timed_file
+def process_file(input_path: str, output_dir: str = None,
+                 settings: Optional[Dict[str, Any]] = None,
+                 cache: Optional[ExtractionCache] = None,
+                 store: Optional[CorpusStore] = None) -> Dict[str, Any]:
+    """Process a single file and save extracted text (served from `cache` when possible).
+
+    With a writable `store`, the text goes into the segment store instead
+    of loose files in `output_dir`.
+    """
     input_path = Path(input_path)
     
     if not input_path.exists():
         logger.error(f"File not found: {input_path}")
         return {"status": "error", "message": "File not found"}
+
+    if store is not None:
+        return process_file_to_store(input_path, store, settings, cache)
     
     # Determine output directory
     if output_dir is None:
         # Default: OCR_COMPLETE in same directory structure
-        repo_root = Path(__file__).parent.parent.parent
-        output_dir = repo_root / "06_SCANS" / "OCR_COMPLETE"
+        output_dir = default_output_dir()
     else:
         output_dir = Path(output_dir)
     
     output_dir.mkdir(parents=True, exist_ok=True)
+    output_file = output_dir / f"{input_path.stem}_extracted.txt"
+    metadata_file = output_dir / f"{input_path.stem}_metadata.json"
+    index_file = index_path_for(output_file)
+    try:
+        settings = output_settings(input_path, settings)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return {"status": "error", "message": str(e), "file": str(input_path)}
+    words_file = words_path_for(output_file) if settings["word_boxes"] else None
+
+    # Unchanged file + same settings: reuse the cached result, PDF never opened
+    cache_key = None
+    if cache is not None:
+        with metrics.stage("open"):
+            cache_key = cache.key(input_path, settings)
+        with metrics.stage("write"):
+            metadata = cache.restore(cache_key, output_file, metadata_file, index_file, {
+                "source_file": str(input_path),
+                "output_file": str(output_file),
+                "page_index": str(index_file),
+                **({"word_boxes": str(words_file)} if words_file else {}),
+            }, words_file)
+        if metadata is not None:
+            logger.info(f"♻️  Cached: {input_path.name} → {output_file.name}")
+            return {
+                "status": "success",
+                "file": str(input_path),
+                "output": str(output_file),
+                "metadata_file": str(metadata_file),
+                "index_file": str(index_file),
+                **({"words_file": str(words_file)} if words_file else {}),
+                "metadata": metadata,
+                "cached": True
+            }
     
     # Extract text
-    extraction = extract_text(str(input_path))
+    extraction = extract_text(str(input_path), settings)
     
     if not extraction.get("text"):
         return {
@@ -149,24 +245,40 @@ def process_file(input_path: str, output_dir: str = None) -> Dict[str, Any]:
             "file": str(input_path)
         }
     
-    # Save extracted text
-    output_file = output_dir / f"{input_path.stem}_extracted.txt"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(extraction["text"])
-    
-    # Save metadata
-    metadata_file = output_dir / f"{input_path.stem}_metadata.json"
-    import json
-    metadata = {
-        "source_file": str(input_path),
-        "output_file": str(output_file),
-        "extraction_method": "native" if extraction.get("used_native") else "ocr" if extraction.get("used_ocr") else "none",
-        "char_count": extraction.get("char_count", 0),
-        "word_count": extraction.get("word_count", 0),
-        "timestamp": str(Path(__file__).stat().st_mtime)
-    }
-    with open(metadata_file, 'w') as f:
-        json.dump(metadata, f, indent=2)
+    with metrics.stage("write"):
+        # Save extracted text page by page, with a byte-offset index per page.
+        # Written under temp names and renamed, text last, so the page
+        # checkpoints are only dropped once the finished text is in place.
+        staged = {path: path.with_name(path.name + ".tmp")
+                  for path in (index_file, words_file, output_file) if path is not None}
+        if extraction.get("page_texts"):
+            write_paged_text(staged[output_file], extraction["page_texts"], index_path=staged[index_file])
+        else:
+            write_paged_text(staged[output_file], [extraction["text"]], separator="", index_path=staged[index_file])
+        if words_file is not None:
+            words = write_word_boxes(staged[words_file], extraction.get("word_box_pages", []),
+                                     image=is_image_file(str(input_path)))
+            logger.info(f"   Word boxes: {words} words → {words_file.name}")
+        for path, tmp in staged.items():
+            with open(tmp, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+        clear_checkpoints(extraction.get("checkpoints", []))
+
+        # Save metadata
+        import json
+        metadata = {
+            "source_file": str(input_path),
+            "output_file": str(output_file),
+            "page_index": str(index_file),
+            **({"word_boxes": str(words_file)} if words_file else {}),
+            **extraction_metadata(extraction),
+        }
+        with open(metadata_file, 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        if cache is not None:
+            cache.store(cache_key, output_file, metadata, index_file, words_file)
     
     logger.info(f"✅ Processed: {input_path.name} → {output_file.name}")
     logger.info(f"   Method: {metadata['extraction_method']}, Chars: {metadata['char_count']}")
@@ -175,53 +287,275 @@ def process_file(input_path: str, output_dir: str = None) -> Dict[str, Any]:
         "status": "success",
         "file": str(input_path),
         "output": str(output_file),
+        "metadata_file": str(metadata_file),
+        "index_file": str(index_file),
+        **({"words_file": str(words_file)} if words_file else {}),
         "metadata": metadata
     }
 
 
-def process_folder(folder_path: str, output_dir: str = None) -> list:
-    """Process all PDFs in a folder."""
+def process_file_to_store(input_path: Path, store: CorpusStore,
+                          settings: Optional[Dict[str, Any]] = None,
+                          cache: Optional[ExtractionCache] = None) -> Dict[str, Any]:
+    """Extract one file into the segment store, unless it already holds this content + settings."""
+    try:
+        settings = output_settings(input_path, settings)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        return {"status": "error", "message": str(e), "file": str(input_path)}
+    with metrics.stage("open"):
+        sha256 = cache.file_hash(input_path) if cache is not None else sha256_file(input_path)
+    key = settings_key(sha256, settings)
+    words_file = (store.root / "words" / sha256[:2] / f"{sha256}{WORDS_SUFFIX}"
+                  if settings["word_boxes"] else None)
+    result = {"status": "success", "file": str(input_path), "sha256": sha256,
+              **({"words_file": str(words_file)} if words_file else {})}
+
+    # Compared on the entry record: nothing is decompressed to find a hit
+    for entry in reversed(store.find_stem(input_path.stem)):
+        if entry.sha256 != sha256:
+            continue
+        if entry.settings_key == key and (words_file is None or words_file.exists()):
+            logger.info(f"♻️  In store: {input_path.name}")
+            return dict(result, output=str(store.segment_path(entry.segment)), cached=True)
+        break
+
+    extraction = extract_text(str(input_path), settings)
+    if not extraction.get("text"):
+        return {"status": "error", "message": "No text extracted", "file": str(input_path)}
+    with metrics.stage("write"):
+        if words_file is not None:
+            words_file.parent.mkdir(parents=True, exist_ok=True)
+            write_word_boxes(words_file, extraction.get("word_box_pages", []), image=is_image_file(str(input_path)))
+
+        metadata = {
+            "source_file": str(input_path),
+            "settings_key": key,
+            **({"word_boxes": str(words_file)} if words_file else {}),
+            **extraction_metadata(extraction),
+        }
+        entry = store.put(sha256, input_path.stem, extraction.get("page_texts") or [extraction["text"]], metadata)
+        clear_checkpoints(extraction.get("checkpoints", []))
+    logger.info(f"✅ Stored: {input_path.name} → {store.segment_path(entry.segment).name}")
+    logger.info(f"   Method: {metadata['extraction_method']}, Chars: {metadata['char_count']}")
+    return dict(result, output=str(store.segment_path(entry.segment)), metadata=metadata)
+
+
+def iter_input_files(folder: Path):
+    """PDFs and image files under `folder`, in a stable order."""
+    return sorted(p for p in folder.rglob("*")
+                  if p.suffix.lower() in SUPPORTED_SUFFIXES and p.is_file())
+
+
+def process_folder(folder_path: str, output_dir: str = None,
+                   settings: Optional[Dict[str, Any]] = None,
+                   cache: Optional[ExtractionCache] = None,
+                   resume: bool = True, budget: Optional[float] = None,
+                   priority_rules: Optional[List[Tuple[str, str]]] = None,
+                   store: Optional[CorpusStore] = None) -> list:
+    """Process all PDFs and images in a folder, skipping files the run manifest marks done.
+
+    Files run in priority / shortest-job-first order (ocr_scheduler); with
+    a `budget` in seconds, a document that runs over is deferred to the
+    background lane and finished after the rest.
+    """
     folder = Path(folder_path)
+    output_dir = Path(output_dir) if output_dir else default_output_dir()
+    manifest = RunManifest(output_dir / MANIFEST_NAME)
+    if resume and manifest.entries:
+        logger.info(f"📒 Manifest: {manifest.counts()}")
+    settings = resolve_settings(settings)
     results = []
-    
-    for pdf_file in folder.rglob("*.pdf"):
+    pending = []
+    # Per file: settings with the backend resolved, and their output_key
+    file_settings: Dict[Path, Dict[str, Any]] = {}
+
+    for pdf_file in iter_input_files(folder):
         try:
-            result = process_file(pdf_file, output_dir)
-            results.append(result)
+            file_settings[pdf_file] = output_settings(pdf_file, settings)
+        except ValueError:
+            # process_file reports the unusable backend
+            file_settings[pdf_file] = settings
+        if resume and manifest.is_done(pdf_file, output_key(file_settings[pdf_file])):
+            results.append({"status": "skipped", "file": str(pdf_file)})
+        else:
+            pending.append(pdf_file)
+
+    def run_file(pdf_file: Path, deadline: Optional[float]) -> Dict[str, Any]:
+        previous = manifest.status(pdf_file)
+        if previous == STATUS_IN_PROGRESS:
+            logger.info(f"↩️  Resuming interrupted file: {pdf_file.name}")
+        elif previous == STATUS_FAILED:
+            logger.info(f"🔁 Retrying failed file: {pdf_file.name}")
+
+        sha256 = None
+        key = output_key(file_settings[pdf_file])
+        try:
+            sha256 = cache.file_hash(pdf_file) if cache is not None else sha256_file(pdf_file)
+            manifest.start(pdf_file, sha256, key)
+            result = process_file(pdf_file, output_dir, dict(file_settings[pdf_file], deadline=deadline), cache, store)
+        except BudgetExceeded:
+            # Stays in progress; the scheduler retries it in the background lane
+            raise
         except Exception as e:
             logger.error(f"Failed to process {pdf_file}: {e}")
-            results.append({"status": "error", "file": str(pdf_file), "error": str(e)})
+            result = {"status": "error", "file": str(pdf_file), "error": str(e)}
+
+        if result.get("status") == "success":
+            outputs = [result[k] for k in ("output", "metadata_file", "index_file", "words_file") if result.get(k)]
+            manifest.finish(pdf_file, outputs, sha256, key)
+        else:
+            manifest.fail(pdf_file, result.get("error") or result.get("message", ""), sha256, key)
+        return result
+
+    scheduler = OcrScheduler(pending, budget, priority_rules, state_path=output_dir / QUEUE_STATE_NAME)
+    results.extend(scheduler.run(run_file))
+
+    if cache is not None:
+        cache.save()
     
     return results
 
 
+def _dpi_arg(value: str):
+    return value if value == "auto" else int(value)
+
+
+def _priority_arg(value: str):
+    try:
+        return parse_priority_rule(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def main():
     """Main entry point."""
-    if len(sys.argv) < 2:
-        # Default: process INBOX
-        repo_root = Path(__file__).parent.parent.parent
-        inbox_path = repo_root / "06_SCANS" / "INBOX"
-        if inbox_path.exists():
-            logger.info(f"Processing INBOX: {inbox_path}")
-            results = process_folder(str(inbox_path))
-        else:
-            print("Usage: python standalone_ocr.py <pdf_file_or_folder>")
-            print("   or place PDFs in 06_SCANS/INBOX/")
+    parser = argparse.ArgumentParser(description="Extract text from PDFs and images into 06_SCANS/OCR_COMPLETE")
+    parser.add_argument("path", nargs="?",
+                        help="PDF, image (.jpg/.png/.tif) or folder (default: 06_SCANS/INBOX)")
+    parser.add_argument("--output-dir",
+                        help="where extracted text, the run manifest and queue state go "
+                             "(default: 06_SCANS/OCR_COMPLETE)")
+    parser.add_argument("--backend", choices=("auto",) + tuple(BACKENDS), default=DEFAULT_SETTINGS["backend"],
+                        help="extraction backend; auto = fastest acceptable per document class from "
+                             "calibrate_backends.py, else hybrid (default: auto)")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="OCR worker processes (default: number of cores; 1 = serial)")
+    parser.add_argument("--window", type=int, default=DEFAULT_SETTINGS["window"],
+                        help=f"pages rendered at once per worker; bounds peak memory (default: {DEFAULT_SETTINGS['window']})")
+    parser.add_argument("--min-page-chars", type=int, default=DEFAULT_SETTINGS["min_page_chars"],
+                        help=f"pages with less native text than this are OCR'd (default: {DEFAULT_SETTINGS['min_page_chars']})")
+    parser.add_argument("--dpi", type=_dpi_arg, default=DEFAULT_SETTINGS["dpi"],
+                        help="render resolution for OCR, or 'auto' to choose per document "
+                             f"from the text height (default: {DEFAULT_SETTINGS['dpi']})")
+    parser.add_argument("--preprocess", action="store_true",
+                        help="grayscale, crop borders, deskew and binarize pages before OCR")
+    parser.add_argument("--keep-blank", action="store_true",
+                        help="OCR every page, even ones detected as blank")
+    parser.add_argument("--engine", choices=ENGINES, default=DEFAULT_SETTINGS["engine"],
+                        help="tesseract = CLI per page; tesserocr = model loaded once per worker "
+                             f"(default: {DEFAULT_SETTINGS['engine']})")
+    parser.add_argument("--renderer", choices=RENDERERS, default=DEFAULT_SETTINGS["renderer"],
+                        help="pipe = stream pdftoppm output and tesseract stdin/stdout with no temp files "
+                             f"(default: {DEFAULT_SETTINGS['renderer']})")
+    parser.add_argument("--transport", choices=TRANSPORTS, default=DEFAULT_SETTINGS["transport"],
+                        help="shm = render once into a fixed shared-memory page ring that workers OCR from "
+                             f"(default: {DEFAULT_SETTINGS['transport']})")
+    parser.add_argument("--reocr-below", type=float, metavar="CONF",
+                        help="re-OCR pages whose mean word confidence (0-100) is below CONF at a higher "
+                             "DPI / other preprocessing and keep the better result (default: off)")
+    parser.add_argument("--reocr-max-pages", type=int, default=DEFAULT_SETTINGS["reocr_max_pages"],
+                        help=f"re-OCR at most this many of the weakest pages per document "
+                             f"(default: {DEFAULT_SETTINGS['reocr_max_pages']})")
+    parser.add_argument("--word-boxes", action="store_true",
+                        help="also save OCR word boxes and confidences to {name}_extracted_words.wbx")
+    parser.add_argument("--store", choices=STORES, default="loose",
+                        help="loose: _extracted.txt/_metadata.json per file in OCR_COMPLETE; "
+                             "segments: compressed segment store (see corpus_store.py) (default: loose)")
+    parser.add_argument("--store-dir", help="segment store location (default: 06_SCANS/OCR_STORE)")
+    parser.add_argument("--lang", default=DEFAULT_SETTINGS["lang"],
+                        help=f"tesseract language(s), e.g. eng+spa (default: {DEFAULT_SETTINGS['lang']})")
+    parser.add_argument("--fresh", action="store_true",
+                        help="ignore the run manifest and reprocess every file in a folder")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="do not checkpoint OCR'd pages (a crash restarts the document from page 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always re-extract, ignoring the extraction cache")
+    parser.add_argument("--cache-dir", help="extraction cache location (default: 06_SCANS/OCR_CACHE)")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help=f"evict least recently used entries past this size (default: {DEFAULT_MAX_BYTES // 1024 ** 2})")
+    parser.add_argument("--budget", type=float,
+                        help="seconds a document may take before it is deferred to the background lane "
+                             "(folders only; default: no limit)")
+    parser.add_argument("--priority", action="append", type=_priority_arg, default=[], metavar="GLOB=CLASS",
+                        help="put files matching GLOB in CLASS (urgent, normal, background); repeatable, "
+                             "first match wins over intake-log categories")
+    parser.add_argument("--queue-status", action="store_true",
+                        help="print the queue of the current (or last) folder run into --output-dir and exit")
+    parser.add_argument("--metrics", nargs="?", const="", metavar="JSONL",
+                        help="record per-stage timings to JSONL (default: metrics.jsonl in the output "
+                             "directory) and print p50/p95 per stage at the end")
+    args = parser.parse_args()
+    output_dir = Path(args.output_dir) if args.output_dir else default_output_dir()
+
+    if args.queue_status:
+        state = load_queue_state(output_dir / QUEUE_STATE_NAME)
+        if state is None:
+            print("No queue state yet; it is written while a folder is processed")
             sys.exit(1)
-    else:
-        input_path = Path(sys.argv[1])
-        if input_path.is_file():
-            results = [process_file(str(input_path))]
-        elif input_path.is_dir():
-            results = process_folder(str(input_path))
+        print(format_queue_state(state))
+        return
+
+    settings = resolve_settings({"backend": args.backend, "workers": args.workers, "window": args.window,
+                                 "min_page_chars": args.min_page_chars,
+                                 "dpi": args.dpi, "lang": args.lang, "engine": args.engine,
+                                 "renderer": args.renderer, "transport": args.transport,
+                                 "preprocess": args.preprocess, "skip_blank": not args.keep_blank,
+                                 "reocr_below": args.reocr_below, "reocr_max_pages": args.reocr_max_pages,
+                                 "word_boxes": args.word_boxes,
+                                 "checkpoint_dir": "" if args.no_checkpoint else None})
+    cache = None if args.no_cache else ExtractionCache(args.cache_dir, args.cache_max_mb * 1024 ** 2)
+    store = CorpusStore(args.store_dir, writable=True) if args.store == "segments" else None
+    ocr_options = {"output_dir": str(output_dir), "settings": settings, "cache": cache, "store": store}
+    folder_options = dict(ocr_options, resume=not args.fresh, budget=args.budget, priority_rules=args.priority)
+    if args.metrics is not None:
+        metrics.configure(Path(args.metrics) if args.metrics else output_dir / metrics.STREAM_NAME)
+
+    try:
+        if args.path is None:
+            # Default: process INBOX
+            repo_root = Path(__file__).parent.parent.parent
+            inbox_path = repo_root / "06_SCANS" / "INBOX"
+            if inbox_path.exists():
+                logger.info(f"Processing INBOX: {inbox_path}")
+                results = process_folder(str(inbox_path), **folder_options)
+            else:
+                print("Usage: python standalone_ocr.py <pdf_image_or_folder>")
+                print("   or place PDFs/images in 06_SCANS/INBOX/")
+                sys.exit(1)
         else:
-            logger.error(f"Path not found: {input_path}")
-            sys.exit(1)
-    
+            input_path = Path(args.path)
+            if input_path.is_file():
+                results = [process_file(str(input_path), **ocr_options)]
+                if cache is not None:
+                    cache.save()
+            elif input_path.is_dir():
+                results = process_folder(str(input_path), **folder_options)
+            else:
+                logger.error(f"Path not found: {input_path}")
+                sys.exit(1)
+    finally:
+        if store is not None:
+            store.close()
+        metrics.log_summary()
+        metrics.close()
+
     # Summary
     success = sum(1 for r in results if r.get("status") == "success")
-    total = len(results)
-    logger.info(f"\n📊 Summary: {success}/{total} files processed successfully")
+    skipped = sum(1 for r in results if r.get("status") == "skipped")
+    total = len(results) - skipped
+    logger.info(f"\n📊 Summary: {success}/{total} files processed successfully"
+                f"{f', {skipped} unchanged files skipped' if skipped else ''}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,4 @@
+"""
+Tests for the OCR processor
+Run from 09_APP/ocr_processor: python -m pytest tests
+"""
@@ -0,0 +1,37 @@
+"""Fixtures shared by the test modules: input files and a thread-backed worker pool."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import page_ocr
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    """make_file(name, data, folder) writes an input file (under tmp_path by default).
+
+    Without `data` the file is a stub PDF whose bytes include its name, so
+    files made with different names have different hashes.
+    """
+    def make(name="scan.pdf", data=None, folder=None):
+        path = (folder or tmp_path) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"%PDF-1.4 " + name.encode() if data is None else data)
+        return path
+
+    return make
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    """page_ocr.get_pool() backed by threads, so monkeypatched fakes reach the workers."""
+    pools = {}
+
+    def get_pool(workers):
+        return pools.setdefault(workers, ThreadPoolExecutor(max_workers=workers))
+
+    monkeypatch.setattr(page_ocr, "get_pool", get_pool)
+    yield pools
+    for pool in pools.values():
+        pool.shutdown()
@@ -0,0 +1,166 @@
+import types
+
+import pytest
+
+import backends
+import calibrate_backends
+import page_ocr
+
+
+@pytest.fixture
+def all_available(monkeypatch):
+    for flag in ("HAS_PYPDF2", "HAS_PDFPLUMBER", "HAS_OCR"):
+        monkeypatch.setattr(backends, flag, True)
+
+
+@pytest.fixture
+def calibration(monkeypatch):
+    """load_calibration() returning a dict the test can edit."""
+    saved = {"classes": {}}
+    monkeypatch.setattr(backends, "load_calibration", lambda path=None: saved)
+    return saved["classes"]
+
+
+@pytest.fixture
+def classified_as(monkeypatch):
+    """Make classify_document() return a chosen class without opening the file."""
+    chosen = []
+    monkeypatch.setattr(backends, "classify_document", lambda path, settings=None: chosen[-1])
+    return chosen
+
+
+@pytest.mark.parametrize("sampled, doc_class", [
+    (["a page of native text " * 3] * 3, "text_pdf"),
+    (["a page of native text " * 3, "", "x"], "mixed_pdf"),
+    (["", " ", "x"], "scanned_pdf"),
+    ([], "scanned_pdf"),
+])
+def test_classify_pdf_from_sampled_pages(monkeypatch, sampled, doc_class):
+    monkeypatch.setattr(backends, "sample_native_text", lambda path: sampled)
+    assert backends.classify_document("filing.pdf") == doc_class
+
+
+def test_images_are_classified_by_suffix(monkeypatch):
+    monkeypatch.setattr(backends, "sample_native_text", lambda path: pytest.fail("image sampled"))
+    assert backends.classify_document("scan.PNG") == "image"
+
+
+def test_sampled_pages_spread_first_to_last():
+    assert backends._sample_indices(0) == []
+    assert backends._sample_indices(1) == [0]
+    assert backends._sample_indices(2) == [0, 1]
+    assert backends._sample_indices(11) == [0, 5, 10]
+
+
+def test_auto_uses_the_calibrated_backend_for_the_class(all_available, calibration, classified_as):
+    calibration.update({"text_pdf": {"backend": "pypdf2"}, "scanned_pdf": {"backend": "tesseract"}})
+    classified_as.append("text_pdf")
+    assert backends.select_backend("a.pdf", {"backend": "auto"}) == ("pypdf2", "text_pdf")
+    classified_as.append("scanned_pdf")
+    assert backends.select_backend("a.pdf", {"backend": "auto"}) == ("tesseract", "scanned_pdf")
+    # Uncalibrated class
+    classified_as.append("mixed_pdf")
+    assert backends.select_backend("a.pdf", {"backend": "auto"}) == ("hybrid", "mixed_pdf")
+
+
+def test_auto_falls_back_when_the_calibrated_backend_cannot_run(all_available, monkeypatch,
+                                                                 calibration, classified_as):
+    calibration.update({"text_pdf": {"backend": "pypdf2"}, "image": {"backend": "pdfplumber"}})
+    monkeypatch.setattr(backends, "HAS_PYPDF2", False)
+    classified_as.append("text_pdf")
+    assert backends.select_backend("a.pdf", {"backend": "auto"}) == ("hybrid", "text_pdf")
+    # A text-layer backend calibrated for images cannot read one
+    classified_as.append("image")
+    assert backends.select_backend("a.png", {"backend": "auto"}) == ("hybrid", "image")
+
+
+def test_explicit_backend_is_checked_not_classified(all_available, monkeypatch, classified_as):
+    assert backends.select_backend("a.pdf", {"backend": "pdfplumber"}) == ("pdfplumber", None)
+    with pytest.raises(ValueError, match="Unknown backend"):
+        backends.select_backend("a.pdf", {"backend": "abbyy"})
+    with pytest.raises(ValueError, match="cannot read"):
+        backends.select_backend("a.jpg", {"backend": "pypdf2"})
+    monkeypatch.setattr(backends, "HAS_PDFPLUMBER", False)
+    with pytest.raises(ValueError, match="not available"):
+        backends.select_backend("a.pdf", {"backend": "pdfplumber"})
+
+
+def test_lookup_settings_fingerprints_the_calibration(all_available, calibration, monkeypatch):
+    monkeypatch.setattr(backends, "classify_document", lambda path, settings=None: pytest.fail("classified"))
+    calibration.update({"text_pdf": {"backend": "pypdf2"}})
+    first = backends.lookup_settings("a.pdf", {"backend": "auto"})
+    assert first["backend"] == "auto"
+    assert backends.lookup_settings("b.pdf", {"backend": "auto"})["calibration"] == first["calibration"]
+    calibration["text_pdf"]["backend"] = "pdfplumber"
+    assert backends.lookup_settings("a.pdf", {"backend": "auto"})["calibration"] != first["calibration"]
+
+
+def test_word_recall():
+    assert backends.word_recall("the court the order", "the the court") == 1.0
+    assert backends.word_recall("the court", "the the court order") == 0.5
+    assert backends.word_recall("anything", "  ") == 1.0
+
+
+class FakeBackend(backends.Backend):
+    """Returns fixed text and takes a fixed (fake clock) time per page."""
+
+    def __init__(self, name, text, seconds, clock):
+        self.name, self.text, self.seconds, self.clock = name, text, seconds, clock
+
+    def extract_pages(self, path, settings):
+        self.clock[0] += self.seconds
+        return [{"page": 1, "method": "native", "text": self.text}]
+
+
+def test_calibrate_picks_the_fastest_backend_with_enough_recall(monkeypatch):
+    clock = [0.0]
+    reference = "in the court of common pleas motion to modify custody order"
+    fakes = [FakeBackend("hybrid", reference, 2.0, clock),
+             FakeBackend("pypdf2", reference.replace("custody", "cust ody"), 0.1, clock),
+             FakeBackend("pdfplumber", reference, 0.5, clock)]
+    monkeypatch.setattr(backends, "BACKENDS", {b.name: b for b in fakes})
+    monkeypatch.setattr(backends, "time", types.SimpleNamespace(perf_counter=lambda: clock[0],
+                                                                 strftime=lambda fmt: "now"))
+    monkeypatch.setattr(backends, "classify_document", lambda path, settings=None: "text_pdf")
+
+    calibration = backends.calibrate(["a.pdf", "b.pdf"], {"workers": 1}, min_recall=0.95)
+    text_pdf = calibration["classes"]["text_pdf"]
+    assert text_pdf["backend"] == "pdfplumber"
+    assert text_pdf["results"]["pypdf2"] == {"sec_per_page": 0.1, "mean_recall": 0.9091,
+                                             "min_recall": 0.9091, "files": 2}
+    assert backends.calibrate(["a.pdf"], {"workers": 1}, min_recall=0.9)["classes"]["text_pdf"]["backend"] \
+        == "pypdf2"
+
+
+def test_pick_sample_takes_up_to_n_files_per_class(tmp_path, monkeypatch):
+    for name in ("t1.pdf", "t2.pdf", "t3.pdf", "s1.pdf", "photo.jpg", "notes.txt"):
+        (tmp_path / name).write_bytes(b"x")
+    classes = {"t": "text_pdf", "s": "scanned_pdf", "p": "image"}
+    monkeypatch.setattr(calibrate_backends, "classify_document",
+                        lambda path, settings=None: classes[path.rsplit("/", 1)[-1][0]])
+    sample = calibrate_backends.pick_sample(tmp_path, 2, {})
+    names = sorted(p.name for p in sample)
+    assert len([n for n in names if n.startswith("t")]) == 2
+    assert {"s1.pdf", "photo.jpg"} <= set(names) and "notes.txt" not in names
+    assert calibrate_backends.pick_sample(tmp_path, 2, {}) == sample
+
+
+def test_no_calibration_means_hybrid_without_classifying(all_available, calibration, monkeypatch):
+    monkeypatch.setattr(backends, "classify_document", lambda path, settings=None: pytest.fail("classified"))
+    assert backends.select_backend("a.pdf", {"backend": "auto"}) == ("hybrid", None)
+
+
+def test_text_layer_backend_ocrs_pages_without_one(tmp_path, all_available, monkeypatch):
+    texts = ["A full page of native text from the PDF text layer.", "", "Another full page of native text."]
+    reader = lambda f: types.SimpleNamespace(pages=[types.SimpleNamespace(extract_text=lambda t=t: t)
+                                                    for t in texts])
+    monkeypatch.setattr(backends, "PyPDF2", types.SimpleNamespace(PdfReader=reader), raising=False)
+    monkeypatch.setattr(page_ocr, "HAS_OCR", True)
+    monkeypatch.setattr(page_ocr, "extract_native_pages", lambda path: pytest.fail("read twice"))
+    monkeypatch.setattr(page_ocr, "ocr_pdf_pages", lambda path, settings=None, page_numbers=None: [
+        {"page": n, "text": f"ocr {n}", "confidence": 85.0} for n in page_numbers])
+    pdf = tmp_path / "mixed.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    pages = backends.BACKENDS["pypdf2"].extract_pages(str(pdf), {"checkpoint_dir": ""})
+    assert [(p["method"], p["text"]) for p in pages] == [("native", texts[0]), ("ocr", "ocr 2"),
+                                                         ("native", texts[2])]
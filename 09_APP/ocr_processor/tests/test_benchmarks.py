@@ -0,0 +1,125 @@
+import json
+import random
+import re
+
+import pytest
+
+from benchmarks import bench_throughput, corpus
+from benchmarks.bench_preprocess import char_accuracy, levenshtein
+
+
+def test_levenshtein_and_char_accuracy():
+    assert levenshtein("kitten", "sitting") == 3
+    assert levenshtein("", "abc") == levenshtein("abc", "") == 3
+    assert char_accuracy("the  court\n", "the court") == 1.0
+    assert char_accuracy("the cart", "the court") == pytest.approx(1 - 2 / 9)
+    assert char_accuracy("", "") == 1.0 and char_accuracy("x", "") == 0.0
+
+
+def test_edit_distance_aligns_lines_first():
+    truth = "\n".join(f"line {n} of the filing" for n in range(200))
+    predicted = truth.replace("line 17 of", "Iine 17 of").replace("line 150 of the", "line 150 the")
+    assert bench_throughput.edit_distance(predicted, truth) == 1 + len("of ")
+    assert bench_throughput.edit_distance(truth, truth) == 0
+    # Missing lines cost their characters
+    assert bench_throughput.edit_distance("a\nc", "a\nbb\nc") == 2
+
+
+def test_same_seed_same_document():
+    first = corpus.make_document("text", random.Random("1234:text:0"), font=None)
+    second = corpus.make_document("text", random.Random("1234:text:0"), font=None)
+    other = corpus.make_document("text", random.Random("1234:text:1"), font=None)
+    assert first == second and first != other
+    pages, truth, kinds = first
+    assert set(kinds) == {"text"} and len(pages) == len(truth)
+    assert corpus.PAGES_PER_DOC[0] <= len(pages) <= corpus.PAGES_PER_DOC[1]
+    assert all(page["lines"] == t.split("\n") for page, t in zip(pages, truth))
+
+
+def test_text_pdf_is_well_formed(tmp_path):
+    path = tmp_path / "text.pdf"
+    corpus.write_pdf(path, [{"lines": ["Motion (amended)", "page one"]}, {"lines": ["page two \\ end"]}])
+    data = path.read_bytes()
+    assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+    assert b"(Motion \\(amended\\)) Tj" in data and b"(page two \\\\ end) Tj" in data
+    xref = int(re.search(rb"startxref\n(\d+)", data).group(1))
+    assert data[xref:].startswith(b"xref\n0 ")
+    offsets = [int(o) for o in re.findall(rb"(\d{10}) 00000 n", data)]
+    for number, offset in enumerate(offsets, 1):
+        assert data[offset:].startswith(f"{number} 0 obj".encode())
+    assert b"/Count 2" in data
+
+
+def test_corpus_is_regenerated_only_when_seed_or_size_change(tmp_path, monkeypatch):
+    generated = []
+
+    def generate(out_dir, seed, docs):
+        generated.append((seed, docs))
+        manifest = {"version": corpus.CORPUS_VERSION, "seed": seed, "docs_per_category": docs}
+        (out_dir / corpus.MANIFEST_NAME).write_text(json.dumps(manifest))
+        return manifest
+
+    monkeypatch.setattr(corpus, "generate", generate)
+    corpus.ensure_corpus(tmp_path, seed=1, docs=2)
+    corpus.ensure_corpus(tmp_path, seed=1, docs=2)
+    corpus.ensure_corpus(tmp_path, seed=2, docs=2)
+    corpus.ensure_corpus(tmp_path, seed=2, docs=3)
+    assert generated == [(1, 2), (2, 2), (2, 3)]
+
+
+def result(pages_per_sec=10.0, rss=100.0, accuracy=0.99, digest="abc", settings=None):
+    entry = {"status": "ok", "pages_per_sec": pages_per_sec, "peak_rss_mb": rss, "workers_peak_rss_mb": rss,
+             "accuracy": accuracy, "categories": {"scanned": {"accuracy": accuracy}}}
+    return {"corpus": {"digest": digest}, "settings": settings or {"workers": 1}, "entries": {"standalone": entry}}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    base = result()
+    assert bench_throughput.compare(base, result(pages_per_sec=9.5, rss=105)) == ([], [])
+    regressions, _ = bench_throughput.compare(base, result(pages_per_sec=8.0))
+    assert regressions == ["standalone: 8.00 pages/sec vs 10.00"]
+    regressions, _ = bench_throughput.compare(base, result(rss=150))
+    assert len(regressions) == 2
+    regressions, _ = bench_throughput.compare(base, result(accuracy=0.98))
+    assert [r.split(":")[0] for r in regressions] == ["standalone/all", "standalone/scanned"]
+
+
+def test_compare_notes_different_corpora_and_settings():
+    regressions, notes = bench_throughput.compare(result(), result(digest="def", settings={"workers": 4}))
+    assert not regressions and len(notes) == 2
+
+
+def test_run_entry_scores_pages_against_the_truth(tmp_path, monkeypatch):
+    manifest = {"documents": [
+        {"file": "a.pdf", "category": "text", "truth": ["the court", "the order"]},
+        {"file": "b.pdf", "category": "scanned", "truth": ["exhibit b"]},
+        {"file": "c.pdf", "category": "scanned", "truth": ["lost"]},
+    ]}
+    outputs = {"a.pdf": ["the court"], "b.pdf": ["exhibit 8"]}
+
+    def entry(path, settings, scratch):
+        name = path.rsplit("/", 1)[-1]
+        if name not in outputs:
+            raise RuntimeError("unreadable")
+        return outputs[name]
+
+    monkeypatch.setattr(bench_throughput, "load_corpus", lambda corpus_dir: manifest)
+    monkeypatch.setitem(bench_throughput.ENTRY_POINTS, "fake", entry)
+    monkeypatch.setitem(bench_throughput.ENTRY_MODULES, "fake", "json")
+    stats = bench_throughput.run_entry("fake", tmp_path, {})
+    assert stats["status"] == "ok" and stats["pages"] == 4 and stats["errors"] == 1
+    # "the order" missing (9 chars), one wrong character, "lost" missing (4 chars) out of 31
+    assert stats["accuracy"] == round(1 - 14 / 31, 4)
+    assert stats["categories"]["text"]["accuracy"] == round(1 - 9 / 18, 4)
+    assert stats["failed"] == [{"file": "c.pdf", "error": "RuntimeError: unreadable"}]
+
+
+def test_unimportable_entry_is_skipped(tmp_path, monkeypatch):
+    monkeypatch.setitem(bench_throughput.ENTRY_MODULES, "standalone", "no_such_module")
+    assert bench_throughput.run_entry("standalone", tmp_path, {})["status"] == "skipped"
+
+
+@pytest.mark.skipif(corpus.HAS_PIL, reason="Pillow is installed")
+def test_generating_without_pillow_says_so(tmp_path):
+    with pytest.raises(RuntimeError, match="Pillow"):
+        corpus.generate(tmp_path)
@@ -0,0 +1,264 @@
+import random
+import threading
+import time
+
+from core.bus import EventLog, ParallelConsumer, CONSUMERS_DIR, DEAD_LETTER_DIR
+
+
+def events(n, start=0):
+    return [{"type": "test", "n": i, "file_relpath": f"file{i % 3}.pdf"} for i in range(start, start + n)]
+
+
+def read_all(log):
+    records, _ = log.read(0, 10_000)
+    return records
+
+
+def test_publish_and_read(tmp_path):
+    log = EventLog(tmp_path)
+    offsets = [log.publish(event) for event in events(3)]
+    offsets += log.publish_many(events(2, start=3))
+    assert offsets == sorted(offsets) and offsets[0] == 0
+
+    records = read_all(log)
+    assert [offset for offset, _ in records] == offsets
+    assert [event["n"] for _, event in records] == [0, 1, 2, 3, 4]
+    assert log.read(offsets[2], 2)[0] == records[2:4]
+    assert log.end_offset() == log.read(0)[1]
+    log.close()
+
+
+def test_reopen_truncates_torn_tail(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(3))
+    end = log.end_offset()
+    log.close()
+    segment = tmp_path / "00000000000000000000.log"
+    assert segment.exists()
+    with open(segment, 'ab') as f:
+        f.write(b'{"type":"test","n":')
+
+    log = EventLog(tmp_path)
+    assert log.end_offset() == end
+    assert log.publish({"type": "test", "n": 3}) == end
+    assert [event["n"] for _, event in read_all(log)] == [0, 1, 2, 3]
+    log.close()
+
+
+def test_segments_roll_over(tmp_path, monkeypatch):
+    monkeypatch.setattr("core.bus.SEGMENT_MAX_BYTES", 200)
+    log = EventLog(tmp_path)
+    offsets = [log.publish(event) for event in events(20)]
+    assert len(log.segments()) > 1
+    records, end = log.read(0, 10_000)
+    assert [offset for offset, _ in records] == offsets
+    assert end == log.end_offset()
+    log.close()
+
+
+def test_consumer_commit_and_resume(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(5))
+    reader = log.consumer("ocr")
+    polled = reader.poll()
+    assert [event["n"] for _, _, event in polled] == [0, 1, 2, 3, 4]
+    # Handled the first two only
+    reader.commit(polled[1][1])
+    reader.close()
+
+    reader = log.consumer("ocr")
+    assert reader.committed == polled[2][0]
+    assert [event["n"] for _, _, event in reader.poll()] == [2, 3, 4]
+    assert reader.poll() == []
+    assert reader.lag() == log.end_offset() - polled[2][0]
+    reader.close()
+    log.close()
+
+
+def test_consumer_start(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(2))
+    late = log.consumer("late", start="latest")
+    early = log.consumer("early")
+    log.publish({"type": "test", "n": 2})
+    assert [event["n"] for _, _, event in late.poll()] == [2]
+    assert [event["n"] for _, _, event in early.poll()] == [0, 1, 2]
+    for reader in (late, early):
+        reader.close()
+    log.close()
+
+
+def test_consumer_survives_torn_offset_slot(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(3))
+    reader = log.consumer("ocr")
+    polled = reader.poll()
+    reader.commit(polled[0][1])
+    reader.commit(polled[1][1])
+    reader.close()
+    # Corrupt the newest slot, as a crash mid-write would; the older one still counts
+    path = tmp_path / CONSUMERS_DIR / "ocr.offset"
+    with open(path, 'r+b') as f:
+        f.seek(0)
+        f.write(b"\xff" * 8)
+
+    reader = log.consumer("ocr")
+    assert reader.committed == polled[0][1]
+    reader.close()
+    log.close()
+
+
+def run_parallel(log, handler, count, **options):
+    """Run a ParallelConsumer until `count` events were handled; returns it."""
+    stop = threading.Event()
+    seen = []
+    lock = threading.Lock()
+
+    def counting(event):
+        try:
+            handler(event)
+        finally:
+            with lock:
+                seen.append(event)
+                if len(seen) == count:
+                    stop.set()
+
+    reader = log.consumer("parallel")
+    consumer = ParallelConsumer(reader, counting, **options)
+    watchdog = threading.Timer(10, stop.set)
+    watchdog.start()
+    try:
+        consumer.run(stop)
+    finally:
+        watchdog.cancel()
+    return consumer
+
+
+def test_parallel_consumer_keeps_per_key_order(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(30))
+    order = {}
+    running = set()
+    overlap = []
+    lock = threading.Lock()
+
+    def handler(event):
+        key = event["file_relpath"]
+        with lock:
+            overlap.append(key in running)
+            running.add(key)
+        time.sleep(random.uniform(0, 0.01))
+        with lock:
+            running.discard(key)
+            order.setdefault(key, []).append(event["n"])
+
+    consumer = run_parallel(log, handler, 30, workers=4, max_in_flight=8)
+    assert consumer.handled == 30 and consumer.failed == 0
+    assert not any(overlap)
+    for key, numbers in order.items():
+        assert numbers == sorted(numbers), key
+    assert sum(len(numbers) for numbers in order.values()) == 30
+
+    reader = log.consumer("parallel")
+    assert reader.committed == log.end_offset()
+    reader.close()
+    log.close()
+
+
+def test_parallel_consumer_commits_rejected_events(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(6))
+    ran = []
+
+    consumer = run_parallel(log, lambda event: ran.append(event["n"]), 3,
+                            accept=lambda event: event["n"] % 2 == 0, workers=2)
+    assert sorted(ran) == [0, 2, 4]
+    assert (consumer.handled, consumer.failed) == (3, 0)
+
+    reader = log.consumer("parallel")
+    assert reader.committed == log.end_offset()
+    reader.close()
+    log.close()
+
+
+def by_key(numbers):
+    order = {}
+    for n in numbers:
+        order.setdefault(f"file{n % 3}.pdf", []).append(n)
+    return order
+
+
+def test_parallel_consumer_retries_then_dead_letters(tmp_path):
+    log = EventLog(tmp_path)
+    offsets = log.publish_many(events(6))
+    calls = []
+
+    def handler(event):
+        calls.append(event["n"])
+        # 2 always fails; 4 fails once, then succeeds
+        if event["n"] == 2 or (event["n"] == 4 and calls.count(4) == 1):
+            raise RuntimeError("bad page")
+
+    # max_in_flight below the event count: the failure must not stall the rest
+    consumer = run_parallel(log, handler, 9, workers=2, max_in_flight=2, max_attempts=3, retry_delay=0)
+    assert sorted(calls) == [0, 1, 2, 2, 2, 3, 4, 4, 5]
+    assert (consumer.handled, consumer.failed) == (5, 1)
+    assert not consumer._pending
+
+    reader = log.consumer("parallel")
+    assert reader.committed == log.end_offset()
+    reader.close()
+    dead_letter = EventLog(tmp_path / DEAD_LETTER_DIR)
+    ((_, entry),) = read_all(dead_letter)
+    assert entry["consumer"] == "parallel" and entry["offset"] == offsets[2]
+    assert entry["attempts"] == 3 and entry["error"] == "RuntimeError: bad page"
+    assert entry["event"] == events(6)[2]
+    dead_letter.close()
+    log.close()
+
+
+class BrokenDeadLetter:
+    def publish(self, event):
+        raise OSError("disk full")
+
+
+def test_parallel_consumer_redelivers_event_it_could_not_dead_letter(tmp_path):
+    log = EventLog(tmp_path)
+    offsets = log.publish_many(events(6))
+
+    def handler(event):
+        if event["n"] == 2:
+            raise RuntimeError("bad page")
+
+    consumer = run_parallel(log, handler, 6, workers=2, max_attempts=1, dead_letter=BrokenDeadLetter())
+    assert (consumer.handled, consumer.failed) == (5, 1)
+    reader = log.consumer("parallel")
+    assert reader.committed == offsets[2]
+    reader.close()
+
+    ran = []
+    run_parallel(log, lambda event: ran.append(event["n"]), 4, workers=2)
+    assert sorted(ran) == [2, 3, 4, 5]
+    assert by_key(ran) == by_key([2, 3, 4, 5])
+    reader = log.consumer("parallel")
+    assert reader.committed == log.end_offset()
+    reader.close()
+    log.close()
+
+
+def test_parallel_consumer_stuck_event_caps_read_ahead(tmp_path):
+    log = EventLog(tmp_path)
+    log.publish_many(events(10))
+    ran = []
+
+    def handler(event):
+        ran.append(event["n"])
+        if event["n"] == 0:
+            raise RuntimeError("bad page")
+
+    consumer = run_parallel(log, handler, 3, workers=1, max_in_flight=3, max_attempts=1,
+                            dead_letter=BrokenDeadLetter())
+    assert sorted(ran) == [0, 1, 2]
+    assert len(consumer._pending) == 3
+    assert consumer.reader.committed == 0
+    log.close()
@@ -0,0 +1,81 @@
+import hashlib
+
+import pytest
+
+from corpus_store import CorpusStore, ENTRIES_HEADER, ENTRIES_MAGIC
+
+
+def digest(n):
+    return hashlib.sha256(f"doc {n}".encode()).hexdigest()
+
+
+def put(store, n, stem=None):
+    return store.put(digest(n), stem or f"doc{n}", [f"page one of {n}", f"page two of {n}"], {"n": n})
+
+
+def test_put_find_and_read_across_sessions(tmp_path):
+    with CorpusStore(tmp_path, writable=True) as store:
+        for n in range(5):
+            put(store, n)
+        put(store, 5, stem="doc0")
+        assert store.find(digest(3)).number == 3
+        assert [e.number for e in store.find_stem("doc0")] == [0, 5]
+
+    store = CorpusStore(tmp_path)
+    metadata, text = store.read(store.find(digest(2)))
+    assert metadata["n"] == 2 and metadata["stem"] == "doc2"
+    assert store.page_texts(store.find(digest(2))) == ["page one of 2", "page two of 2"]
+    assert [e.number for e in store.find_stem("doc0")] == [0, 5]
+    assert store.find(digest(99)) is None
+    store.close()
+
+
+def test_lookups_in_a_long_writer_session_read_each_entry_once(tmp_path, monkeypatch):
+    decoded = []
+    original = CorpusStore.entry
+
+    def counting_entry(self, number):
+        decoded.append(number)
+        return original(self, number)
+
+    monkeypatch.setattr(CorpusStore, "entry", counting_entry)
+    appends = 300
+    with CorpusStore(tmp_path, writable=True) as store:
+        for n in range(appends):
+            # standalone_ocr looks a stem up before every put
+            assert store.find_stem(f"doc{n}") == []
+            put(store, n)
+            assert store.find(digest(n)).number == n
+        decoded_in_session = len(decoded)
+        # Scanning every pending entry per lookup would decode ~appends**2 entries
+        assert decoded_in_session < 5 * appends
+        assert [e.number for e in store.find_stem("doc7")] == [7]
+
+    # Closing rebuilt the tables; lookups bisect them again
+    store = CorpusStore(tmp_path)
+    decoded.clear()
+    assert store.find(digest(123)).number == 123
+    assert len(decoded) < 5
+    store.close()
+
+
+def test_entries_carry_the_settings_key_through_reindex(tmp_path):
+    key = hashlib.sha256(b"settings").hexdigest()
+    with CorpusStore(tmp_path, writable=True) as store:
+        store.put(digest(1), "doc1", ["text"], {"settings_key": key})
+        put(store, 2)
+        assert store.find(digest(1)).settings_key == key
+        assert store.find(digest(2)).settings_key is None
+        assert store.reindex() == 2
+        assert store.find(digest(1)).settings_key == key
+
+
+def test_old_entry_files_ask_for_a_reindex(tmp_path):
+    with CorpusStore(tmp_path, writable=True) as store:
+        put(store, 1)
+    with open(tmp_path / "entries.bin", "r+b") as f:
+        f.write(ENTRIES_HEADER.pack(ENTRIES_MAGIC, 1))
+    store = CorpusStore(tmp_path)
+    with pytest.raises(ValueError, match="reindex"):
+        store.find(digest(1))
+    store.close()
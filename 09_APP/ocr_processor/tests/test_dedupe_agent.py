@@ -0,0 +1,119 @@
+import os
+import time
+
+import pytest
+
+import dedupe_agent
+from dedupe_agent import HashIndex, Scanner, STATUS_ACCEPTED, STATUS_DUPLICATE, STATUS_SUPERSEDED
+
+BLOCK = 16
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(dedupe_agent, "PARTIAL_BLOCK", BLOCK)
+    monkeypatch.setattr(dedupe_agent, "SETTLE_SEC", 0)
+
+
+def put(inbox, relpath, data, age=60):
+    path = inbox / relpath
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    # Older than any settle window, and distinct per file so "oldest first" is stable
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def scan(inbox, index):
+    scanner = Scanner(inbox, index, workers=2)
+    events, stats = scanner.scan()
+    return {e["file_relpath"]: e["details"] for e in events}, stats
+
+
+def test_same_size_different_content(tmp_path):
+    inbox = tmp_path / "INBOX"
+    head, tail = b"H" * BLOCK, b"T" * BLOCK
+    # Same size and same first/last blocks: only the full hash tells them apart
+    put(inbox, "a.pdf", head + b"middle-one" + tail, age=60)
+    put(inbox, "b.pdf", head + b"middle-two" + tail, age=50)
+    # Same size, different head: the partial hash is enough
+    put(inbox, "c.pdf", b"C" * BLOCK + b"middle-one" + tail, age=40)
+    events, stats = scan(inbox, HashIndex(tmp_path / "index.json"))
+
+    assert {r: d["status"] for r, d in events.items()} == {r: STATUS_ACCEPTED for r in ("a.pdf", "b.pdf", "c.pdf")}
+    assert events["a.pdf"]["sha256"] != events["b.pdf"]["sha256"]
+    assert "sha256" not in events["c.pdf"]
+    assert stats["duplicates"] == 0
+
+
+def test_identical_content_is_a_duplicate_of_the_oldest(tmp_path):
+    inbox = tmp_path / "INBOX"
+    data = b"x" * (5 * BLOCK)
+    put(inbox, "first/motion.pdf", data, age=60)
+    put(inbox, "second/motion.pdf", data, age=30)
+    put(inbox, "other.pdf", b"y" * 7)
+    events, stats = scan(inbox, HashIndex(tmp_path / "index.json"))
+
+    assert events["first/motion.pdf"]["status"] == STATUS_ACCEPTED
+    assert events["second/motion.pdf"]["status"] == STATUS_DUPLICATE
+    assert events["second/motion.pdf"]["duplicate_of"] == "first/motion.pdf"
+    assert events["other.pdf"]["status"] == STATUS_ACCEPTED
+    assert stats["duplicates"] == 1
+
+
+def test_unique_sizes_read_nothing(tmp_path):
+    inbox = tmp_path / "INBOX"
+    for n in range(1, 6):
+        put(inbox, f"doc{n}.pdf", b"z" * (n * 100))
+    events, stats = scan(inbox, HashIndex(tmp_path / "index.json"))
+
+    assert len(events) == 5
+    assert stats["bytes_read"] == 0
+
+
+def test_bytes_read_totals_partial_and_full_reads(tmp_path):
+    inbox = tmp_path / "INBOX"
+    count, size = 40, 5 * BLOCK
+    for n in range(count):
+        put(inbox, f"copy{n:02d}.pdf", b"d" * size, age=60 + n)
+    scanner = Scanner(inbox, HashIndex(tmp_path / "index.json"), workers=8)
+    _, stats = scanner.scan()
+
+    # Head and tail block of every file, then all of each (the partial hashes all collide)
+    assert stats["bytes_read"] == count * (2 * BLOCK + size)
+    assert stats["duplicates"] == count - 1
+
+
+def test_rescan_reads_nothing_and_reports_changes(tmp_path):
+    inbox = tmp_path / "INBOX"
+    index_path = tmp_path / "index.json"
+    data = b"q" * (5 * BLOCK)
+    put(inbox, "a.pdf", data, age=60)
+    put(inbox, "b.pdf", data, age=50)
+    index = HashIndex(index_path)
+    scan(inbox, index)
+    index.save()
+
+    index = HashIndex(index_path)
+    events, stats = scan(inbox, index)
+    assert events == {}
+    assert stats["bytes_read"] == 0
+
+    # New content under a known path supersedes; its former duplicate is orphaned and decided again
+    put(inbox, "a.pdf", b"r" * (5 * BLOCK), age=10)
+    events, _ = scan(inbox, index)
+    assert events["a.pdf"]["status"] == STATUS_SUPERSEDED
+    assert events["b.pdf"]["status"] == STATUS_ACCEPTED
+
+
+def test_settling_and_partial_files_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(dedupe_agent, "SETTLE_SEC", 30)
+    inbox = tmp_path / "INBOX"
+    put(inbox, "done.pdf", b"1" * 10, age=60)
+    put(inbox, "copying.pdf", b"2" * 10, age=0)
+    put(inbox, "download.pdf.part", b"3" * 10, age=60)
+    events, stats = scan(inbox, HashIndex(tmp_path / "index.json"))
+
+    assert list(events) == ["done.pdf"]
+    assert stats["settling"] == 1
@@ -0,0 +1,89 @@
+import os
+
+from extraction_cache import ExtractionCache
+from page_ocr import resolve_settings
+
+SETTINGS = resolve_settings({"checkpoint_dir": ""})
+
+
+def make_output(tmp_path, name, text):
+    text_file = tmp_path / f"{name}.txt"
+    index_file = tmp_path / f"{name}.idx"
+    text_file.write_text(text)
+    index_file.write_bytes(b"\0" * 8)
+    return text_file, index_file
+
+
+def restore(cache, key, out):
+    out.mkdir(exist_ok=True)
+    return cache.restore(key, out / "scan_extracted.txt", out / "scan_metadata.json",
+                         out / "scan_extracted_pages.idx", {"output_file": "here"})
+
+
+def test_miss_then_hit(tmp_path, make_file):
+    cache = ExtractionCache(tmp_path / "cache")
+    source = make_file()
+    key = cache.key(source, SETTINGS)
+    assert restore(cache, key, tmp_path / "out") is None
+
+    text_file, index_file = make_output(tmp_path, "result", "page one\n")
+    cache.store(key, text_file, {"char_count": 9}, index_file)
+    metadata = restore(cache, key, tmp_path / "out")
+    assert metadata == {"char_count": 9, "output_file": "here", "cache_hit": True}
+    assert (tmp_path / "out" / "scan_extracted.txt").read_text() == "page one\n"
+
+
+def test_key_follows_content_and_output_settings(tmp_path, make_file):
+    cache = ExtractionCache(tmp_path / "cache")
+    source = make_file()
+    key = cache.key(source, SETTINGS)
+    assert cache.key(source, dict(SETTINGS, workers=SETTINGS["workers"] + 1)) == key
+    assert cache.key(source, dict(SETTINGS, dpi=300)) != key
+    source.write_bytes(b"%PDF-1.4 changed")
+    os.utime(source, ns=(1, 1))
+    assert cache.key(source, SETTINGS) != key
+
+
+def test_restored_output_is_not_linked_to_the_cache(tmp_path, make_file):
+    cache = ExtractionCache(tmp_path / "cache")
+    key = cache.key(make_file(), SETTINGS)
+    text_file, index_file = make_output(tmp_path, "result", "original\n")
+    cache.store(key, text_file, {}, index_file)
+
+    restore(cache, key, tmp_path / "out")
+    with open(tmp_path / "out" / "scan_extracted.txt", 'a') as f:
+        f.write("edited in place\n")
+    restore(cache, key, tmp_path / "again")
+    assert (tmp_path / "again" / "scan_extracted.txt").read_text() == "original\n"
+
+
+def test_overwriting_an_entry_does_not_count_it_twice(tmp_path, make_file):
+    cache = ExtractionCache(tmp_path / "cache")
+    key = cache.key(make_file(), SETTINGS)
+    text_file, index_file = make_output(tmp_path, "result", "x" * 100)
+    for _ in range(5):
+        cache.store(key, text_file, {}, index_file)
+    assert cache._size == cache._scan_size()
+
+
+def test_evicts_least_recently_used(tmp_path, make_file):
+    cache = ExtractionCache(tmp_path / "cache", max_bytes=1000)
+    keys = []
+    for n in range(3):
+        key = cache.key(make_file(f"{n}.pdf", bytes([n])), SETTINGS)
+        text_file, index_file = make_output(tmp_path, f"result{n}", "x" * 300)
+        cache.store(key, text_file, {}, index_file)
+        keys.append(key)
+    assert all(restore(cache, key, tmp_path / "out") is not None for key in keys)
+    for n, key in enumerate(keys):
+        os.utime(cache._paths(key)[1], (n, n))
+    # Entry 0 is the least recently used; a hit makes it the most recent
+    restore(cache, keys[0], tmp_path / "out")
+
+    key = cache.key(make_file("3.pdf", b"\3"), SETTINGS)
+    text_file, index_file = make_output(tmp_path, "result3", "x" * 300)
+    cache.store(key, text_file, {}, index_file)
+    assert restore(cache, keys[1], tmp_path / "out") is None
+    assert restore(cache, keys[0], tmp_path / "out") is not None
+    assert restore(cache, key, tmp_path / "out") is not None
+    assert cache._size <= cache.max_bytes
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+import metrics
+import page_ocr
+
+
+@pytest.fixture
+def stream(tmp_path):
+    path = metrics.configure(tmp_path / "metrics" / metrics.STREAM_NAME)
+    yield path
+    metrics.close()
+
+
+def events(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_disabled_metrics_record_nothing():
+    assert not metrics.enabled()
+    assert metrics.stage("ocr") is metrics.stage("render")
+    assert metrics.file_timer("a.pdf") is metrics.stage("ocr")
+    with metrics.file_timer("a.pdf"), metrics.stage("ocr"):
+        metrics.page("a.pdf", 1, {"ocr": 1.0})
+    assert metrics.summary() == {}
+
+
+def test_stages_add_up_per_file(stream):
+    with metrics.file_timer("a.pdf"):
+        with metrics.stage("open"):
+            pass
+        # A nested timer (ocr_tasks around run_backend) joins the outer file
+        with metrics.file_timer("a.pdf"), metrics.stage("ocr"):
+            pass
+        metrics.page("a.pdf", 1, {"render": 0.5, "ocr": 2.0})
+        metrics.page("a.pdf", 2, {"render": 0.25, "ocr": 1.0})
+
+    recorded = events(stream)
+    page_events = [e for e in recorded if e["type"] == "page"]
+    (file_event,) = [e for e in recorded if e["type"] == "file"]
+    assert [(e["page"], e["ocr"]) for e in page_events] == [(1, 2.0), (2, 1.0)]
+    assert file_event["file"] == "a.pdf" and file_event["pages"] == 2
+    assert set(file_event["stages"]) == {"open", "ocr", "render"}
+    assert file_event["stages"]["render"] == 0.75 and file_event["stages"]["ocr"] >= 3.0
+    assert metrics.summary()["page"]["ocr"]["count"] == 2
+
+
+def test_close_writes_a_summary_matching_the_stream(stream):
+    for n in range(1, 5):
+        with metrics.file_timer(f"{n}.pdf"):
+            metrics.page(f"{n}.pdf", 1, {"ocr": float(n)})
+    live = metrics.summary()
+    metrics.close()
+    saved = json.loads(stream.with_name(stream.name + metrics.SUMMARY_SUFFIX).read_text())
+    assert saved["page"] == live["page"] == metrics.summarize_stream(stream)["page"]
+    assert saved["page"]["ocr"] == {"count": 4, "total": 10.0, "mean": 2.5, "p50": 2.5, "p95": 3.85,
+                                    "max": 4.0}
+    assert "ocr" in metrics.format_summary(saved)
+
+
+def test_percentile_interpolates():
+    assert metrics.percentile([1.0], 95) == 1.0
+    assert metrics.percentile([0.0, 10.0], 50) == 5.0
+    assert metrics.percentile(range(101), 95) == 95
+
+
+def test_summarize_stream_skips_torn_lines(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    path.write_text('{"type": "page", "file": "a.pdf", "page": 1, "ocr": 1.5}\n{"type": "pa')
+    assert metrics.summarize_stream(path) == {"page": {"ocr": {"count": 1, "total": 1.5, "mean": 1.5,
+                                                               "p50": 1.5, "p95": 1.5, "max": 1.5}}}
+
+
+def test_ocr_pages_report_their_stage_times(stream, monkeypatch):
+    def iter_pages(pdf_path, first=1, last=None, *args):
+        for number in range(first, last + 1):
+            yield number, None
+
+    def ocr_page(number, img, settings):
+        assert settings["metrics"]
+        return {"page": number, "text": "", "confidence": None,
+                "timings": {"preprocess": 0.0, "ocr": 0.5}}
+
+    monkeypatch.setattr(page_ocr, "count_pages", lambda path: 3, raising=False)
+    monkeypatch.setattr(page_ocr, "iter_pages", iter_pages)
+    monkeypatch.setattr(page_ocr, "ocr_page", ocr_page)
+    with metrics.file_timer("scan.pdf"):
+        pages = page_ocr.ocr_pdf_pages("scan.pdf", {"workers": 1, "checkpoint_dir": ""})
+    assert all("timings" not in p for p in pages)
+    recorded = events(stream)
+    assert [e["page"] for e in recorded if e["type"] == "page"] == [1, 2, 3]
+    assert {"render", "preprocess", "ocr"} <= set(recorded[-1]["stages"])
+    assert recorded[-1]["pages"] == 3
@@ -0,0 +1,125 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+import ocr_scheduler
+import page_ocr
+from ocr_scheduler import OcrScheduler, LANE_BACKGROUND, parse_priority_rule
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_budget_exceeded_from_another_module_copy_is_deferred(make_file):
+    # What a package import (tasks.page_ocr) gives next to the top-level page_ocr
+    spec = importlib.util.spec_from_file_location("tasks.page_ocr", APP_DIR / "page_ocr.py")
+    other = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(other)
+    assert other.BudgetExceeded is not page_ocr.BudgetExceeded
+    assert page_ocr.is_budget_exceeded(other.BudgetExceeded("late"))
+
+    calls = []
+
+    def handler(path, deadline):
+        calls.append(deadline)
+        if deadline is not None:
+            raise other.BudgetExceeded("late")
+        return {"status": "success", "file": str(path)}
+
+    scheduler = OcrScheduler([make_file("a.pdf", b"x")], budget=5, intake={})
+    results = scheduler.run(handler)
+    assert [r["status"] for r in results] == ["success"]
+    assert calls[0] is not None and calls[1] is None
+    assert scheduler.jobs[0]["lane"] == LANE_BACKGROUND
+    assert scheduler.jobs[0]["status"] == "done"
+
+
+def test_order_is_priority_then_smallest_files(make_file):
+    sizes = {"order.pdf": 40, "memo.pdf": 2, "exhibit.pdf": 9, "notes.pdf": 1,
+             "shot.png": 3, "filing.pdf": 30}
+    intake = {"order.pdf": {"categories": ["Evidence", "Court Filing"]},
+              "memo.pdf": {"categories": ["Note"], "flags": ["urgent"]},
+              "notes.pdf": {"categories": ["Note"]}}
+    rules = [parse_priority_rule("*/SCREENSHOTS/*=background")]
+    paths = [make_file(name, b"x" * sizes[name])
+             for name in ("order.pdf", "memo.pdf", "exhibit.pdf", "notes.pdf", "filing.pdf")]
+    paths.append(make_file("SCREENSHOTS/shot.png", b"x" * sizes["shot.png"]))
+
+    scheduler = OcrScheduler(paths, rules=rules, intake=intake)
+    assert [(Path(j["path"]).name, j["priority"]) for j in scheduler.jobs] == [
+        ("memo.pdf", "urgent"), ("order.pdf", "urgent"),
+        ("exhibit.pdf", "normal"), ("filing.pdf", "normal"),
+        ("notes.pdf", "background"), ("shot.png", "background")]
+
+
+def test_priority_rules_are_validated():
+    assert parse_priority_rule("a=b=urgent") == ("a=b", "urgent")
+    for rule in ("*.pdf", "=urgent", "*.pdf=soon"):
+        with pytest.raises(ValueError):
+            parse_priority_rule(rule)
+
+
+def test_pages_are_estimated_from_size_without_opening_files(monkeypatch, make_file):
+    def no_page_count(path):
+        raise AssertionError("sizing a batch must not open its files")
+
+    monkeypatch.setattr(page_ocr, "count_pages", no_page_count)
+    path = make_file("big.pdf", b"x" * (3 * ocr_scheduler.BYTES_PER_PAGE_GUESS + 1))
+    assert OcrScheduler([path], intake={}).jobs[0]["pages"] == 4
+
+
+def test_documents_over_budget_run_after_the_foreground_lane(tmp_path, make_file):
+    sizes = {"a.pdf": 1, "b.pdf": 50, "c.pdf": 3, "d.pdf": 80}
+    paths = [make_file(name, b"x" * size) for name, size in sizes.items()]
+    state_path = tmp_path / "out" / ocr_scheduler.QUEUE_STATE_NAME
+    runs = []
+
+    def handler(path, deadline):
+        runs.append((path.name, deadline is not None))
+        if deadline is not None and sizes[path.name] > 10:
+            raise page_ocr.BudgetExceeded(str(path))
+        if path.name == "c.pdf":
+            return {"status": "error", "file": str(path)}
+        return {"status": "success", "file": str(path)}
+
+    scheduler = OcrScheduler(paths, budget=60, intake={}, state_path=state_path)
+    results = scheduler.run(handler)
+    assert runs == [("a.pdf", True), ("c.pdf", True), ("b.pdf", True), ("d.pdf", True),
+                    ("b.pdf", False), ("d.pdf", False)]
+    assert [Path(r["file"]).name for r in results] == ["a.pdf", "c.pdf", "b.pdf", "d.pdf"]
+    assert {Path(j["path"]).name: (j["lane"], j["status"]) for j in scheduler.jobs} == {
+        "a.pdf": ("foreground", "done"), "c.pdf": ("foreground", "failed"),
+        "b.pdf": ("background", "done"), "d.pdf": ("background", "done")}
+
+    state = ocr_scheduler.load_queue_state(state_path)
+    assert state["counts"] == {"done": 3, "failed": 1} and state["current"] is None
+    assert "budget 60s" in ocr_scheduler.format_queue_state(state)
+
+
+def test_queue_state_is_saved_at_most_once_per_interval(tmp_path, make_file):
+    paths = [make_file(f"{i:02}.pdf", b"x") for i in range(20)]
+    scheduler = OcrScheduler(paths, intake={}, state_path=tmp_path / "out" / ocr_scheduler.QUEUE_STATE_NAME,
+                             save_interval=3600)
+    saves = []
+    state = scheduler.state
+    scheduler.state = lambda: saves.append(1) or state()
+    scheduler.run(lambda path, deadline: {})
+    # The first save at the start, then only the forced one at the end
+    assert len(saves) == 2
+    assert ocr_scheduler.load_queue_state(scheduler.state_path)["counts"] == {"done": 20}
+
+
+def test_no_budget_means_no_deadline(make_file):
+    deadlines = []
+    OcrScheduler([make_file("a.pdf", b"x")], intake={}).run(lambda path, deadline: deadlines.append(deadline) or {})
+    assert deadlines == [None]
+
+
+def test_other_errors_stop_the_batch(make_file):
+    def handler(path, deadline):
+        raise RuntimeError("disk full")
+
+    scheduler = OcrScheduler([make_file("a.pdf", b"x")], budget=5, intake={})
+    with pytest.raises(RuntimeError):
+        scheduler.run(handler)
+    assert scheduler.current is None
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+APP_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_backends_load_with_app_dir_on_path(tmp_path):
+    # A fresh interpreter outside the app, so nothing but APP_DIR makes the siblings importable
+    env = dict(os.environ, PYTHONPATH=str(APP_DIR))
+    result = subprocess.run(
+        [sys.executable, "-c", "import ocr_tasks; print(ocr_tasks.HAS_BACKENDS)"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "True"
@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+from pathlib import Path
+
+import page_ocr
+from page_checkpoint import PageCheckpoint
+
+APP_DIR = Path(__file__).resolve().parent.parent
+PAGES = 5
+
+# Fake renderer and OCR for a PAGES-page document; KILL_AT exits the process hard mid-page
+FAKE_OCR = textwrap.dedent("""
+    import os
+    import page_ocr
+
+    def iter_pages(pdf_path, first, last, *args):
+        for number in range(first, last + 1):
+            yield number, None
+
+    def ocr_page(number, img, settings):
+        if number == int(os.environ.get("KILL_AT", 0)):
+            os._exit(9)
+        return {"page": number, "text": f"page {number}", "confidence": 90.0}
+""")
+
+
+def settings(tmp_path):
+    return {"checkpoint_dir": str(tmp_path / "checkpoints"), "workers": 1}
+
+
+def test_save_round_trip_leaves_no_temp_files(tmp_path):
+    checkpoint = PageCheckpoint(tmp_path / "doc")
+    for n in (1, 2):
+        checkpoint.save({"page": n, "text": f"page {n}", "confidence": None})
+    assert sorted(checkpoint.completed()) == [1, 2]
+    assert sorted(p.name for p in (tmp_path / "doc").iterdir()) == ["page_00001.json", "page_00002.json"]
+    checkpoint.clear()
+    assert checkpoint.completed() == {}
+
+
+def test_concurrent_saves_of_one_page(tmp_path):
+    checkpoint = PageCheckpoint(tmp_path / "doc")
+    errors = []
+
+    def save(n):
+        try:
+            for _ in range(50):
+                checkpoint.save({"page": 1, "text": f"writer {n}", "confidence": None})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert checkpoint.completed()[1]["text"].startswith("writer ")
+    assert [p.name for p in (tmp_path / "doc").iterdir()] == ["page_00001.json"]
+
+
+def test_killed_run_resumes_from_checkpointed_pages(tmp_path, monkeypatch):
+    pdf = tmp_path / "long.pdf"
+    pdf.write_bytes(b"%PDF-1.4 long document")
+    script = FAKE_OCR + textwrap.dedent(f"""
+        page_ocr.count_pages = lambda path: {PAGES}
+        page_ocr.iter_pages = iter_pages
+        page_ocr.ocr_page = ocr_page
+        page_ocr.ocr_pdf_pages({str(pdf)!r}, {settings(tmp_path)!r})
+    """)
+    env = dict(os.environ, PYTHONPATH=str(APP_DIR), KILL_AT="4")
+    killed = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env)
+    assert killed.returncode == 9
+
+    (directory,) = (tmp_path / "checkpoints").iterdir()
+    assert sorted(PageCheckpoint(directory).completed()) == [1, 2, 3]
+    for path in directory.iterdir():
+        json.loads(path.read_text())
+
+    ocred = []
+    namespace = {}
+    exec(FAKE_OCR, namespace)
+    monkeypatch.setattr(page_ocr, "count_pages", lambda path: PAGES)
+    monkeypatch.setattr(page_ocr, "iter_pages", namespace["iter_pages"])
+    monkeypatch.setattr(page_ocr, "ocr_page",
+                        lambda number, img, s: ocred.append(number) or namespace["ocr_page"](number, img, s))
+    pages = page_ocr.ocr_pdf_pages(str(pdf), settings(tmp_path))
+    assert ocred == [4, 5]
+    assert [p["text"] for p in pages] == [f"page {n}" for n in range(1, PAGES + 1)]
+    assert page_ocr.page_checkpoints(pages) == [str(directory)]
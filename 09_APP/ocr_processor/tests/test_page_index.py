@@ -0,0 +1,63 @@
+import pytest
+
+from page_index import PageIndex, write_paged_text, write_index, index_path_for
+
+
+PAGES = ["Page one\nof the motion", "", "Página tres — ünïcode", "last page"]
+
+
+def test_round_trip(tmp_path):
+    text_path = tmp_path / "motion_extracted.txt"
+    offsets = write_paged_text(text_path, PAGES)
+
+    assert index_path_for(text_path) == tmp_path / "motion_extracted_pages.idx"
+    assert text_path.read_text(encoding="utf-8") == "".join(page + "\n" for page in PAGES)
+    assert offsets[0] == 0 and offsets[-1] == text_path.stat().st_size
+    with PageIndex(text_path) as index:
+        assert len(index) == len(PAGES)
+        for number, page in enumerate(PAGES, 1):
+            assert index.page(number) == page + "\n"
+        assert index.page_bytes(3) == (PAGES[2] + "\n").encode("utf-8")
+
+
+def test_separator_and_explicit_index_path(tmp_path):
+    text_path = tmp_path / "doc.txt"
+    index_path = tmp_path / "elsewhere.idx"
+    write_paged_text(text_path, ["one", "two"], separator="\f", index_path=index_path)
+
+    assert not index_path_for(text_path).exists()
+    with PageIndex(text_path, index_path) as index:
+        assert [index.page(1), index.page(2)] == ["one\f", "two\f"]
+
+
+def test_empty_document(tmp_path):
+    text_path = tmp_path / "empty.txt"
+    write_paged_text(text_path, [""], separator="")
+    with PageIndex(text_path) as index:
+        assert len(index) == 1
+        assert index.page(1) == ""
+
+
+def test_page_out_of_range(tmp_path):
+    text_path = tmp_path / "doc.txt"
+    write_paged_text(text_path, ["only page"])
+    with PageIndex(text_path) as index:
+        for number in (0, 2):
+            with pytest.raises(IndexError):
+                index.page(number)
+
+
+def test_rejects_other_files(tmp_path):
+    text_path = tmp_path / "doc.txt"
+    text_path.write_text("text")
+    index_path_for(text_path).write_bytes(b"NOPE" + bytes(16))
+    with pytest.raises(ValueError):
+        PageIndex(text_path)
+
+
+def test_write_index_offsets(tmp_path):
+    text_path = tmp_path / "doc.txt"
+    text_path.write_bytes(b"aaabbbbc")
+    write_index(index_path_for(text_path), [0, 3, 7, 8])
+    with PageIndex(text_path) as index:
+        assert [index.page(n) for n in (1, 2, 3)] == ["aaa", "bbbb", "c"]
@@ -0,0 +1,347 @@
+import threading
+
+import pytest
+
+import page_ocr
+
+PAGES = 23
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """A PAGES-page document: iter_pages yields page numbers, OCR reads them back."""
+    ocred = []
+
+    def iter_pages(pdf_path, first=1, last=None, *args):
+        for number in range(first, last + 1):
+            yield number, f"image {number}"
+
+    def ocr_page(number, img, settings):
+        ocred.append(number)
+        return {"page": number, "text": f"text of {img}", "confidence": 90.0}
+
+    monkeypatch.setattr(page_ocr, "count_pages", lambda path: PAGES, raising=False)
+    monkeypatch.setattr(page_ocr, "iter_pages", iter_pages)
+    monkeypatch.setattr(page_ocr, "ocr_page", ocr_page)
+    return ocred
+
+
+def test_page_runs_are_contiguous_and_cover_every_page():
+    numbers = [1, 2, 3, 5, 6, 9] + list(range(20, 40))
+    runs = page_ocr.page_runs(numbers, workers=2)
+    assert [n for first, last in runs for n in range(first, last + 1)] == numbers
+    # 26 pages over 2 workers * CHUNKS_PER_WORKER ranges
+    assert max(last - first + 1 for first, last in runs) <= 4
+    assert page_ocr.page_runs([], workers=4) == []
+    assert page_ocr.page_runs([7], workers=4) == [(7, 7)]
+
+
+def test_one_range_per_page_at_most():
+    runs = page_ocr.page_runs(list(range(1, 4)), workers=8)
+    assert runs == [(1, 1), (2, 2), (3, 3)]
+
+
+def test_parallel_pages_match_sequential(tmp_path, fake_ocr, thread_pool):
+    pdf = str(tmp_path / "scan.pdf")
+    sequential = page_ocr.ocr_pdf_pages(pdf, {"workers": 1, "checkpoint_dir": ""})
+    assert not thread_pool
+    parallel = page_ocr.ocr_pdf_pages(pdf, {"workers": 3, "checkpoint_dir": ""})
+    assert list(thread_pool) == [3]
+    assert parallel == sequential
+    assert [p["page"] for p in parallel] == list(range(1, PAGES + 1))
+    assert sorted(fake_ocr) == sorted(list(range(1, PAGES + 1)) * 2)
+
+
+def test_requested_pages_only(tmp_path, fake_ocr, thread_pool):
+    wanted = [2, 3, 4, 10, 17, 18]
+    pages = page_ocr.ocr_pdf_pages(str(tmp_path / "scan.pdf"), {"workers": 2, "checkpoint_dir": ""},
+                                   page_numbers=wanted)
+    assert [p["page"] for p in pages] == wanted
+    assert sorted(fake_ocr) == wanted
+
+
+class FakeImage:
+    def __init__(self, number, log):
+        self.number, self.log = number, log
+
+    def close(self):
+        self.log.append(("close", self.number))
+
+
+@pytest.fixture
+def fake_render(monkeypatch):
+    """convert_from_path() for a PAGES-page PDF that logs renders and closes."""
+    log = []
+
+    def convert_from_path(pdf_path, dpi, first_page, last_page):
+        log.append(("render", first_page, last_page))
+        return [FakeImage(n, log) for n in range(first_page, last_page + 1)]
+
+    monkeypatch.setattr(page_ocr, "convert_from_path", convert_from_path, raising=False)
+    monkeypatch.setattr(page_ocr, "count_pages", lambda path: PAGES, raising=False)
+    return log
+
+
+def test_iter_pages_renders_one_window_at_a_time(fake_render):
+    seen = []
+    for number, img in page_ocr.iter_pages("scan.pdf", 3, 12, window=4):
+        assert img.number == number
+        # Every earlier page is closed before the next one is handed out
+        assert ("close", number - 1) in fake_render or number == 3
+        seen.append(number)
+    assert seen == list(range(3, 13))
+    assert [e for e in fake_render if e[0] == "render"] == [("render", 3, 6), ("render", 7, 10),
+                                                             ("render", 11, 12)]
+    assert [e for e in fake_render if e[0] == "close"] == [("close", n) for n in range(3, 13)]
+    # Page 7 is not rendered until page 6 is done with
+    assert fake_render.index(("render", 7, 10)) == fake_render.index(("close", 6)) + 1
+
+
+def test_iter_pages_defaults_to_the_whole_document(fake_render):
+    assert [n for n, img in page_ocr.iter_pages("scan.pdf")] == list(range(1, PAGES + 1))
+    assert max(last - first + 1 for _, first, last in
+               (e for e in fake_render if e[0] == "render")) == page_ocr.DEFAULT_WINDOW
+
+
+def test_iter_pages_closes_the_current_page_when_abandoned(fake_render):
+    pages = page_ocr.iter_pages("scan.pdf", 1, 8, window=4)
+    next(pages)
+    next(pages)
+    pages.close()
+    assert ("close", 2) in fake_render
+    assert ("render", 5, 8) not in fake_render
+
+
+NATIVE = ["A full page of native text from the PDF text layer.", "", "  tiny  ",
+          "Another page with a perfectly good text layer on it.", ""]
+
+
+@pytest.fixture
+def hybrid(monkeypatch):
+    """A PDF whose pages 2, 3 and 5 have no usable text layer; page 5 is blank."""
+    requested = []
+
+    def ocr_pdf_pages(pdf_path, settings=None, page_numbers=None):
+        requested.append(page_numbers)
+        return [{"page": n, "text": "" if n == 5 else f"ocr {n}", "confidence": None if n == 5 else 80.0,
+                 **({"blank": True} if n == 5 else {})} for n in page_numbers]
+
+    monkeypatch.setattr(page_ocr, "HAS_OCR", True)
+    monkeypatch.setattr(page_ocr, "extract_native_pages", lambda path: list(NATIVE))
+    monkeypatch.setattr(page_ocr, "ocr_pdf_pages", ocr_pdf_pages)
+    return requested
+
+
+def test_only_pages_without_a_text_layer_are_ocrd(hybrid):
+    pages = page_ocr.extract_pdf_pages("mixed.pdf", {"checkpoint_dir": ""})
+    assert hybrid == [[2, 3, 5]]
+    assert [p["method"] for p in pages] == ["native", "ocr", "ocr", "native", "blank"]
+    assert pages[0]["text"] == NATIVE[0] and "confidence" not in pages[0]
+    assert pages[1] == {"page": 2, "method": "ocr", "text": "ocr 2", "confidence": 80.0}
+    assert page_ocr.document_method(pages) == "hybrid"
+    assert page_ocr.join_pages(pages) == NATIVE[0] + "\nocr 2\nocr 3\n" + NATIVE[3] + "\n\n"
+    assert [s.get("confidence", "-") for s in page_ocr.page_summary(pages)] == ["-", 80.0, 80.0, "-", None]
+
+
+def test_min_page_chars_decides_which_pages_are_ocrd(hybrid):
+    page_ocr.extract_pdf_pages("mixed.pdf", {"checkpoint_dir": "", "min_page_chars": 4})
+    assert hybrid == [[2, 5]]
+    assert page_ocr.has_text_layer(" a b c d ", 4)
+    assert not page_ocr.has_text_layer(" a b c ", 4)
+
+
+def test_pdf_without_text_layer_is_ocrd_whole(hybrid, monkeypatch):
+    monkeypatch.setattr(page_ocr, "extract_native_pages", lambda path: [])
+    monkeypatch.setattr(page_ocr, "count_pages", lambda path: 3, raising=False)
+    pages = page_ocr.extract_pdf_pages("scan.pdf", {"checkpoint_dir": ""})
+    assert hybrid == [[1, 2, 3]]
+    assert page_ocr.document_method(pages) == "ocr"
+
+
+def test_failed_ocr_keeps_the_native_pages(hybrid, monkeypatch):
+    def broken(pdf_path, settings=None, page_numbers=None):
+        raise RuntimeError("poppler crashed")
+
+    monkeypatch.setattr(page_ocr, "ocr_pdf_pages", broken)
+    pages = page_ocr.extract_pdf_pages("mixed.pdf", {"checkpoint_dir": ""})
+    assert [p["method"] for p in pages] == ["native", "none", "native", "native", "none"]
+    assert page_ocr.document_method(pages) == "native"
+
+
+def tsv_row(level, par, line, word, conf, text):
+    return f"{level}\t1\t1\t{par}\t{line}\t{word}\t0\t0\t10\t10\t{conf}\t{text}"
+
+
+TSV = "\n".join([page_ocr.TSV_HEADER.rstrip("\n"),
+                 tsv_row(4, 1, 1, 0, -1, ""),
+                 tsv_row(5, 1, 1, 1, 90, "Motion"),
+                 tsv_row(5, 1, 1, 2, 70.5, "to"),
+                 tsv_row(5, 1, 2, 1, -1, " "),
+                 tsv_row(5, 1, 2, 1, 80, "Modify")])
+
+
+class FakeTessAPI:
+    created = []
+
+    def __init__(self, lang):
+        self.lang, self.ended, self.image = lang, False, None
+        FakeTessAPI.created.append(self)
+
+    def SetImage(self, img):
+        self.image = img
+
+    def GetUTF8Text(self):
+        return f"text of {self.image}"
+
+    def AllWordConfidences(self):
+        return [90, -1, 70]
+
+    def GetTSVText(self, page):
+        return "5\tword rows"
+
+    def End(self):
+        self.ended = True
+
+
+@pytest.fixture
+def fake_tesserocr(monkeypatch):
+    """A fake tesserocr module and a fresh per-thread API cache."""
+    FakeTessAPI.created = []
+    module = type("tesserocr", (), {"PyTessBaseAPI": FakeTessAPI})
+    monkeypatch.setattr(page_ocr, "tesserocr", module, raising=False)
+    monkeypatch.setattr(page_ocr, "HAS_TESSEROCR", True)
+    monkeypatch.setattr(page_ocr, "_tess", threading.local())
+    return FakeTessAPI.created
+
+
+def test_mean_confidence_skips_layout_rows_and_missing_words():
+    assert page_ocr.mean_confidence(TSV) == 80.17
+    assert page_ocr.mean_confidence(page_ocr.TSV_HEADER) is None
+
+
+def test_tesserocr_api_loads_the_model_once_per_thread_and_language(fake_tesserocr):
+    api = page_ocr.tesserocr_api("eng")
+    assert page_ocr.tesserocr_api("eng") is api
+    other = []
+    thread = threading.Thread(target=lambda: other.append(page_ocr.tesserocr_api("eng")))
+    thread.start()
+    thread.join()
+    assert other[0] is not api
+    german = page_ocr.tesserocr_api("deu")
+    assert api.ended and not german.ended and german.lang == "deu"
+    assert len(fake_tesserocr) == 3
+
+
+def test_tesserocr_engine_ocr_image(fake_tesserocr):
+    settings = page_ocr.resolve_settings({"engine": "tesserocr", "checkpoint_dir": ""})
+    assert page_ocr.ocr_image("page 1", settings) == {"text": "text of page 1", "confidence": 80.0}
+    assert page_ocr.ocr_image("page 2", dict(settings, word_boxes=True))["tsv"] == \
+        page_ocr.TSV_HEADER + "5\tword rows"
+    assert len(fake_tesserocr) == 1
+
+
+def test_tesserocr_engine_falls_back_to_the_cli(monkeypatch):
+    monkeypatch.setattr(page_ocr, "HAS_TESSEROCR", False)
+    assert page_ocr.resolve_settings({"engine": "tesserocr"})["engine"] == "tesseract"
+    with pytest.raises(ValueError):
+        page_ocr.resolve_settings({"engine": "easyocr"})
+
+
+def test_worker_pool_is_reused_across_documents(monkeypatch):
+    monkeypatch.setattr(page_ocr, "_pools", {})
+    monkeypatch.setattr(page_ocr, "ensure_tracker", lambda: None, raising=False)
+    pool = page_ocr.get_pool(2)
+    try:
+        assert page_ocr.get_pool(2) is pool
+        assert page_ocr.get_pool(3) is not pool
+        page_ocr.discard_pool(2, pool)
+        assert page_ocr.get_pool(2) is not pool
+    finally:
+        page_ocr.shutdown_pools()
+        pool.shutdown()
+
+
+@pytest.fixture
+def fake_page_ocr(monkeypatch):
+    """ocr_page() with blank detection flagging "blank" images and a logging OCR call."""
+    ocred = []
+    monkeypatch.setattr(page_ocr, "is_blank_page", lambda img: img == "blank", raising=False)
+    monkeypatch.setattr(page_ocr, "ocr_image",
+                        lambda img, settings: ocred.append(img) or {"text": img, "confidence": 90.0})
+    return ocred
+
+
+def test_blank_pages_skip_ocr(fake_page_ocr):
+    settings = page_ocr.resolve_settings({"checkpoint_dir": ""})
+    assert page_ocr.ocr_page(4, "blank", settings) == \
+        {"page": 4, "text": "", "confidence": None, "blank": True}
+    assert page_ocr.ocr_page(5, "words", settings) == {"page": 5, "text": "words", "confidence": 90.0, "dpi": 200}
+    assert fake_page_ocr == ["words"]
+
+
+def test_keep_blank_ocrs_every_page(fake_page_ocr):
+    settings = page_ocr.resolve_settings({"checkpoint_dir": "", "skip_blank": False})
+    assert page_ocr.ocr_page(4, "blank", settings)["text"] == "blank"
+    assert fake_page_ocr == ["blank"]
+    assert page_ocr.output_key(settings) != page_ocr.output_key(dict(settings, skip_blank=True))
+
+
+def test_output_format_is_part_of_the_keys(monkeypatch):
+    settings = page_ocr.resolve_settings({"checkpoint_dir": ""})
+    keys = (page_ocr.output_key(settings), page_ocr.settings_key("ab" * 32, settings))
+    monkeypatch.setattr(page_ocr, "OUTPUT_FORMAT", page_ocr.OUTPUT_FORMAT - 1)
+    assert page_ocr.output_key(settings) != keys[0]
+    assert page_ocr.settings_key("ab" * 32, settings) != keys[1]
+
+
+class FakeTiff:
+    """A multi-frame image: seek() selects the frame copy() returns."""
+    mode = "L"
+    info = {}
+
+    def __init__(self, frames, log):
+        self.n_frames, self.log, self.current = frames, log, 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.log.append("closed file")
+
+    def seek(self, index):
+        self.current = index
+
+    def copy(self):
+        return FakeImage(self.current + 1, self.log)
+
+
+@pytest.fixture
+def fake_tiff(monkeypatch):
+    log = []
+    image = type("Image", (), {"open": staticmethod(lambda path: FakeTiff(5, log))})
+    monkeypatch.setattr(page_ocr, "Image", image, raising=False)
+    return log
+
+
+def test_image_frames_are_decoded_one_at_a_time(fake_tiff):
+    frames = [img.number for number, img in page_ocr.iter_image_frames("scan.tif", 2, 9)]
+    assert frames == [2, 3, 4, 5]
+    assert fake_tiff == [("close", n) for n in range(2, 6)] + ["closed file"]
+    assert page_ocr.count_pages("SCAN.TIF") == 5
+
+
+def test_images_are_ocrd_not_read_as_pdfs(monkeypatch, fake_tiff):
+    requested = []
+
+    def ocr_pdf_pages(path, settings=None, page_numbers=None):
+        requested.append(path)
+        return [{"page": n, "text": f"frame {n}", "confidence": 75.0} for n in (1, 2)]
+
+    monkeypatch.setattr(page_ocr, "HAS_OCR", True)
+    monkeypatch.setattr(page_ocr, "extract_native_pages",
+                        lambda path: pytest.fail("image opened as a PDF"))
+    monkeypatch.setattr(page_ocr, "ocr_pdf_pages", ocr_pdf_pages)
+    pages = page_ocr.extract_pages("photo.JPG", {"checkpoint_dir": ""})
+    assert requested == ["photo.JPG"]
+    assert [(p["method"], p["text"]) for p in pages] == [("ocr", "frame 1"), ("ocr", "frame 2")]
+    assert page_ocr.is_image_file("a.tiff") and not page_ocr.is_image_file("a.pdf")
@@ -0,0 +1,130 @@
+import io
+import os
+import stat
+import sys
+import textwrap
+
+import pytest
+
+import pipe_render
+
+
+class FakeImage:
+    def __init__(self, mode, size, data):
+        self.mode, self.size, self.data, self.closed = mode, size, bytes(data), False
+
+    def close(self):
+        self.closed = True
+
+    def save(self, buf, format):
+        buf.write(b"P5\n%d %d\n255\n" % self.size + self.data)
+
+
+@pytest.fixture(autouse=True)
+def fake_pil(monkeypatch):
+    frombuffer = lambda mode, size, data, *args: FakeImage(mode, size, data)
+    monkeypatch.setattr(pipe_render, "Image", type("Image", (), {"frombuffer": staticmethod(frombuffer)}),
+                        raising=False)
+
+
+def test_read_pnm_pages_back_to_back():
+    stream = io.BytesIO(b"P5\n# pdftoppm\n3 2\n255\n" + bytes(range(6)) +
+                        b"P6 1 1 255\n" + b"\x01\x02\x03")
+    gray = pipe_render.read_pnm(stream)
+    assert (gray.mode, gray.size, gray.data) == ("L", (3, 2), bytes(range(6)))
+    rgb = pipe_render.read_pnm(stream)
+    assert (rgb.mode, rgb.size, rgb.data) == ("RGB", (1, 1), b"\x01\x02\x03")
+    assert pipe_render.read_pnm(stream) is None
+
+
+@pytest.mark.parametrize("data, message", [
+    (b"P4\n1 1\n\x00", "Unsupported PNM type"),
+    (b"P5\n1 1\n65535\n\x00\x00", "Unsupported PNM maxval"),
+    (b"P5\n4 4\n255\n\x00\x00", "Truncated PNM page"),
+])
+def test_read_pnm_rejects_what_it_cannot_parse(data, message):
+    with pytest.raises(ValueError, match=message):
+        pipe_render.read_pnm(io.BytesIO(data))
+
+
+def tsv(*words):
+    rows = ["level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+            "1\t1\t0\t0\t0\t0\t0\t0\t100\t100\t-1\t"]
+    for block, par, line, word, text in words:
+        rows.append(f"5\t1\t{block}\t{par}\t{line}\t{word}\t0\t0\t1\t1\t90\t{text}")
+    return "\n".join(rows) + "\n"
+
+
+def test_text_from_tsv_lays_out_lines_and_paragraphs():
+    text = pipe_render.text_from_tsv(tsv(
+        (1, 1, 1, 1, "IN"), (1, 1, 1, 2, "THE"), (1, 1, 1, 3, "COURT"),
+        (1, 1, 2, 1, "of"), (1, 1, 2, 2, " "), (1, 1, 2, 3, "Appeals"),
+        (1, 2, 1, 1, "Motion"),
+        (2, 1, 1, 1, "Exhibit"), (2, 1, 1, 2, "B"),
+    ))
+    assert text == "IN THE COURT\nof Appeals\n\nMotion\n\nExhibit B\n\n\f"
+
+
+def test_text_from_tsv_of_an_empty_page():
+    assert pipe_render.text_from_tsv(tsv()) == "\f"
+
+
+def fake_tool(tmp_path, name, body):
+    """An executable `name` in tmp_path running the Python `body`."""
+    path = tmp_path / name
+    path.write_text(f"#!{sys.executable}\n" + textwrap.dedent(body))
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return path
+
+
+FAKE_PDFTOPPM = """
+    import sys
+    args = sys.argv[1:]
+    first, last = int(args[args.index("-f") + 1]), int(args[args.index("-l") + 1])
+    dpi = int(args[args.index("-r") + 1])
+    if args[-1].endswith("broken.pdf"):
+        sys.exit(3)
+    for page in range(first, last + 1):
+        sys.stdout.buffer.write(b"P5\\n2 1\\n255\\n" + bytes([page, dpi % 256]))
+        sys.stdout.buffer.flush()
+"""
+
+
+@pytest.fixture
+def pdftoppm(tmp_path, monkeypatch):
+    fake_tool(tmp_path, "pdftoppm", FAKE_PDFTOPPM)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    assert pipe_render.has_pdftoppm()
+
+
+def test_pages_stream_from_one_pdftoppm_process(pdftoppm):
+    images = []
+    for number, img in pipe_render.iter_pages_pipe("scan.pdf", 3, 6, dpi=150):
+        assert img.data == bytes([number, 150]) and not img.closed
+        images.append(img)
+    assert len(images) == 4 and all(img.closed for img in images)
+
+
+def test_abandoned_stream_stops_pdftoppm(pdftoppm):
+    pages = pipe_render.iter_pages_pipe("scan.pdf", 1, 10000)
+    number, img = next(pages)
+    pages.close()
+    assert number == 1 and img.closed
+
+
+def test_pdftoppm_failure_is_raised(pdftoppm):
+    with pytest.raises(RuntimeError, match="status 3"):
+        list(pipe_render.iter_pages_pipe("broken.pdf", 1, 2))
+
+
+def test_tesseract_reads_the_page_from_stdin(tmp_path):
+    tesseract = fake_tool(tmp_path, "tesseract", """
+        import sys
+        assert sys.argv[1:] == ["stdin", "stdout", "-l", "deu", "tsv"], sys.argv
+        page = sys.stdin.buffer.read()
+        sys.stdout.write("level\\n" + page.decode("latin-1").splitlines()[1])
+    """)
+    img = FakeImage("L", (7, 1), b"\0" * 7)
+    assert pipe_render.tesseract_tsv(img, "deu", str(tesseract)) == "level\n7 1"
+    with pytest.raises(RuntimeError, match="tesseract exited"):
+        pipe_render.tesseract_tsv(img, "eng", str(tesseract))
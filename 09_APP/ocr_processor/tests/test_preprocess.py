@@ -0,0 +1,123 @@
+import pytest
+
+import preprocess
+
+
+class FakeGray:
+    """Just enough of a grayscale PIL image: a histogram and a size."""
+    mode = "L"
+
+    def __init__(self, hist, size=(100, 100)):
+        self.hist = list(hist) + [0] * (256 - len(hist))
+        self.width, self.height = size
+
+    def histogram(self):
+        return list(self.hist)
+
+    def crop(self, box):
+        self.cropped = box
+        return self
+
+
+def bimodal(dark, light, dark_count=200, light_count=800):
+    hist = [0] * 256
+    for level in range(dark - 5, dark + 6):
+        hist[level] = dark_count
+    for level in range(light - 5, light + 6):
+        hist[level] = light_count
+    return hist
+
+
+def test_otsu_threshold_splits_ink_from_paper():
+    threshold = preprocess.otsu_threshold(FakeGray(bimodal(30, 220)))
+    assert 35 <= threshold < 215
+    assert preprocess.otsu_threshold(FakeGray(bimodal(90, 160))) in range(95, 155)
+
+
+def test_otsu_threshold_of_a_single_level_keeps_the_default():
+    hist = [0] * 256
+    hist[255] = 1000
+    assert preprocess.otsu_threshold(FakeGray(hist)) == 127
+
+
+@pytest.fixture
+def row_profile(monkeypatch):
+    """estimate_line_height() over a given row-mean profile."""
+    monkeypatch.setattr(preprocess, "binarize", lambda gray: gray)
+    rows = []
+    monkeypatch.setattr(preprocess, "row_means", lambda gray: rows)
+    return rows
+
+
+def text_rows(line_heights, gap=12):
+    rows = [255.0] * gap
+    for height in line_heights:
+        rows += [40.0] * height + [255.0] * gap
+    return rows
+
+
+def test_line_height_is_the_median_run_ignoring_rules(row_profile):
+    row_profile += text_rows([9, 10, 10, 11, 30]) + [0.0, 0.0] + [255.0] * 5
+    assert preprocess.estimate_line_height(FakeGray([])) == 10
+    row_profile[:] = [255.0] * 50 + [0.0] + [255.0] * 50
+    assert preprocess.estimate_line_height(FakeGray([])) is None
+
+
+def test_line_running_into_the_bottom_edge_counts(row_profile):
+    row_profile += [255.0] * 4 + [0.0] * 12
+    assert preprocess.estimate_line_height(FakeGray([])) == 12
+
+
+@pytest.mark.parametrize("line_px, dpi", [
+    (16, 200),                        # 100 * 32 / 16
+    (13, 250),                        # 246 rounded to a DPI_STEP
+    (4, preprocess.MAX_DPI),          # tiny text
+    (40, preprocess.MIN_DPI),         # large text
+    (None, None),                     # nothing measurable: caller falls back
+])
+def test_choose_dpi_targets_the_line_height(monkeypatch, line_px, dpi):
+    monkeypatch.setattr(preprocess, "estimate_line_height", lambda img: line_px)
+    assert preprocess.choose_dpi("probe", preprocess.PROBE_DPI) == dpi
+
+
+def test_choose_dpi_scales_with_the_probe_dpi(monkeypatch):
+    monkeypatch.setattr(preprocess, "estimate_line_height", lambda img: 32)
+    assert preprocess.choose_dpi("probe", 200) == 200
+
+
+def page(ink=0, paper=255, pixels=10000, ink_level=0):
+    hist = [0] * 256
+    hist[paper] += pixels - ink
+    hist[ink_level] += ink
+    return FakeGray(hist, size=(200, 400))
+
+
+@pytest.fixture
+def no_numpy(monkeypatch):
+    monkeypatch.setattr(preprocess, "HAS_NUMPY", False)
+
+
+def test_ink_stats_ignore_the_page_margins(no_numpy):
+    img = page(ink=100)
+    ratio, stddev = preprocess.ink_stats(img)
+    assert img.cropped == (10, 20, 190, 380)
+    assert ratio == 0.01
+    assert stddev == pytest.approx(25.37, abs=0.01)
+
+
+def test_blank_pages(no_numpy):
+    assert preprocess.is_blank_page(page())
+    # Scanner dust: a pixel in 100,000 is below BLANK_INK_RATIO
+    assert preprocess.is_blank_page(page(ink=1, pixels=100000))
+    # Bleed-through is lighter than INK_LEVEL
+    assert preprocess.is_blank_page(page(ink=5, pixels=10000, ink_level=200, paper=202))
+
+
+def test_separator_sheets_are_blank(no_numpy):
+    # Uniform mid-grey sheet: all "ink", but no variance
+    assert preprocess.is_blank_page(page(paper=90))
+
+
+def test_pages_with_text_are_not_blank(no_numpy):
+    assert not preprocess.is_blank_page(page(ink=300))
+    assert not preprocess.is_blank_page(page(ink=300, paper=235))
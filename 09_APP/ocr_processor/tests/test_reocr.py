@@ -0,0 +1,104 @@
+import pytest
+
+import reocr
+
+
+def page(number, confidence, text=None):
+    return {"page": number, "method": "ocr", "text": text or f"first pass {number}", "confidence": confidence}
+
+
+class FakeImage:
+    def __init__(self, dpi):
+        self.dpi = dpi
+
+    def copy(self):
+        return FakeImage(self.dpi)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def second_pass(monkeypatch):
+    """Re-rendering logs (page, dpi); OCR scores from a (page, dpi, preprocess) table."""
+    renders, scores = [], {}
+
+    def iter_pages(path, first, last, window, dpi, renderer):
+        renders.append((first, dpi))
+        yield first, FakeImage(dpi)
+
+    def ocr_page(number, img, settings):
+        confidence = scores.get((number, img.dpi, settings["preprocess"]))
+        return {"page": number, "text": f"page {number} at {img.dpi} {settings['preprocess']}",
+                "confidence": confidence}
+
+    monkeypatch.setattr(reocr, "iter_pages", iter_pages)
+    monkeypatch.setattr(reocr, "ocr_page", ocr_page)
+    return renders, scores
+
+
+def test_weak_pages_are_worst_first():
+    pages = [page(1, 50.0), page(2, 95.0), page(3, 20.0), dict(page(4, None), method="native"), page(5, 50.0)]
+    assert [p["page"] for p in reocr.weak_pages(pages, 60)] == [3, 1, 5]
+
+
+def test_variants_raise_the_dpi_and_toggle_preprocessing():
+    settings = {"dpi": 250, "preprocess": False}
+    assert reocr.reocr_variants("scan.pdf", settings) == [{"dpi": 375}, {"dpi": 375, "preprocess": True}]
+    assert reocr.reocr_variants("scan.pdf", dict(settings, dpi=150))[0] == {"dpi": reocr.REOCR_MIN_DPI}
+    assert reocr.reocr_variants("scan.pdf", dict(settings, dpi="auto"))[0] == {"dpi": reocr.REOCR_MIN_DPI}
+    assert reocr.reocr_variants("photo.jpg", dict(settings, preprocess=True)) == [{"preprocess": False}]
+
+
+def test_variants_escalate_from_the_dpi_auto_chose(second_pass):
+    assert reocr.reocr_variants("scan.pdf", {"dpi": "auto", "preprocess": False}, 400)[0] == {"dpi": 600}
+
+    renders, scores = second_pass
+    scores.update({(1, 600, False): 91.0})
+    pages = [dict(page(1, 50.0), dpi=400)]
+    settings = {"checkpoint_dir": "", "workers": 1, "dpi": "auto", "reocr_below": 80, "reocr_max_pages": 5}
+    reocr.reocr_weak_pages("scan.pdf", pages, settings)
+    assert renders == [(1, 600)]
+    assert pages[0]["reocr"] == {"dpi": 600, "from_confidence": 50.0}
+
+
+def test_each_dpi_is_rendered_once_and_the_best_variant_wins(second_pass):
+    renders, scores = second_pass
+    scores.update({(1, 300, False): 70.0, (1, 300, True): 82.0})
+    variants = [{"dpi": 300}, {"dpi": 300, "preprocess": True}]
+    settings = reocr.resolve_settings({"checkpoint_dir": ""})
+    best = reocr.reocr_page("scan.pdf", 1, settings, variants, threshold=90)
+    assert renders == [(1, 300)]
+    assert (best["confidence"], best["variant"]) == (82.0, {"dpi": 300, "preprocess": True})
+
+
+def test_variants_stop_once_one_reaches_the_threshold(second_pass):
+    renders, scores = second_pass
+    scores.update({(1, 300, False): 91.0, (1, 300, True): 99.0})
+    settings = reocr.resolve_settings({"checkpoint_dir": ""})
+    best = reocr.reocr_page("scan.pdf", 1, settings, [{"dpi": 300}, {"dpi": 300, "preprocess": True}], 90)
+    assert best["confidence"] == 91.0
+
+
+def test_only_the_weakest_pages_within_budget_are_retried(second_pass):
+    renders, scores = second_pass
+    scores.update({(2, 300, False): 88.0, (4, 300, False): 30.0, (4, 300, True): 35.0})
+    pages = [page(1, 96.0), page(2, 40.0), page(3, 55.0), page(4, 45.0)]
+    settings = {"checkpoint_dir": "", "workers": 1, "dpi": 200, "reocr_below": 80, "reocr_max_pages": 2}
+    result = reocr.reocr_weak_pages("scan.pdf", pages, settings)
+    assert result is pages
+    # Page 3 is weak too, but over the 2-page budget
+    assert sorted({number for number, dpi in renders}) == [2, 4]
+    assert pages[1]["text"] == "page 2 at 300 False"
+    assert pages[1]["reocr"] == {"dpi": 300, "from_confidence": 40.0}
+    # No variant beat page 4's first pass
+    assert pages[3] == page(4, 45.0) and pages[2] == page(3, 55.0)
+
+
+def test_reocr_off_or_zero_budget_leaves_pages_alone(second_pass):
+    renders, _ = second_pass
+    pages = [page(1, 10.0)]
+    reocr.reocr_weak_pages("scan.pdf", pages, {"checkpoint_dir": "", "workers": 1})
+    reocr.reocr_weak_pages("scan.pdf", pages, {"checkpoint_dir": "", "workers": 1,
+                                               "reocr_below": 80, "reocr_max_pages": 0})
+    assert renders == [] and pages == [page(1, 10.0)]
@@ -0,0 +1,94 @@
+import json
+import os
+
+from run_manifest import RunManifest, MANIFEST_NAME, STATUS_DONE, STATUS_FAILED, STATUS_IN_PROGRESS
+
+
+def finish(manifest, tmp_path, source, key="key-a"):
+    output = tmp_path / f"{source.stem}_extracted.txt"
+    output.write_text("text")
+    manifest.finish(source, [str(output)], sha256="abc", settings_key=key)
+    return output
+
+
+def test_round_trip(tmp_path, make_file):
+    path = tmp_path / MANIFEST_NAME
+    done, failed, running = (make_file(f"{n}.pdf", n.encode()) for n in ("done", "failed", "running"))
+    manifest = RunManifest(path)
+    finish(manifest, tmp_path, done)
+    manifest.fail(failed, "boom", settings_key="key-a")
+    manifest.start(running, settings_key="key-a")
+
+    reloaded = RunManifest(path)
+    assert reloaded.status(done) == STATUS_DONE
+    assert reloaded.status(failed) == STATUS_FAILED
+    assert reloaded.status(running) == STATUS_IN_PROGRESS
+    assert reloaded.counts() == {STATUS_DONE: 1, STATUS_FAILED: 1, STATUS_IN_PROGRESS: 1}
+    assert reloaded.entries[str(done.resolve())]["settings_key"] == "key-a"
+    assert reloaded.is_done(done, "key-a")
+    assert not reloaded.is_done(failed, "key-a")
+    assert not reloaded.is_done(running, "key-a")
+
+
+def test_last_record_wins_and_torn_tail_is_ignored(tmp_path, make_file):
+    path = tmp_path / MANIFEST_NAME
+    source = make_file()
+    manifest = RunManifest(path)
+    manifest.start(source, settings_key="key-a")
+    finish(manifest, tmp_path, source)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"path": "torn')
+
+    assert RunManifest(path).is_done(source, "key-a")
+
+
+def test_changed_settings_are_not_done(tmp_path, make_file):
+    # A run with other output settings (dpi, backend, ...) must not skip the file
+    path = tmp_path / MANIFEST_NAME
+    source = make_file()
+    finish(RunManifest(path), tmp_path, source, key="key-a")
+
+    manifest = RunManifest(path)
+    assert manifest.is_done(source, "key-a")
+    assert not manifest.is_done(source, "key-b")
+
+
+def test_manifest_without_settings_key_is_stale(tmp_path, make_file):
+    path = tmp_path / MANIFEST_NAME
+    source = make_file()
+    output = tmp_path / "scan_extracted.txt"
+    output.write_text("text")
+    st = source.stat()
+    record = {"path": str(source.resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+              "status": STATUS_DONE, "outputs": [str(output)]}
+    path.write_text(json.dumps(record) + "\n")
+
+    assert not RunManifest(path).is_done(source, "key-a")
+
+
+def test_changed_input_or_missing_output_is_not_done(tmp_path, make_file):
+    path = tmp_path / MANIFEST_NAME
+    edited, cleaned = make_file("edited.pdf"), make_file("cleaned.pdf")
+    manifest = RunManifest(path)
+    finish(manifest, tmp_path, edited)
+    output = finish(manifest, tmp_path, cleaned)
+
+    edited.write_bytes(b"%PDF-1.4 edited, longer")
+    output.unlink()
+    assert not manifest.is_done(edited, "key-a")
+    assert not manifest.is_done(cleaned, "key-a")
+
+
+def test_compacts_on_load(tmp_path, monkeypatch, make_file):
+    monkeypatch.setattr("run_manifest.COMPACT_RATIO", 2)
+    path = tmp_path / MANIFEST_NAME
+    source = make_file()
+    manifest = RunManifest(path)
+    for _ in range(3):
+        manifest.start(source, settings_key="key-a")
+    finish(manifest, tmp_path, source)
+
+    reloaded = RunManifest(path)
+    assert len(path.read_text().splitlines()) == 1
+    assert reloaded.is_done(source, "key-a")
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
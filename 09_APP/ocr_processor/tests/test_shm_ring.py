@@ -0,0 +1,89 @@
+import queue
+
+import pytest
+
+import page_ocr
+import shm_ring
+from shm_ring import PageRing
+
+
+class FakePage:
+    """A rendered page: raw grayscale bytes plus mode and size."""
+    mode = "L"
+
+    def __init__(self, data):
+        self.data = bytes(data)
+        self.size = (len(self.data), 1)
+        self.closed = False
+
+    def tobytes(self):
+        return self.data
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_pil(monkeypatch):
+    # Copies the pixels, as a worker's OCR would read them before the slot is reused
+    image = lambda mode, size, data, *args: FakePage(bytes(data))
+    monkeypatch.setattr(shm_ring, "Image", type("Image", (), {"frombuffer": staticmethod(image),
+                                                              "frombytes": staticmethod(image)}),
+                        raising=False)
+
+
+def test_pages_round_trip_through_slots_by_name():
+    ring = PageRing.for_page(3, FakePage(b"a" * 100))
+    assert ring.slot_bytes == 125
+    try:
+        worker = PageRing(ring.slots, ring.slot_bytes, name=ring.name)
+        descs = [ring.put(slot, slot + 1, FakePage(bytes([slot]) * (100 + slot))) for slot in range(3)]
+        assert [d["slot"] for d in descs] == [0, 1, 2]
+        assert all("data" not in d for d in descs)
+        for slot, desc in enumerate(descs):
+            with worker.image(desc) as img:
+                assert img.data == bytes([slot]) * (100 + slot)
+            assert img.closed
+        worker.close()
+    finally:
+        ring.close()
+
+
+def test_oversized_page_travels_in_the_descriptor():
+    ring = PageRing(2, 10)
+    try:
+        desc = ring.put(1, 7, FakePage(b"x" * 11))
+        assert desc["slot"] is None and desc["data"] == b"x" * 11
+        with ring.image(desc) as img:
+            assert img.data == b"x" * 11
+    finally:
+        ring.close()
+
+
+def test_owner_close_removes_the_block():
+    ring = PageRing(1, 16)
+    name = ring.name
+    ring.close()
+    with pytest.raises(FileNotFoundError):
+        PageRing(1, 16, name=name)
+
+
+def test_ocr_pages_shm_reads_every_page_through_the_ring(monkeypatch, thread_pool):
+    sizes = {n: 40 for n in range(1, 10)}
+    sizes[6] = 90  # past SLOT_HEADROOM: sent inline
+
+    def iter_pages(pdf_path, first, last, *args):
+        for number in range(first, last + 1):
+            yield number, FakePage(bytes([number]) * sizes[number])
+
+    def ocr_page(number, img, settings):
+        return {"page": number, "text": f"{img.data[0]}x{len(img.data)}", "confidence": None}
+
+    monkeypatch.setattr(page_ocr, "iter_pages", iter_pages)
+    monkeypatch.setattr(page_ocr, "ocr_page", ocr_page)
+    monkeypatch.setattr(page_ocr, "get_manager", lambda: type("Manager", (), {"Queue": queue.Queue}))
+    monkeypatch.setattr(page_ocr, "PageRing", PageRing, raising=False)
+    settings = page_ocr.resolve_settings({"checkpoint_dir": "", "shm_slots": 2, "metrics": False})
+    records = page_ocr.ocr_pages_shm("scan.pdf", [1, 2, 3, 5, 6, 7, 8, 9], settings, None, 3)
+    assert sorted((r["page"], r["text"]) for r in records) == \
+        [(n, f"{n}x{sizes[n]}") for n in (1, 2, 3, 5, 6, 7, 8, 9)]
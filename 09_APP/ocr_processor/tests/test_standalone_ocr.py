@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pytest
+
+import backends
+import standalone_ocr
+from corpus_store import CorpusStore
+from extraction_cache import ExtractionCache
+
+SETTINGS = {"checkpoint_dir": ""}
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    """Fake backend run; any attempt to classify (open) a document fails the test."""
+    calls = []
+
+    def run_backend(path, settings=None):
+        calls.append(path)
+        return "pypdf2", [{"page": 1, "method": "native", "text": "page one text"}]
+
+    def classify_document(path, settings=None):
+        raise AssertionError(f"{path} was opened to classify it")
+
+    calibration = {"classes": {"text_pdf": {"backend": "pypdf2"}}}
+    monkeypatch.setattr(standalone_ocr, "run_backend", run_backend)
+    monkeypatch.setattr(backends, "classify_document", classify_document)
+    monkeypatch.setattr(backends, "load_calibration", lambda path=None: calibration)
+    return calls, calibration
+
+
+def test_cache_hit_does_not_resolve_backend(tmp_path, extractor, make_file):
+    calls, _ = extractor
+    pdf = make_file(folder=tmp_path / "in")
+    cache = ExtractionCache(tmp_path / "cache")
+
+    first = standalone_ocr.process_file(str(pdf), str(tmp_path / "out"), SETTINGS, cache)
+    second = standalone_ocr.process_file(str(pdf), str(tmp_path / "out"), SETTINGS, cache)
+    assert first["status"] == second["status"] == "success"
+    assert first["metadata"]["backend"] == "pypdf2"
+    assert second.get("cached") is True
+    assert len(calls) == 1
+
+
+def test_recalibration_misses_cache(tmp_path, extractor, make_file):
+    calls, calibration = extractor
+    pdf = make_file(folder=tmp_path / "in")
+    cache = ExtractionCache(tmp_path / "cache")
+
+    standalone_ocr.process_file(str(pdf), str(tmp_path / "out"), SETTINGS, cache)
+    calibration["classes"]["text_pdf"]["backend"] = "pdfplumber"
+    standalone_ocr.process_file(str(pdf), str(tmp_path / "out"), SETTINGS, cache)
+    assert len(calls) == 2
+
+
+def test_store_hit_is_decided_without_reading_the_document(tmp_path, extractor, monkeypatch, make_file):
+    calls, calibration = extractor
+    pdf = make_file(folder=tmp_path / "in")
+    with CorpusStore(tmp_path / "store", writable=True) as store:
+        first = standalone_ocr.process_file_to_store(pdf, store, SETTINGS)
+
+        def read(entry):
+            raise AssertionError("the stored document was decompressed")
+
+        monkeypatch.setattr(store, "read", read)
+        second = standalone_ocr.process_file_to_store(pdf, store, SETTINGS)
+        calibration["classes"]["text_pdf"]["backend"] = "pdfplumber"
+        third = standalone_ocr.process_file_to_store(pdf, store, SETTINGS)
+    assert first["status"] == second["status"] == third["status"] == "success"
+    assert second.get("cached") is True and "cached" not in third
+    assert len(calls) == 2
+
+
+def test_finished_manifest_entry_does_not_resolve_backend(tmp_path, extractor, make_file):
+    calls, _ = extractor
+    inbox = tmp_path / "in"
+    for name in ("a.pdf", "b.pdf"):
+        make_file(name, folder=inbox)
+
+    first = standalone_ocr.process_folder(str(inbox), str(tmp_path / "out"), SETTINGS)
+    second = standalone_ocr.process_folder(str(inbox), str(tmp_path / "out"), SETTINGS)
+    assert [r["status"] for r in first] == ["success", "success"]
+    assert [r["status"] for r in second] == ["skipped", "skipped"]
+    assert len(calls) == 2
+
+
+def test_folder_mode_picks_up_pdfs_and_images(tmp_path, make_file):
+    for name in ("b.pdf", "a.PNG", "sub/c.tif", "notes.txt", "d.jpeg"):
+        make_file(name)
+    (tmp_path / "e.jpg").mkdir()
+    found = [p.relative_to(tmp_path).as_posix() for p in standalone_ocr.iter_input_files(tmp_path)]
+    assert found == ["a.PNG", "b.pdf", "d.jpeg", "sub/c.tif"]
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from core.store import Store, Stream, MANIFEST_NAME, ts_millis
+
+START = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+KINDS = ("dedupe", "text.ready", "summary")
+
+
+def record(n):
+    return {"id": f"r{n}", "ts": (START + timedelta(minutes=n)).isoformat(), "kind": KINDS[n % 3],
+            "file_relpath": f"case/{n // 10}.pdf", "title": f"record {n}"}
+
+
+@pytest.fixture
+def small_segments(monkeypatch):
+    monkeypatch.setattr("core.store.SEGMENT_MAX_BYTES", 1024)
+
+
+def fill(stream, count=60):
+    for n in range(count):
+        stream.append(record(n))
+    return [record(n) for n in range(count)]
+
+
+def test_append_and_query(tmp_path, small_segments):
+    store = Store(tmp_path)
+    stream = store.stream("timeline.jsonl")
+    records = fill(stream)
+    assert len(stream.segments()) > 2
+    assert (stream.dir / MANIFEST_NAME).exists()
+
+    assert list(stream.query()) == records
+    assert list(stream.query(file_relpath="case/2.pdf")) == [r for r in records if r["file_relpath"] == "case/2.pdf"]
+    assert list(stream.query(kind="summary")) == [r for r in records if r["kind"] == "summary"]
+    since, until = START + timedelta(minutes=15), (START + timedelta(minutes=40)).isoformat()
+    assert list(stream.query(kind="dedupe", since=since, until=until)) == \
+        [r for r in records if r["kind"] == "dedupe" and 15 <= int(r["id"][1:]) < 40]
+    assert list(stream.query(file_relpath="case/9.pdf")) == []
+    store.close()
+
+
+def test_query_skips_sealed_segments_by_summary(tmp_path, small_segments, monkeypatch):
+    stream = Stream(tmp_path, "timeline.jsonl")
+    fill(stream)
+    sealed = stream.manifest()
+    read = []
+    entries = Stream.entries
+
+    def tracking(self, seq, sealed=False):
+        read.append(seq)
+        return entries(self, seq, sealed)
+
+    monkeypatch.setattr(Stream, "entries", tracking)
+    found = list(stream.query(file_relpath="case/0.pdf"))
+    assert [r["id"] for r in found] == [f"r{n}" for n in range(10)]
+    skipped = [int(key) for key, summary in sealed.items() if "case/0.pdf" not in summary["files"]]
+    assert skipped and not set(skipped) & set(read)
+
+    read.clear()
+    since = START + timedelta(minutes=55)
+    assert [r["id"] for r in stream.query(since=since)] == [f"r{n}" for n in range(55, 60)]
+    older = [int(key) for key, summary in sealed.items() if summary["max_ts"] < ts_millis(since)]
+    assert older and not set(older) & set(read)
+    stream.close()
+
+
+def test_reopen_repairs_torn_tail_and_stale_index(tmp_path):
+    stream = Stream(tmp_path, "timeline.jsonl")
+    records = fill(stream, 5)
+    seq = stream.segments()[-1]
+    stream.close()
+    with open(stream.segment_path(seq), 'ab') as f:
+        f.write(b'{"id":"torn","ts":')
+    # Drop the last index line, as if a crash hit between the two writes
+    lines = stream.index_path(seq).read_bytes().splitlines(keepends=True)
+    stream.index_path(seq).write_bytes(b"".join(lines[:-1]))
+
+    stream = Stream(tmp_path, "timeline.jsonl")
+    assert list(stream.query()) == records
+    assert len(stream.index_path(seq).read_bytes().splitlines()) == 5
+    stream.append(record(5))
+    assert list(stream.query(kind=KINDS[2])) == [record(2), record(5)]
+    stream.close()
+
+
+def test_buffered_appends_are_flushed(tmp_path):
+    store = Store(tmp_path)
+    stream = store.stream("timeline")
+    stream.append_many([record(n) for n in range(3)], sync=False)
+    stream.append(record(3), sync=False)
+    # Queries flush first
+    assert len(list(stream.query())) == 4
+    stream.append(record(4), sync=False)
+    store.close()
+
+    reopened = Store(tmp_path)
+    assert reopened.names() == ["timeline.jsonl"]
+    assert [r["id"] for r in reopened.stream("timeline.jsonl").query()] == [f"r{n}" for n in range(5)]
+    reopened.close()
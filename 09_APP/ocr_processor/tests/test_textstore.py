@@ -0,0 +1,95 @@
+from core.textstore import TextStore
+from word_boxes import WordBoxes
+
+from tests.test_word_boxes import PAGE_1
+
+PAGES = ["Page one of the complaint", "Página dos"]
+
+
+def test_put_and_lookup(tmp_path):
+    store = TextStore(tmp_path)
+    ref = store.put("2026/complaint.pdf", PAGES)
+
+    assert store.lookup("2026/complaint.pdf") == ref
+    assert ref["pages"] == 2 and not ref["word_boxes"]
+    assert ref["bytes"] == len("".join(page + "\n" for page in PAGES).encode("utf-8"))
+    assert store.read_text("2026/complaint.pdf") == "Page one of the complaint\nPágina dos\n"
+    with store.pages("2026/complaint.pdf") as index:
+        assert index.page(2) == "Página dos\n"
+    assert store.lookup("2026/other.pdf") is None
+    assert store.read_text("2026/other.pdf") is None
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_identical_text_is_stored_once(tmp_path):
+    store = TextStore(tmp_path)
+    # Same name in different folders, and different names, with the same text
+    first = store.put("a/motion.pdf", PAGES)
+    second = store.put("b/motion.pdf", PAGES)
+    third = store.put("copy of motion.pdf", PAGES)
+    other = store.put("c/motion.pdf", ["different text"])
+
+    assert first["blob"] == second["blob"] == third["blob"] != other["blob"]
+    assert len(list(store.blobs())) == 2
+    assert sum(1 for _ in store.refs()) == 4
+    assert store.read_text("c/motion.pdf") == "different text\n"
+
+
+def test_repointing_a_path(tmp_path):
+    store = TextStore(tmp_path)
+    old = store.put("inbox/scan.pdf", ["first OCR"])
+    new = store.put("inbox/scan.pdf", ["better OCR"])
+
+    assert old["blob"] != new["blob"]
+    assert store.read_text("inbox/scan.pdf") == "better OCR\n"
+    assert sum(1 for _ in store.refs()) == 1
+
+
+def test_gc_keeps_referenced_blobs(tmp_path):
+    store = TextStore(tmp_path)
+    shared = store.put("a.pdf", PAGES)
+    store.put("b.pdf", PAGES)
+    store.put("c.pdf", ["only c"])
+    store.put("d.pdf", ["old d"])
+    store.put("d.pdf", ["new d"])
+
+    assert store.remove("c.pdf")
+    assert not store.remove("c.pdf")
+    assert store.remove("a.pdf")
+    assert store.gc() == 2
+    assert shared["blob"] in store.blobs()
+    assert store.read_text("b.pdf") == "".join(page + "\n" for page in PAGES)
+    assert store.read_text("d.pdf") == "new d\n"
+    assert store.gc() == 0
+
+
+def test_word_boxes_kept_per_layout(tmp_path):
+    store = TextStore(tmp_path)
+    page = [{"page": 1, "tsv": PAGE_1, "dpi": 300}]
+    moved = [{"page": 1, "tsv": PAGE_1.replace("\t100\t", "\t700\t"), "dpi": 300}]
+    ref = store.put("scan.pdf", ["MOTION to Dismiss"], word_box_pages=page)
+    same = store.put("rescan.pdf", ["MOTION to Dismiss"], word_box_pages=page)
+    other = store.put("other layout.pdf", ["MOTION to Dismiss"], word_box_pages=moved)
+    image = store.put("photo.jpg", ["MOTION to Dismiss"], word_box_pages=page, image=True)
+    plain = store.put("copy.pdf", ["MOTION to Dismiss"])
+
+    assert ref["blob"] == same["blob"] == other["blob"] == image["blob"] == plain["blob"]
+    assert ref["word_boxes"] and ref["boxes"] == same["boxes"]
+    assert len({ref["boxes"], other["boxes"], image["boxes"]}) == 3
+    # A copy of the text without boxes does not borrow another document's
+    assert not plain["word_boxes"] and store.words_path("copy.pdf") is None
+
+    with WordBoxes(store.words_path("scan.pdf")) as boxes:
+        assert [w["text"] for w in boxes.words(1)] == ["MOTION", "to", "Dismiss"]
+        assert boxes.words(1)[0]["left"] == 100
+    with WordBoxes(store.words_path("other layout.pdf")) as boxes:
+        assert boxes.words(1)[0]["left"] == 700
+    assert store.words_path("missing.pdf") is None
+
+    for relpath in ("scan.pdf", "rescan.pdf", "other layout.pdf", "photo.jpg"):
+        assert store.remove(relpath)
+    assert store.gc() == 0
+    assert not list(tmp_path.rglob("*.wbx"))
+    assert store.remove("copy.pdf")
+    assert store.gc() == 1
+    assert not list(tmp_path.rglob("*.idx")) and not list(tmp_path.rglob("*.tmp"))
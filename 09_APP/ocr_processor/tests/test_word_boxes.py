@@ -0,0 +1,85 @@
+import pytest
+
+import word_boxes
+from word_boxes import WordBoxes, write_word_boxes, words_path_for, parse_tsv
+
+HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext\n"
+
+
+def tsv(width, height, words):
+    """Tesseract-style TSV: (block, par, line, left, top, w, h, conf, text) per word."""
+    rows = [f"1\t1\t0\t0\t0\t0\t0\t0\t{width}\t{height}\t-1\t"]
+    for n, (block, par, line, left, top, w, h, conf, text) in enumerate(words, 1):
+        rows.append(f"4\t1\t{block}\t{par}\t{line}\t0\t{left}\t{top}\t{w}\t{h}\t-1\t")
+        rows.append(f"5\t1\t{block}\t{par}\t{line}\t{n}\t{left}\t{top}\t{w}\t{h}\t{conf}\t{text}")
+    return HEADER + "\n".join(rows) + "\n"
+
+
+PAGE_1 = tsv(2550, 3300, [
+    (1, 1, 1, 100, 200, 80, 30, 96.5, "MOTION"),
+    (1, 1, 1, 190, 200, 40, 30, 91.0, "to"),
+    (1, 1, 2, 100, 250, 90, 30, 42.0, "Dismiss"),
+])
+PAGE_3 = tsv(1700, 2200, [(1, 1, 1, 10, 20, 30, 40, 88.0, "to")])
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "memoryview"])
+def numpy_or_not(request, monkeypatch):
+    if request.param and not word_boxes.HAS_NUMPY:
+        pytest.skip("NumPy not installed")
+    monkeypatch.setattr(word_boxes, "HAS_NUMPY", request.param)
+
+
+def test_parse_tsv():
+    size, words = parse_tsv(PAGE_1)
+    assert size == (2550, 3300)
+    assert [(w[6], w[5]) for w in words] == [("MOTION", 0), ("to", 0), ("Dismiss", 1)]
+
+
+def test_round_trip(tmp_path, numpy_or_not):
+    path = words_path_for(tmp_path / "motion_extracted.txt")
+    pages = [{"page": 1, "tsv": PAGE_1, "dpi": 300},
+             {"page": 2, "text": "native page, no boxes"},
+             {"page": 3, "tsv": PAGE_3, "dpi": 200}]
+    assert write_word_boxes(path, pages) == 4
+    assert path.name == "motion_extracted_words.wbx"
+
+    with WordBoxes(path) as boxes:
+        assert boxes.pages == [1, 3]
+        assert boxes.word_count == 4
+        words = boxes.words(1)
+        assert [w["text"] for w in words] == ["MOTION", "to", "Dismiss"]
+        assert words[2] == {"text": "Dismiss", "left": 100, "top": 250, "width": 90, "height": 30,
+                            "conf": 42.0, "line": 1}
+        page = boxes.page(3)
+        assert (page["dpi"], page["page_width"], page["page_height"]) == (200, 1700, 2200)
+        assert boxes.words(3)[0]["text"] == "to"
+        with pytest.raises(KeyError):
+            boxes.page(2)
+        stats = {s["page"]: s for s in boxes.confidence_stats(low=60)}
+        assert stats[1]["words"] == 3
+        assert stats[1]["min"] == 42.0
+        assert stats[1]["low_fraction"] == round(1 / 3, 4)
+        assert stats[3]["mean"] == 88.0
+
+
+def test_image_pages_store_no_dpi(tmp_path):
+    path = tmp_path / "photo_extracted_words.wbx"
+    write_word_boxes(path, [{"page": 1, "tsv": PAGE_3, "dpi": 300}], image=True)
+    with WordBoxes(path) as boxes:
+        assert boxes.page(1)["dpi"] == 0
+
+
+def test_no_boxes(tmp_path):
+    path = tmp_path / "native_extracted_words.wbx"
+    assert write_word_boxes(path, [{"page": 1, "text": "native"}]) == 0
+    with WordBoxes(path) as boxes:
+        assert boxes.pages == []
+        assert boxes.confidence_stats() == []
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "bogus.wbx"
+    path.write_bytes(b"NOPE" + bytes(64))
+    with pytest.raises(ValueError):
+        WordBoxes(path)
@@ -0,0 +1,265 @@
+"""
+Word-box store for OCR'd pages
+Keeps tesseract's word boxes and confidences (the TSV / image_to_data
+output) per document as typed columns plus a string table, in one file
+that readers memory-map: a page's boxes are slices of those columns, with
+no JSON to parse and no Python object per word until one is asked for
+"""
+
+import sys
+import mmap
+import struct
+import logging
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+WORDS_SUFFIX = "_words.wbx"
+
+# Header: magic, version, page count, word count, string count, string bytes.
+# Then the columns below in order (all little-endian), each padded to 8 bytes,
+# then the UTF-8 string blob.
+MAGIC = b"WBOX"
+VERSION = 1
+HEADER = struct.Struct("<4sHIIII")
+ALIGN = 8
+
+# One entry per page with boxes. dpi is the render DPI the coordinates are
+# in (0 for image files, whose boxes are in the image's own pixels).
+PAGE_COLUMNS = (("page", "I"), ("dpi", "I"), ("page_width", "I"), ("page_height", "I"))
+# page_count + 1 word offsets: page i's words are [offsets[i], offsets[i + 1])
+OFFSET_COLUMN = ("offsets", "Q")
+# One entry per word. line numbers a page's lines from 0 (block/paragraph/
+# line changes in reading order); text indexes the string table.
+WORD_COLUMNS = (("left", "i"), ("top", "i"), ("width", "i"), ("height", "i"),
+                ("conf", "f"), ("line", "I"), ("text", "I"))
+# string_count + 1 byte offsets into the blob
+STRING_COLUMN = ("strings", "I")
+
+NUMPY_TYPES = {"I": "<u4", "i": "<i4", "f": "<f4", "Q": "<u8"}
+
+# Words below this confidence count towards a page's low_fraction
+LOW_CONFIDENCE = 60.0
+
+
+def words_path_for(text_path: Path) -> Path:
+    """`foo_extracted.txt` → `foo_extracted_words.wbx` alongside it."""
+    text_path = Path(text_path)
+    return text_path.with_name(text_path.stem + WORDS_SUFFIX)
+
+
+def parse_tsv(tsv: str) -> Tuple[Tuple[int, int], List[Tuple[int, int, int, int, float, int, str]]]:
+    """((page_width, page_height), [(left, top, width, height, conf, line, text)]) from tesseract TSV."""
+    size = (0, 0)
+    words = []
+    line = -1
+    current = None
+    for row in tsv.splitlines()[1:]:
+        cols = row.split("\t")
+        if len(cols) < 11:
+            continue
+        if cols[0] == "1":
+            size = (int(cols[8]), int(cols[9]))
+            continue
+        # level 5 = word; conf -1 marks layout rows, which have no text
+        if cols[0] != "5" or len(cols) < 12 or not cols[11].strip():
+            continue
+        try:
+            conf = float(cols[10])
+        except ValueError:
+            continue
+        if conf < 0:
+            continue
+        key = (cols[2], cols[3], cols[4])
+        if key != current:
+            current = key
+            line += 1
+        words.append((int(cols[6]), int(cols[7]), int(cols[8]), int(cols[9]), conf, line, cols[11]))
+    return size, words
+
+
+def _layout(page_count: int, word_count: int, string_count: int) -> Tuple[Dict[str, Tuple[int, str, int]], int]:
+    """Byte offset, typecode and length of every column, and where the blob starts."""
+    sections = {}
+    offset = HEADER.size
+    columns = ([(name, code, page_count) for name, code in PAGE_COLUMNS]
+               + [OFFSET_COLUMN + (page_count + 1,)]
+               + [(name, code, word_count) for name, code in WORD_COLUMNS]
+               + [STRING_COLUMN + (string_count + 1,)])
+    for name, code, length in columns:
+        offset += -offset % ALIGN
+        sections[name] = (offset, code, length)
+        offset += length * array(code).itemsize
+    return sections, offset
+
+
+def write_word_boxes(path: Path, pages: Iterable[Dict[str, Any]], image: bool = False) -> int:
+    """Write the boxes of every page dict that carries "tsv"; returns the word count.
+
+    Pages without "tsv" (native text, blank) are left out. With `image`,
+    dpi is stored as 0 (coordinates are image pixels).
+    """
+    columns = {name: array(code) for name, code in PAGE_COLUMNS + (OFFSET_COLUMN,) + WORD_COLUMNS + (STRING_COLUMN,)}
+    if any(col.itemsize != {"I": 4, "i": 4, "f": 4, "Q": 8}[col.typecode] for col in columns.values()):
+        raise RuntimeError("array type sizes on this platform do not match the word-box format")
+    strings: Dict[str, int] = {}
+    blob = bytearray()
+    columns["offsets"].append(0)
+    columns["strings"].append(0)
+
+    for page in pages:
+        if not page.get("tsv"):
+            continue
+        (width, height), words = parse_tsv(page["tsv"])
+        for name, value in (("page", page["page"]), ("dpi", 0 if image else int(page.get("dpi") or 0)),
+                            ("page_width", width), ("page_height", height)):
+            columns[name].append(value)
+        for left, top, w, h, conf, line, text in words:
+            text_id = strings.get(text)
+            if text_id is None:
+                text_id = strings[text] = len(strings)
+                blob += text.encode("utf-8")
+                columns["strings"].append(len(blob))
+            for name, value in zip(("left", "top", "width", "height", "conf", "line", "text"),
+                                   (left, top, w, h, conf, line, text_id)):
+                columns[name].append(value)
+        columns["offsets"].append(len(columns["text"]))
+
+    page_count, word_count = len(columns["page"]), len(columns["text"])
+    sections, blob_offset = _layout(page_count, word_count, len(strings))
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, page_count, word_count, len(strings), len(blob)))
+        for name, (offset, _, _) in sections.items():
+            f.write(b"\0" * (offset - f.tell()))
+            col = columns[name]
+            if sys.byteorder == "big":
+                col.byteswap()
+            col.tofile(f)
+        f.write(b"\0" * (blob_offset - f.tell()))
+        f.write(blob)
+    tmp.replace(path)
+    return word_count
+
+
+class WordBoxes:
+    """Memory-mapped word boxes of one document.
+
+    Columns are NumPy arrays over the mapping when NumPy is installed,
+    else memoryviews (little-endian hosts); either way nothing is copied.
+    `page(n)` slices them, `words(n)` decodes one page into dicts, and
+    `confidence_stats()` summarises every page's confidences.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.page_count, self.word_count, string_count, blob_bytes = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"Not a word-box file: {self.path}")
+
+        sections, self._blob_offset = _layout(self.page_count, self.word_count, string_count)
+        self.columns: Dict[str, Any] = {}
+        for name, (offset, code, length) in sections.items():
+            if HAS_NUMPY:
+                self.columns[name] = np.frombuffer(self._map, dtype=NUMPY_TYPES[code], count=length, offset=offset)
+            else:
+                size = array(code).itemsize
+                self.columns[name] = memoryview(self._map)[offset:offset + length * size].cast(code)
+        self._slots = {int(page): i for i, page in enumerate(self.columns["page"])}
+
+    @property
+    def pages(self) -> List[int]:
+        """Page numbers that have boxes."""
+        return list(self._slots)
+
+    def _range(self, page_number: int) -> Tuple[int, int]:
+        slot = self._slots.get(page_number)
+        if slot is None:
+            raise KeyError(f"no word boxes for page {page_number}")
+        offsets = self.columns["offsets"]
+        return int(offsets[slot]), int(offsets[slot + 1])
+
+    def page(self, page_number: int) -> Dict[str, Any]:
+        """Word columns of one page, as views (no copy), plus its dpi and size."""
+        start, end = self._range(page_number)
+        slot = self._slots[page_number]
+        boxes = {name: self.columns[name][start:end] for name, _ in WORD_COLUMNS}
+        boxes.update({name: int(self.columns[name][slot]) for name in ("dpi", "page_width", "page_height")})
+        return boxes
+
+    def string(self, text_id: int) -> str:
+        strings = self.columns["strings"]
+        start = self._blob_offset + int(strings[text_id])
+        return self._map[start:self._blob_offset + int(strings[text_id + 1])].decode("utf-8")
+
+    def words(self, page_number: int) -> List[Dict[str, Any]]:
+        """One {"text", "left", "top", "width", "height", "conf", "line"} per word of a page."""
+        boxes = self.page(page_number)
+        columns = [(name, boxes[name]) for name, _ in WORD_COLUMNS if name != "text"]
+        return [dict({name: col[i].item() if HAS_NUMPY else col[i] for name, col in columns},
+                     text=self.string(int(text_id)))
+                for i, text_id in enumerate(boxes["text"])]
+
+    def confidence_stats(self, low: float = LOW_CONFIDENCE) -> List[Dict[str, Any]]:
+        """Per page: word count, mean/median/p10/min confidence and share of words below `low`."""
+        stats = []
+        conf = self.columns["conf"]
+        for page_number in self.pages:
+            start, end = self._range(page_number)
+            values = conf[start:end]
+            entry = {"page": page_number, "words": end - start}
+            if end > start:
+                if HAS_NUMPY:
+                    entry.update({
+                        "mean": round(float(values.mean()), 2),
+                        "median": round(float(np.median(values)), 2),
+                        "p10": round(float(np.percentile(values, 10)), 2),
+                        "min": round(float(values.min()), 2),
+                        "low_fraction": round(float((values < low).mean()), 4),
+                    })
+                else:
+                    ordered = sorted(values)
+                    n = len(ordered)
+                    entry.update({
+                        "mean": round(sum(ordered) / n, 2),
+                        "median": round((ordered[(n - 1) // 2] + ordered[n // 2]) / 2, 2),
+                        "p10": round(_percentile(ordered, 10), 2),
+                        "min": round(ordered[0], 2),
+                        "low_fraction": round(sum(1 for v in ordered if v < low) / n, 4),
+                    })
+            stats.append(entry)
+        return stats
+
+    def close(self) -> None:
+        self.columns = {}
+        try:
+            self._map.close()
+        except BufferError:
+            # A caller still holds a page slice; the mapping goes with it
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of sorted values (NumPy's default method)."""
+    pos = (len(ordered) - 1) * pct / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)